@@ -4,6 +4,7 @@ local ReportPlayer = Remotes:WaitForChild("ReportPlayer")
 
 local DISCORD_WEBHOOK_URL = ""
 local BOT_SERVER_URL = "https://good-veriee-bubers-5c8dd274.koyeb.app/report"
+local BOT_BATCH_URL = BOT_SERVER_URL .. "/batch"
 local Testing = false
 local API_KEY = "apikey_test_300192"
 
@@ -21,6 +22,12 @@ local ALLOWED_ABUSE_TYPES = {
 local REQUEST_TIMEOUT = 10
 local MAX_RETRIES = 3
 local RETRY_DELAY_BASE = 1
+local MAX_BATCH_SIZE = 10
+local FLUSH_INTERVAL = 2
+local MAX_SEND_ATTEMPTS = 5
+
+local pendingReports = {}
+local sendAttempts = setmetatable({}, { __mode = "k" })
 
 local function isValidAbuseType(abuseType)
 	return abuseType and type(abuseType) == "string" and ALLOWED_ABUSE_TYPES[abuseType] == true
@@ -222,25 +229,84 @@ ReportPlayer.OnServerEvent:Connect(function(plr, targetplruserid, additionalInfo
 		placeId = game.PlaceId
 	}
 
-	task.spawn(function()
-		print("[ReportServer] Sending report for player", reportedId, "by", reporterId)
-		print("[ReportServer] URL:", BOT_SERVER_URL)
-		print("[ReportServer] API Key set:", API_KEY ~= "" and "Yes" or "No")
-		
-		local success, response, statusCode = sendRequestWithRetry(BOT_SERVER_URL, reportData)
+	table.insert(pendingReports, reportData)
+	print("[ReportServer] Queued report for player", reportedId, "by", reporterId)
+end)
 
-		if success then
-			print("[ReportServer] Report sent successfully for player", reportedId, "by", reporterId)
-			if response and response.status then
-				print("[ReportServer] Response status:", response.status)
-				if response.report_id then
-					print("[ReportServer] Report ID:", response.report_id)
-				end
-			end
+local function requeueReports(reports)
+	local requeued = 0
+	for i = #reports, 1, -1 do
+		local report = reports[i]
+		local attempts = (sendAttempts[report] or 0) + 1
+		sendAttempts[report] = attempts
+		if attempts < MAX_SEND_ATTEMPTS then
+			table.insert(pendingReports, 1, report)
+			requeued = requeued + 1
 		else
-			warn("[ReportServer] Failed to send report to Discord bot")
-			warn("[ReportServer] Error:", response)
-			warn("[ReportServer] Status Code:", statusCode or "N/A")
+			warn("[ReportServer] Dropping report for player", report.reported.userId, "after", attempts, "failed attempts")
 		end
-	end)
-end)
\ No newline at end of file
+	end
+	if requeued > 0 then
+		print("[ReportServer] Requeued", requeued, "report(s) for the next flush")
+	end
+	return requeued
+end
+
+local function flushReports()
+	local batch = {}
+	while #pendingReports > 0 and #batch < MAX_BATCH_SIZE do
+		table.insert(batch, table.remove(pendingReports, 1))
+	end
+	
+	print("[ReportServer] Sending batch of", #batch, "report(s)")
+	print("[ReportServer] URL:", BOT_BATCH_URL)
+	print("[ReportServer] API Key set:", API_KEY ~= "" and "Yes" or "No")
+	
+	local success, response, statusCode = sendRequestWithRetry(BOT_BATCH_URL, batch)
+	
+	if success then
+		print("[ReportServer] Batch sent, accepted:", response.accepted or "?", "rejected:", response.rejected or "?")
+		local retry = {}
+		for _, result in ipairs(response.results or {}) do
+			local report = batch[(result.index or 0) + 1]
+			if result.status == "accepted" then
+				print("[ReportServer] Report ID:", result.report_id)
+			elseif report and result.retry then
+				table.insert(retry, report)
+			elseif report then
+				warn("[ReportServer] Report for player", report.reported.userId, "rejected:", result.message)
+			end
+		end
+		return requeueReports(retry) == 0
+	end
+	
+	warn("[ReportServer] Failed to send report batch to Discord bot")
+	warn("[ReportServer] Error:", response)
+	warn("[ReportServer] Status Code:", statusCode or "N/A")
+	-- No response, a server error or still rate limited: the reports were not
+	-- stored, so keep them for the next flush.
+	if statusCode == nil or statusCode == 429 or statusCode >= 500 then
+		requeueReports(batch)
+	end
+	return false
+end
+
+-- Stop at the first failed flush so requeued reports wait for the next interval.
+local function flushPendingReports()
+	while #pendingReports > 0 do
+		if not flushReports() then
+			break
+		end
+	end
+end
+
+task.spawn(function()
+	while true do
+		task.wait(FLUSH_INTERVAL)
+		flushPendingReports()
+	end
+end)
+
+game:BindToClose(function()
+	flushPendingReports()
+end)
@@ -0,0 +1,74 @@
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+from typing import Dict, Optional, Tuple
+
+def derive_secret(*parts: str) -> bytes:
+    return hashlib.sha256("\0".join(parts).encode()).digest()
+
+class SessionManager:
+    """Signed admin session tokens that are verified without the database.
+    
+    A token is `<session id>.<expiry>.<signature>`, where the signature is an
+    HMAC over the id and expiry, so validity is checked in memory. Logging out
+    adds the session id to a revocation set that only has to remember a
+    session until its token would have expired anyway.
+    """
+
+    def __init__(self, secret: bytes, ttl: int = 86400):
+        self._secret = secret
+        self.ttl = ttl
+        self._revoked: Dict[str, int] = {}
+
+    def _sign(self, message: str) -> str:
+        digest = hmac.new(self._secret, message.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+    def issue(self) -> str:
+        session_id = secrets.token_urlsafe(16)
+        expires_at = int(time.time()) + self.ttl
+        message = f"{session_id}.{expires_at}"
+        return f"{message}.{self._sign(message)}"
+
+    def _parse(self, token: str) -> Optional[Tuple[str, int]]:
+        # Issued tokens are ASCII; compare_digest would raise on other strings.
+        if not token.isascii():
+            return None
+        parts = token.split(".")
+        if len(parts) != 3:
+            return None
+        session_id, expires_at, signature = parts
+        if not hmac.compare_digest(signature.encode(), self._sign(f"{session_id}.{expires_at}").encode()):
+            return None
+        try:
+            return session_id, int(expires_at)
+        except ValueError:
+            return None
+
+    def verify(self, token: str) -> bool:
+        parsed = self._parse(token)
+        if parsed is None:
+            return False
+        session_id, expires_at = parsed
+        return expires_at > time.time() and session_id not in self._revoked
+
+    def revoke(self, token: str) -> Optional[Tuple[str, int]]:
+        """Revoke a valid token; returns (session id, expiry) for persisting."""
+        parsed = self._parse(token)
+        if parsed is None or parsed[1] <= time.time():
+            return None
+        self._revoked[parsed[0]] = parsed[1]
+        return parsed
+
+    def load_revoked(self, revoked: Dict[str, int]):
+        self._revoked.update(revoked)
+        self.prune()
+
+    def prune(self) -> int:
+        now = time.time()
+        expired = [session_id for session_id, expires_at in self._revoked.items() if expires_at <= now]
+        for session_id in expired:
+            del self._revoked[session_id]
+        return len(expired)
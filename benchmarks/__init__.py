@@ -0,0 +1 @@
+"""Load-generation and query benchmarks; run with `python -m benchmarks --help`."""
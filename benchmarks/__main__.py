@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+from benchmarks import harness
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FIXTURES = os.path.join(tempfile.gettempdir(), "report-bot-benchmarks")
+
+def _values(text: str, kind=float) -> List:
+    return [kind(value) for value in text.split(",") if value.strip()]
+
+def scenarios(args) -> List[Dict]:
+    if args.command == "ingest":
+        suffix = f"-batch{args.batch_size}" if args.batch_size else ""
+        return [{"scenario": f"ingest-{rate:g}rps{suffix}", "rate": rate} for rate in _values(args.rates)]
+    return [{"scenario": f"{args.command}-{rows}", "rows": rows} for rows in _values(args.rows, int)]
+
+async def run_scenario(args, scenario: Dict) -> Dict:
+    await harness.reset_postgres()
+    if args.command == "ingest":
+        from benchmarks import ingest
+        harness.quiet_console()
+        result = await ingest.run(scenario["rate"], args.duration, seed=args.seed, batch_size=args.batch_size,
+                                  connections=args.connections, drain_timeout=args.drain_timeout, warmup=args.warmup,
+                                  channel={"latency": args.discord_latency, "limit": args.discord_limit})
+    elif args.command == "dashboard":
+        from benchmarks import dashboard
+        harness.quiet_console()
+        result = await dashboard.run(scenario["rows"], seed=args.seed, iterations=args.iterations,
+                                     data_dir=os.environ["DATA_DIR"])
+    else:
+        from benchmarks import plans
+        harness.quiet_console()
+        result = await plans.run(scenario["rows"], seed=args.seed, data_dir=os.environ["DATA_DIR"])
+    return {"scenario": scenario["scenario"], **result}
+
+def spawn(argv: List[str], scenario: Dict, data_dir: str) -> Dict:
+    """Run one scenario in a fresh interpreter so it starts from its own empty database."""
+    os.makedirs(data_dir, exist_ok=True)
+    output = os.path.join(data_dir, "result.json")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.getenv("PYTHONPATH")])))
+    command = [sys.executable, "-m", "benchmarks", "--scenario", json.dumps(scenario),
+               "--data-dir", data_dir, "--scenario-output", output, *argv]
+    subprocess.run(command, cwd=data_dir, env=env, check=True)
+    with open(output) as f:
+        return json.load(f)
+
+def print_result(result: Dict, verbose: bool = False):
+    if "latency" in result:
+        latency = result["latency"]
+        print(f"{result['scenario']}: p50 {latency['p50_ms']}ms, p99 {latency['p99_ms']}ms, "
+              f"{result['throughput_rps']} reports/s, statuses {result['statuses']}, "
+              f"db {result['db_bytes'] / 1e6:.1f}MB, drained in {result['drain_seconds']}s, "
+              f"discord {result['discord']['messages']} messages / {result['discord']['rate_limited']} 429s")
+        return
+    if "violations" in result:
+        status = f"{result['violations']} violations" if result["checked"] else "not checked on Postgres"
+        print(f"{result['scenario']}: {status}, fixture {result['fixture']}")
+        for name, statements in result["queries"].items():
+            for statement in statements:
+                if statement["violations"] or verbose:
+                    print(f"  {name}: {statement['sql'][:160]}")
+                    for line in statement["plan"]:
+                        marker = "!!" if line in statement["violations"] else "  "
+                        print(f"    {marker} {line}")
+        return
+    print(f"{result['scenario']}: db {result['db_bytes'] / 1e6:.1f}MB, fixture {result['fixture']}")
+    for name, latency in result["queries"].items():
+        print(f"  {name:<20} p50 {latency['p50_ms']:>10}ms   p99 {latency['p99_ms']:>10}ms")
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Load and query benchmarks for the report bot")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the generated reports (default: 1)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against the results JSON of an earlier run")
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--scenario-output", help=argparse.SUPPRESS)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    ingest = subparsers.add_parser("ingest", help="Drive POST /report at fixed rates")
+    ingest.add_argument("--rates", default="100,1000", help="Comma-separated reports per second (default: 100,1000)")
+    ingest.add_argument("--duration", type=float, default=10, help="Seconds of load per rate (default: 10)")
+    ingest.add_argument("--warmup", type=float, default=1, help="Unmeasured seconds of load before each run (default: 1)")
+    ingest.add_argument("--batch-size", type=int, default=0, help="Send to /report/batch in groups of this size")
+    ingest.add_argument("--connections", type=int, default=256, help="Client connection limit (default: 256)")
+    ingest.add_argument("--drain-timeout", type=float, default=60, help="Seconds to wait for Discord delivery (default: 60)")
+    ingest.add_argument("--discord-latency", type=float, default=0.08, help="Base Discord send latency in seconds (default: 0.08)")
+    ingest.add_argument("--discord-limit", type=int, default=5, help="Discord messages allowed per 5 seconds (default: 5)")
+    
+    dashboard = subparsers.add_parser("dashboard", help="Time the dashboard queries against report fixtures")
+    dashboard.add_argument("--rows", default="10000,1000000,10000000", help="Comma-separated fixture sizes (default: 10000,1000000,10000000)")
+    dashboard.add_argument("--iterations", type=int, default=20, help="Timed calls per query (default: 20)")
+    dashboard.add_argument("--fixtures", default=DEFAULT_FIXTURES, help=f"Directory for cached SQLite fixtures (default: {DEFAULT_FIXTURES})")
+    
+    plans = subparsers.add_parser("plans", help="Explain the hot queries against a fixture and fail on full scans or temp B-trees")
+    plans.add_argument("--rows", default="100000", help="Comma-separated fixture sizes (default: 100000)")
+    plans.add_argument("--fixtures", default=DEFAULT_FIXTURES, help=f"Directory for cached SQLite fixtures (default: {DEFAULT_FIXTURES})")
+    plans.add_argument("--verbose", action="store_true", help="Print every plan, not only the violations")
+    
+    args = parser.parse_args()
+    
+    if args.scenario_output:
+        harness.prepare_environment(args.data_dir)
+        result = asyncio.run(run_scenario(args, json.loads(args.scenario)))
+        with open(args.scenario_output, "w") as f:
+            json.dump(result, f, indent=2)
+        return
+    
+    argv = sys.argv[1:]
+    results = []
+    with tempfile.TemporaryDirectory(prefix="report-bot-bench-") as scratch:
+        for scenario in scenarios(args):
+            if args.command == "dashboard":
+                data_dir = os.path.join(args.fixtures, harness.fixture_name(scenario["rows"], args.seed))
+            elif args.command == "plans":
+                # The plan check inserts a report, so it keeps its own fixtures.
+                data_dir = os.path.join(args.fixtures, f"plans-{harness.fixture_name(scenario['rows'], args.seed)}")
+            else:
+                data_dir = os.path.join(scratch, scenario["scenario"])
+            result = spawn(argv, scenario, data_dir)
+            print_result(result, getattr(args, "verbose", False))
+            results.append(result)
+    
+    report = {"environment": harness.environment_info(), "seed": args.seed, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            harness.compare(results, json.load(f)["results"])
+    if any(result.get("violations") for result in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
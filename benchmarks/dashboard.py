@@ -0,0 +1,83 @@
+"""Time the dashboard and listing queries against a fixture of generated reports.
+
+Import only after harness.prepare_environment(); the bot modules read their
+configuration at import time.
+"""
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import database
+import discord_bot
+from benchmarks.harness import summarize_latencies
+from benchmarks.payloads import FIRST_USER_ID, PayloadGenerator
+
+FIXTURE_SPAN = 90 * 86400
+FIXTURE_MARKER = "fixture-complete"
+
+async def build_fixture(rows: int, seed: int, data_dir: str) -> Dict:
+    """Fill the database with `rows` reports unless data_dir already holds a finished fixture."""
+    marker = os.path.join(data_dir, FIXTURE_MARKER)
+    if os.path.exists(marker) and not database.USE_POSTGRES:
+        await database.init_database()
+        return {"reused": True, "seconds": 0.0}
+    
+    for name in ("reports.db", "reports.db-wal", "reports.db-shm"):
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+    
+    await database.init_database()
+    started = time.monotonic()
+    generator = PayloadGenerator(seed)
+    end = int(time.time() // 86400 * 86400)
+    for chunk in generator.chunks(rows, end, FIXTURE_SPAN):
+        await database.add_reports(chunk)
+    seconds = time.monotonic() - started
+    
+    with open(marker, "w") as f:
+        f.write(f"{rows}\n")
+    return {"reused": False, "seconds": round(seconds, 2), "rows_per_second": round(rows / seconds, 1)}
+
+def dashboard_queries() -> List[Tuple[str, Callable[[], Awaitable]]]:
+    top_player = FIRST_USER_ID
+    return [
+        ("report_stats", lambda: database.get_report_stats()),
+        ("report_stats_exact", lambda: database.get_report_stats(exact=True)),
+        ("most_reported", lambda: database.get_most_reported_players(10)),
+        ("most_reported_24h", lambda: database.get_most_reported_players(10, 86400)),
+        ("top_reporters", lambda: database.get_top_reporters(10)),
+        ("recent_detailed", lambda: database.get_recent_reports_detailed(20)),
+        ("abuse_types", lambda: database.get_reports_by_abuse_type()),
+        ("reports_by_hour", lambda: database.get_reports_by_hour()),
+        ("reports_today", lambda: database.get_reports_today()),
+        ("reports_week", lambda: database.get_reports_this_week()),
+        ("reports_month", lambda: database.get_reports_this_month()),
+        ("unique_7d", lambda: database.get_unique_counts(7 * 86400)),
+        ("user_reports_page", lambda: database.get_reports_by_user_page(top_player)),
+        ("search_page", lambda: database.search_reports_page("aimbot")),
+        ("dashboard_snapshot", lambda: discord_bot.build_dashboard_data()),
+    ]
+
+async def run(rows: int, seed: int = 1, iterations: int = 20, data_dir: str = "") -> Dict:
+    """Build (or reuse) a `rows` fixture and time each query `iterations` times after one warm-up call."""
+    try:
+        fixture = await build_fixture(rows, seed, data_dir)
+        queries = {}
+        for name, query in dashboard_queries():
+            await query()
+            latencies = []
+            for _ in range(iterations):
+                started = time.monotonic()
+                await query()
+                latencies.append(time.monotonic() - started)
+            queries[name] = summarize_latencies(latencies)
+        
+        return {
+            "rows": rows,
+            "fixture": fixture,
+            "db_bytes": await database.get_database_size(),
+            "queries": queries
+        }
+    finally:
+        await database.close_database()
@@ -0,0 +1,79 @@
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import discord
+
+class FakeChannel:
+    """Stand-in for a Discord text channel with network latency and rate limits.
+    
+    Each send takes `latency` seconds plus exponentially distributed jitter.
+    Sends are limited to `limit` per `period` seconds like a channel bucket;
+    a send over the limit is answered with a 429, and the channel waits out
+    `retry_after` and tries again the way discord.py does, raising
+    discord.HTTPException only after `max_retries` 429s in a row.
+    """
+
+    def __init__(self, latency: float = 0.08, jitter: float = 0.04, limit: int = 5, period: float = 5,
+                 max_retries: int = 5, seed: int = 1):
+        self.latency = latency
+        self.jitter = jitter
+        self.limit = limit
+        self.period = period
+        self.max_retries = max_retries
+        self.rng = random.Random(seed)
+        self._window_start = 0.0
+        self._window_sends = 0
+        self.messages: List[int] = []
+        self.send_latencies: List[float] = []
+        self.rate_limited = 0
+        self.failed = 0
+
+    def _retry_after(self) -> Optional[float]:
+        now = time.monotonic()
+        if now - self._window_start >= self.period:
+            self._window_start = now
+            self._window_sends = 0
+        if self._window_sends >= self.limit:
+            return self._window_start + self.period - now
+        self._window_sends += 1
+        return None
+
+    async def send(self, content: Optional[str] = None, embed: Optional[discord.Embed] = None,
+                   embeds: Optional[List[discord.Embed]] = None):
+        started = time.monotonic()
+        for _ in range(self.max_retries + 1):
+            await asyncio.sleep(self.latency + self.rng.expovariate(1 / self.jitter) if self.jitter else self.latency)
+            retry_after = self._retry_after()
+            if retry_after is None:
+                self.messages.append(len(embeds) if embeds else 1)
+                self.send_latencies.append(time.monotonic() - started)
+                return
+            self.rate_limited += 1
+            await asyncio.sleep(retry_after)
+        
+        self.failed += 1
+        response = SimpleNamespace(status=429, reason="Too Many Requests")
+        raise discord.HTTPException(response, {"message": "You are being rate limited.", "code": 0})
+
+    def stats(self) -> Dict:
+        return {
+            "messages": len(self.messages),
+            "embeds": sum(self.messages),
+            "rate_limited": self.rate_limited,
+            "failed": self.failed
+        }
+
+class FakeBot:
+    """Just enough of discord.Client for the report dispatcher."""
+
+    def __init__(self, channel: FakeChannel):
+        self.channel = channel
+
+    async def wait_until_ready(self):
+        pass
+
+    def get_channel(self, channel_id: int) -> FakeChannel:
+        return self.channel
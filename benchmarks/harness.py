@@ -0,0 +1,101 @@
+import logging
+import math
+import os
+import platform
+import sqlite3
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+# Environment for the bot modules under test. Anything already set wins, so a
+# run can change any setting; DATABASE_URL is only taken from
+# BENCHMARK_DATABASE_URL because each scenario wipes its database.
+ENVIRONMENT_DEFAULTS = {
+    "DISCORD_BOT_TOKEN": "benchmark",
+    "DISCORD_CHANNEL_ID": "1",
+    "RATE_LIMIT_REQUESTS": "1000000000",
+    "OUTBOX_BACKOFF_BASE": "1",
+}
+
+def prepare_environment(data_dir: str):
+    """Point the bot at a scratch database; must run before config or database is imported."""
+    os.makedirs(data_dir, exist_ok=True)
+    os.environ["DATA_DIR"] = data_dir
+    os.environ["DATABASE_URL"] = os.getenv("BENCHMARK_DATABASE_URL", "")
+    for key, value in ENVIRONMENT_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+async def reset_postgres():
+    url = os.getenv("BENCHMARK_DATABASE_URL", "")
+    if not url:
+        return
+    import asyncpg
+    conn = await asyncpg.connect(url)
+    try:
+        await conn.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+    finally:
+        await conn.close()
+
+def quiet_console():
+    """Keep the per-report INFO lines in the log file but off the terminal."""
+    for logger in [logging.getLogger()] + [logging.getLogger(name) for name in logging.root.manager.loggerDict]:
+        for handler in getattr(logger, "handlers", []):
+            if type(handler) is logging.StreamHandler:
+                handler.setLevel(logging.WARNING)
+
+def fixture_name(rows: int, seed: int) -> str:
+    # Fixture reports end at the midnight before the build, so fixtures are
+    # rebuilt daily to keep the 24h/7d/30d windows over comparable data.
+    return f"{rows}-seed{seed}-{time.strftime('%Y%m%d', time.gmtime())}"
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize_latencies(latencies: List[float]) -> Dict:
+    """p50/p90/p99/max of latencies in seconds, reported in milliseconds."""
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p90_ms": round(percentile(values, 90) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0
+    }
+
+def environment_info() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sqlite": sqlite3.sqlite_version,
+        "backend": "postgres" if os.getenv("BENCHMARK_DATABASE_URL") else "sqlite",
+        "cpus": os.cpu_count()
+    }
+
+def _flatten(result: Dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def compare(results: List[Dict], baseline: List[Dict], out=sys.stdout):
+    """Print the change in every numeric metric against a baseline run of the same scenarios."""
+    previous = {result["scenario"]: _flatten(result) for result in baseline}
+    for result in results:
+        before = previous.get(result["scenario"])
+        if before is None:
+            print(f"{result['scenario']}: not in baseline", file=out)
+            continue
+        print(f"{result['scenario']}:", file=out)
+        for name, value in _flatten(result).items():
+            old: Optional[float] = before.get(name)
+            if old is None or old == value:
+                continue
+            change = f"{(value - old) / old * 100:+.1f}%" if old else "new"
+            print(f"  {name}: {old} -> {value} ({change})", file=out)
@@ -0,0 +1,101 @@
+"""Drive POST /report in-process at a fixed arrival rate.
+
+Import only after harness.prepare_environment(); the bot modules read their
+configuration at import time.
+"""
+import asyncio
+import time
+from typing import Dict, List
+
+from aiohttp import TCPConnector
+from aiohttp.test_utils import TestClient, TestServer
+
+import database
+import discord_bot
+import dispatcher
+from benchmarks.fake_discord import FakeBot, FakeChannel
+from benchmarks.harness import summarize_latencies
+from benchmarks.payloads import PayloadGenerator
+
+async def _drain(timeout: float) -> float:
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        if not (await database.get_outbox_backlog())["pending"]:
+            break
+        await asyncio.sleep(0.1)
+    return time.monotonic() - started
+
+async def run(rate: float, duration: float, seed: int = 1, batch_size: int = 0, connections: int = 256,
+              drain_timeout: float = 60, warmup: float = 1, channel: Dict = None) -> Dict:
+    """Send `rate` reports per second for `duration` seconds and measure the result.
+    
+    Arrivals follow a fixed schedule, so a slow server does not slow the load
+    down, and each latency is measured from a request's scheduled start, so
+    queueing behind slow requests counts against the server. With
+    `batch_size` the reports go to /report/batch in groups of that size.
+    The first `warmup` seconds of load at the same rate are not measured.
+    """
+    await database.init_database()
+    generator = PayloadGenerator(seed)
+    fake_channel = FakeChannel(seed=seed, **(channel or {}))
+    client = TestClient(TestServer(discord_bot.app), connector=TCPConnector(limit=connections))
+    await client.start_server()
+    dispatcher.start_dispatchers(FakeBot(fake_channel))
+    
+    path = "/report/batch" if batch_size else "/report"
+    per_request = max(1, batch_size)
+    interval = per_request / rate
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def send(scheduled: float, body):
+        delay = scheduled - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with client.post(path, json=body) as response:
+            await response.read()
+            statuses[str(response.status)] = statuses.get(str(response.status), 0) + 1
+        latencies.append(time.monotonic() - scheduled)
+
+    async def load(seconds: float) -> float:
+        now = int(time.time())
+        requests = int(rate * seconds / per_request)
+        if batch_size:
+            bodies = [[generator.payload(now) for _ in range(batch_size)] for _ in range(requests)]
+        else:
+            bodies = [generator.payload(now) for _ in range(requests)]
+        
+        started = time.monotonic()
+        await asyncio.gather(*(send(started + i * interval, body) for i, body in enumerate(bodies)))
+        return time.monotonic() - started
+    
+    try:
+        if warmup > 0:
+            await load(warmup)
+            latencies.clear()
+            statuses.clear()
+        
+        reports_before = await database.get_total_reports()
+        elapsed = await load(duration)
+        reports = await database.get_total_reports() - reports_before
+        drain_seconds = await _drain(drain_timeout)
+        return {
+            "rate": rate,
+            "duration": duration,
+            "batch_size": batch_size,
+            "requests": len(latencies),
+            "statuses": statuses,
+            "latency": summarize_latencies(latencies),
+            "throughput_rps": round(reports / elapsed, 1),
+            "reports": reports,
+            "db_bytes": await database.get_database_size(),
+            "drain_seconds": round(drain_seconds, 2),
+            "outbox": await database.get_outbox_backlog(),
+            "dispatcher": dict(dispatcher.stats),
+            "discord": {**fake_channel.stats(), "send": summarize_latencies(fake_channel.send_latencies)},
+            "ingest": database.get_ingest_stats()
+        }
+    finally:
+        await dispatcher.stop_dispatchers()
+        await client.close()
+        await database.close_database()
@@ -0,0 +1,97 @@
+import random
+import uuid
+from typing import Dict, Iterator, List
+
+ABUSE_TYPES = [
+    ("Exploiting", 30),
+    ("Spam / Flood", 20),
+    ("Inappropriate Avatar", 12),
+    ("Bug Abuse", 10),
+    ("Discrimination / Slurs", 8),
+    ("Adult Content", 5),
+    ("Roblox Guidlines", 5),
+    ("Other", 10),
+]
+
+INFO_WORDS = [
+    "flying", "speed", "hacking", "teleporting", "spamming", "chat", "noclip", "aimbot",
+    "kill", "aura", "swearing", "trading", "scam", "avatar", "glitch", "wall", "map",
+    "server", "again", "keeps", "everyone", "lobby", "round", "fling", "exploit",
+]
+
+FIRST_USER_ID = 1_000_000_000
+
+class PayloadGenerator:
+    """Seeded report payloads shaped like the ones ReportServer.lua sends.
+    
+    Reported players are skewed so a few collect most of the reports, the way
+    real abuse reports cluster on a handful of exploiters. The same seed always
+    produces the same sequence of payloads.
+    """
+
+    def __init__(self, seed: int = 1, players: int = 50000, reporters: int = 20000,
+                 servers: int = 200, place_id: int = 132682513110700):
+        self.rng = random.Random(seed)
+        self.players = players
+        self.reporters = reporters
+        self.place_id = place_id
+        self.server_ids = [str(uuid.UUID(int=self.rng.getrandbits(128), version=4)) for _ in range(servers)]
+        self._abuse_types = [name for name, _ in ABUSE_TYPES]
+        self._abuse_weights = [weight for _, weight in ABUSE_TYPES]
+
+    def _user(self, user_id: int) -> Dict:
+        return {
+            "name": f"Player{user_id}",
+            "displayName": f"Player {user_id}",
+            "userId": user_id,
+            "thumbnail": f"https://www.roblox.com/headshot-thumbnail/image?userId={user_id}&width=420&height=420&format=png",
+            "profileUrl": f"https://www.roblox.com/users/{user_id}/profile"
+        }
+
+    def _reported_id(self) -> int:
+        return FIRST_USER_ID + int(self.players * self.rng.random() ** 3)
+
+    def _reporter_id(self) -> int:
+        return FIRST_USER_ID + self.players + self.rng.randrange(self.reporters)
+
+    def _additional_info(self) -> str:
+        if self.rng.random() < 0.3:
+            return ""
+        return " ".join(self.rng.choices(INFO_WORDS, k=self.rng.randint(2, 30)))
+
+    def payload(self, timestamp: int) -> Dict:
+        return {
+            "reporter": self._user(self._reporter_id()),
+            "reported": self._user(self._reported_id()),
+            "abuseType": self.rng.choices(self._abuse_types, self._abuse_weights)[0],
+            "additionalInfo": self._additional_info(),
+            "timestamp": timestamp,
+            "serverId": self.rng.choice(self.server_ids),
+            "placeId": self.place_id
+        }
+
+    def rows(self, count: int, end: int, span: int) -> Iterator[Dict]:
+        """Reports in database.add_reports() form, spread evenly over `span` seconds before `end`."""
+        for i in range(count):
+            timestamp = end - span + (i * span) // count
+            reported_id = self._reported_id()
+            yield {
+                "reporter_id": self._reporter_id(),
+                "reported_id": reported_id,
+                "abuse_type": self.rng.choices(self._abuse_types, self._abuse_weights)[0],
+                "additional_info": self._additional_info(),
+                "timestamp": timestamp,
+                "server_id": self.rng.choice(self.server_ids),
+                "place_id": self.place_id,
+                "outbox_payload": None
+            }
+
+    def chunks(self, count: int, end: int, span: int, size: int = 5000) -> Iterator[List[Dict]]:
+        chunk = []
+        for row in self.rows(count, end, span):
+            chunk.append(row)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
@@ -0,0 +1,173 @@
+"""Check the plans of the database module's queries against a report fixture.
+
+Every public coroutine of the database module, apart from the maintenance and
+setup functions in SKIPPED, is called with capture on, each statement it runs
+is explained, and a plan that scans a table without an index or sorts through
+a temporary B-tree is a violation unless ALLOWANCES says why it is expected.
+Plans are only checked on SQLite; on Postgres they are reported as they are.
+
+Import only after harness.prepare_environment(); the bot modules read their
+configuration at import time.
+"""
+import functools
+import inspect
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import database
+from benchmarks.dashboard import build_fixture
+from benchmarks.payloads import FIRST_USER_ID, PayloadGenerator
+
+# Tables that grow with the number of reports; scanning one of them whole
+# is a violation. Small tables such as counters and admin_users may be scanned.
+LARGE_TABLES = {"reports", "report_outbox", "report_rollups", "report_sketches", "player_report_counts",
+                "reporter_counts", "player_daily_counts", "reporter_daily_counts"}
+
+ORDER_BY_TEMP = "USE TEMP B-TREE FOR ORDER BY"
+GROUP_BY_TEMP = "USE TEMP B-TREE FOR GROUP BY"
+
+# (call, plan line prefix) -> why the plan step is expected on a hot path.
+ALLOWANCES = {
+    ("get_report_context", ORDER_BY_TEMP): "ranks one player's per-abuse-type counts, a row per abuse type",
+    ("get_report_context", GROUP_BY_TEMP): "adds one player's archived per-abuse-type counts to the live ones",
+    ("get_most_common_reason", ORDER_BY_TEMP): "ranks one player's per-abuse-type counts, a row per abuse type",
+    ("get_most_common_reason(exclude_timestamp)", ORDER_BY_TEMP): "ranks one player's per-abuse-type counts, a row per abuse type",
+    ("get_report_stats", ORDER_BY_TEMP): "ranks the all-time rollup totals, a row per abuse type",
+    ("get_reports_by_abuse_type", ORDER_BY_TEMP): "ranks the all-time rollup totals, a row per abuse type",
+    ("search_reports", ORDER_BY_TEMP): "full-text matches come out of the index unordered, so they are sorted by time",
+    ("search_reports_page", ORDER_BY_TEMP): "full-text matches come out of the index unordered, so they are sorted by time",
+    ("get_all_admins", ORDER_BY_TEMP): "lists the admins, a handful of rows",
+    ("get_archive_stats", GROUP_BY_TEMP): "totals the archive per month, a few chunks per month",
+    ("get_most_reported_players(window)", GROUP_BY_TEMP): "sums the window's daily counts per player before ranking",
+    ("get_most_reported_players(window)", ORDER_BY_TEMP): "ranks the summed window counts",
+    ("get_top_reporters(window)", GROUP_BY_TEMP): "sums the window's daily counts per reporter before ranking",
+    ("get_top_reporters(window)", ORDER_BY_TEMP): "ranks the summed window counts",
+}
+
+# Database functions that are not on a hot path, and why. Every other public
+# coroutine in the module is called, so a new query is checked by default.
+SKIPPED = {
+    "get_db_connection": "connection and schema setup",
+    "open_database": "connection and schema setup",
+    "close_database": "connection and schema setup",
+    "init_database": "connection and schema setup",
+    "explain_query": "runs the check itself",
+    "import_json_reports": "one-off import of a legacy file",
+    "migrate_json_to_db": "one-off import of a legacy file",
+    "add_report": "queued for the ingest buffer, which calls add_reports",
+    "warm_player_index": "startup scan that fills the player index",
+    "rebuild_sketches": "maintenance command that rebuilds from every report",
+    "rebuild_rollups": "maintenance command that rebuilds from every report",
+    "rebuild_leaderboards": "maintenance command that rebuilds from every report",
+    "archive_reports": "background job that walks old reports in id order",
+    "compact_database": "maintenance command",
+    "analyze_database": "maintenance command",
+    "get_database_size": "reads page counts, not tables",
+}
+
+# Hot functions private to the module, called on a player index miss.
+PRIVATE_HOT = ("_load_reported_entry", "_load_reporter_entry")
+
+# Optional arguments that select a different query, called in addition to the
+# call with only the required arguments.
+VARIANTS = {
+    "get_unique_counts": [("window",)],
+    "get_most_reported_players": [("window",)],
+    "get_top_reporters": [("window",)],
+    "get_time_since_last_report": [("exclude_timestamp",)],
+    "get_most_common_reason": [("exclude_timestamp",)],
+    "iter_reports": [("reported_id",), ("since",)],
+}
+
+SCAN = re.compile(r"^SCAN (\w+)")
+
+def arguments(latest_id: int) -> Dict[str, Any]:
+    """Values for the database functions' parameters by name, aimed at the fixture's busiest ids."""
+    now = int(time.time())
+    return {
+        "reported_id": FIRST_USER_ID,
+        "user_id": FIRST_USER_ID,
+        "reporter_id": FIRST_USER_ID + PayloadGenerator().players,
+        "report_id": latest_id,
+        "reports": [next(PayloadGenerator(seed=0).rows(1, now, 1))],
+        "exclude_timestamp": now,
+        "since": now - 86400,
+        "window": 7 * 86400,
+        "search_term": "aimbot",
+        "limit": 10,
+        "lease_seconds": 60,
+        "outbox_ids": [0],
+        "error": "plan check",
+        "discord_user_id": 1,
+        "session_id": "plan-check",
+        "expires_at": now,
+    }
+
+def hot_calls(latest_id: int) -> List[Tuple[str, Callable[[], Awaitable]]]:
+    """A call for every public coroutine of the database module not in SKIPPED, plus its VARIANTS."""
+    values = arguments(latest_id)
+    functions = [(name, function) for name, function in inspect.getmembers(database)
+                 if (inspect.iscoroutinefunction(function) or inspect.isasyncgenfunction(function))
+                 and function.__module__ == database.__name__
+                 and (not name.startswith("_") or name in PRIVATE_HOT) and name not in SKIPPED]
+    calls = []
+    for name, function in functions:
+        parameters = inspect.signature(function).parameters
+        required = tuple(parameter for parameter, spec in parameters.items() if spec.default is spec.empty)
+        for optional in [()] + VARIANTS.get(name, []):
+            missing = [parameter for parameter in required + optional if parameter not in values]
+            if missing:
+                raise KeyError(f"No plan check value for {name}({', '.join(missing)}); add it to arguments() or SKIPPED")
+            kwargs = {parameter: values[parameter] for parameter in required + optional}
+            label = f"{name}({', '.join(optional)})" if optional else name
+            calls.append((label, functools.partial(_call, function, kwargs)))
+    return calls
+
+async def _call(function: Callable, kwargs: Dict[str, Any]):
+    if inspect.isasyncgenfunction(function):
+        async for _ in function(**kwargs):
+            pass
+    else:
+        await function(**kwargs)
+
+def violations(call: str, plan: List[str]) -> List[str]:
+    found = []
+    for line in plan:
+        match = SCAN.match(line)
+        full_scan = match and match.group(1) in LARGE_TABLES and "USING" not in line
+        if not full_scan and not line.startswith("USE TEMP B-TREE"):
+            continue
+        if not any(call == allowed and line.startswith(prefix) for allowed, prefix in ALLOWANCES):
+            found.append(line)
+    return found
+
+async def run(rows: int, seed: int = 1, data_dir: str = "") -> Dict:
+    """Build (or reuse) a `rows` fixture and explain every statement the hot calls run."""
+    try:
+        fixture = await build_fixture(rows, seed, data_dir)
+        await database.analyze_database()
+        checked = not database.USE_POSTGRES
+        queries = {}
+        total = 0
+        latest_id = await database.get_total_reports()
+        for name, call in hot_calls(latest_id):
+            with database.capture_queries() as captured:
+                await call()
+            statements = []
+            for sql, params in dict.fromkeys(captured):
+                plan = await database.explain_query(sql, params)
+                found = violations(name, plan) if checked else []
+                total += len(found)
+                statements.append({"sql": " ".join(sql.split()), "plan": plan, "violations": found})
+            queries[name] = statements
+        
+        return {
+            "rows": rows,
+            "fixture": fixture,
+            "checked": checked,
+            "violations": total,
+            "queries": queries
+        }
+    finally:
+        await database.close_database()
@@ -23,6 +23,30 @@ if admin_ids_str:
 
 RATE_LIMIT_REQUESTS = int(get_env("RATE_LIMIT_REQUESTS", "10"))
 RATE_LIMIT_WINDOW = int(get_env("RATE_LIMIT_WINDOW", "60"))
+RATE_LIMIT_KEY = get_env("RATE_LIMIT_KEY", "ip")
+RATE_LIMIT_MAX_KEYS = int(get_env("RATE_LIMIT_MAX_KEYS", "100000"))
+REPORT_BATCH_MAX = int(get_env("REPORT_BATCH_MAX", "10"))
 ADMIN_PASSWORD = get_env("ADMIN_PASSWORD", "admin")
 PLACE_ID = get_env("PLACE_ID", "132682513110700")
+SESSION_SECRET = get_env("SESSION_SECRET", "")
+SESSION_TTL = int(get_env("SESSION_TTL", "86400"))
+ADMIN_SYNC_INTERVAL = float(get_env("ADMIN_SYNC_INTERVAL", "30"))
+METRICS_TOKEN = get_env("METRICS_TOKEN", "")
 
+
+DISPATCH_WORKERS = int(get_env("DISPATCH_WORKERS", "2"))
+OUTBOX_MAX_ATTEMPTS = int(get_env("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_BASE = int(get_env("OUTBOX_BACKOFF_BASE", "5"))
+OUTBOX_BACKOFF_MAX = int(get_env("OUTBOX_BACKOFF_MAX", "600"))
+OUTBOX_LEASE_SECONDS = int(get_env("OUTBOX_LEASE_SECONDS", "120"))
+OUTBOX_POLL_INTERVAL = int(get_env("OUTBOX_POLL_INTERVAL", "5"))
+COALESCE_WINDOW = float(get_env("COALESCE_WINDOW", "1.5"))
+COALESCE_THRESHOLD = int(get_env("COALESCE_THRESHOLD", "2"))
+DASHBOARD_CACHE_TTL = float(get_env("DASHBOARD_CACHE_TTL", "30"))
+DASHBOARD_CACHE_MIN_AGE = float(get_env("DASHBOARD_CACHE_MIN_AGE", "2"))
+DASHBOARD_STREAM_QUEUE = int(get_env("DASHBOARD_STREAM_QUEUE", "64"))
+ROBLOX_GAMES_API = get_env("ROBLOX_GAMES_API", "https://games.roblox.com/v1/games")
+ROBLOX_API_TIMEOUT = float(get_env("ROBLOX_API_TIMEOUT", "5"))
+ROBLOX_REFRESH_INTERVAL = float(get_env("ROBLOX_REFRESH_INTERVAL", "60"))
+RETENTION_DAYS = int(get_env("RETENTION_DAYS", "0"))
+ARCHIVE_INTERVAL = float(get_env("ARCHIVE_INTERVAL", "3600"))
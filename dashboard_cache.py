@@ -0,0 +1,63 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+class SnapshotCache:
+    """Serialised snapshot of an expensive JSON payload with single-flight rebuilds.
+    
+    A snapshot is served until it is older than `ttl`, or until it has been
+    invalidated and is at least `min_age` old; the latter bounds how often a
+    burst of invalidations can force a rebuild. Concurrent callers that find
+    the snapshot stale all wait on the same rebuild.
+    """
+
+    def __init__(self, compute: Callable[[], Awaitable[Dict]], ttl: float, min_age: float = 0):
+        self._compute = compute
+        self.ttl = ttl
+        self.min_age = min_age
+        self.data: Optional[Dict] = None
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._built_at = 0.0
+        self._version = 0
+        self._built_version = -1
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.rebuilds = 0
+
+    def invalidate(self):
+        self._version += 1
+
+    def _is_fresh(self) -> bool:
+        if self._body is None:
+            return False
+        age = time.monotonic() - self._built_at
+        if age >= self.ttl:
+            return False
+        return self._built_version == self._version or age < self.min_age
+
+    async def get(self) -> Tuple[bytes, str]:
+        if self._is_fresh():
+            self.hits += 1
+            return self._body, self._etag
+        
+        if self._rebuild_task is None:
+            self._rebuild_task = asyncio.create_task(self._rebuild())
+        return await asyncio.shield(self._rebuild_task)
+
+    async def _rebuild(self) -> Tuple[bytes, str]:
+        version = self._version
+        try:
+            data = await self._compute()
+            body = json.dumps(data).encode('utf-8')
+            self.data = data
+            self._body = body
+            self._etag = hashlib.sha1(body).hexdigest()
+            self._built_at = time.monotonic()
+            self._built_version = version
+            self.rebuilds += 1
+            return self._body, self._etag
+        finally:
+            self._rebuild_task = None
@@ -1,9 +1,29 @@
 import aiosqlite
+import codecs
+import collections
+import gzip
 import json
+import math
 import os
+import functools
+import itertools
+import re
+import shutil
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
 import asyncio
+import contextvars
+import inspect
+import sys
+import time
+
+import hll
+import logger
+import metrics
+import player_index
+
+log = logger.setup_logger("database")
 
 DATA_DIR = os.getenv("DATA_DIR", "/app/data")
 if not os.path.exists(DATA_DIR):
@@ -25,6 +45,85 @@ if USE_POSTGRES:
 else:
     POSTGRES_AVAILABLE = False
 
+_player_index = player_index.PlayerIndex()
+_index_loads = set()
+_admin_ids: Optional[Set[int]] = None
+_admin_version: Optional[int] = None
+_full_text_search = False
+_sketches: Dict[Tuple[str, int], hll.HyperLogLog] = {}
+
+ROLLUP_BUCKET_SECONDS = 3600
+ROLLUP_ALL_TIME = -1
+
+ROLLUP_BACKFILL_SQL = """
+    INSERT INTO report_rollups (bucket, abuse_type, place_id, count)
+    SELECT timestamp - timestamp % 3600, abuse_type, COALESCE(place_id, 0), COUNT(*)
+    FROM reports
+    WHERE NOT EXISTS (SELECT 1 FROM report_rollups)
+    GROUP BY 1, 2, 3
+"""
+
+# All-time totals per abuse type and place, kept under bucket -1 so the
+# abuse type breakdown reads a few rows instead of every hourly bucket.
+ROLLUP_ALL_TIME_BACKFILL_SQL = f"""
+    INSERT INTO report_rollups (bucket, abuse_type, place_id, count)
+    SELECT {ROLLUP_ALL_TIME}, abuse_type, place_id, SUM(count)
+    FROM report_rollups
+    WHERE bucket >= 0 AND NOT EXISTS (SELECT 1 FROM report_rollups WHERE bucket = {ROLLUP_ALL_TIME})
+    GROUP BY abuse_type, place_id
+"""
+
+LEADERBOARD_DAY_SECONDS = 86400
+LEADERBOARD_DAYS = 31
+
+LEADERBOARD_TABLES = {
+    "players": ("player_report_counts", "player_daily_counts", "reported_id"),
+    "reporters": ("reporter_counts", "reporter_daily_counts", "reporter_id"),
+}
+
+SKETCH_BUCKET_SECONDS = 86400
+SKETCH_ALL_TIME = -1
+SKETCH_PRECISION = 12
+
+SKETCH_METRICS = {
+    "reported": "reported_id",
+    "reporters": "reporter_id",
+}
+
+# Reports older than the retention period are moved into gzipped NDJSON
+# chunks, one or more per calendar month, of at most ARCHIVE_BATCH reports.
+# Windowed statistics read the last LEADERBOARD_DAYS days from live rows, so
+# retention is never shorter than that.
+ARCHIVE_BATCH = 5000
+ARCHIVE_MIN_DAYS = LEADERBOARD_DAYS + 1
+
+# Report timestamps are stored in a 32-bit INTEGER column on Postgres.
+MAX_TIMESTAMP = 2**31 - 1
+
+# Advisory lock key taken by every Postgres transaction that inserts reports
+# or rebuilds the tables the report triggers maintain.
+REPORT_WRITE_LOCK = 0x5245504f
+
+POSTGRES_SEARCH_VECTOR = "to_tsvector('simple', abuse_type || ' ' || COALESCE(additional_info, ''))"
+
+DB_READERS = int(os.getenv("DB_READERS", "4"))
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "256"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "200"))
+INGEST_MAX_DELAY_MS = float(os.getenv("INGEST_MAX_DELAY_MS", "5"))
+INGEST_DURABILITY = os.getenv("INGEST_DURABILITY", "normal").lower()
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "250"))
+
+SQLITE_PRAGMAS = (
+    # Only takes effect on a new database; `manage.py compact` converts an old one.
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    f"PRAGMA synchronous={'FULL' if INGEST_DURABILITY == 'full' else 'NORMAL'}",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+    "PRAGMA busy_timeout=5000",
+)
+
 async def get_db_connection():
     if USE_POSTGRES and POSTGRES_AVAILABLE:
         return await asyncpg.connect(DATABASE_URL)
@@ -32,459 +131,2505 @@ async def get_db_connection():
         os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
         return await aiosqlite.connect(DB_FILE)
 
+class ConnectionPool:
+    """One writer and N read-only connections kept open for the process lifetime.
+
+    SQLite allows a single writer at a time, so writes are serialised behind a
+    lock on the writer connection while reads are spread across the readers,
+    which WAL mode lets run concurrently with the writer.
+    """
+
+    def __init__(self, path: str, readers: int = DB_READERS):
+        self.path = path
+        self.size = max(1, readers)
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: asyncio.Queue = asyncio.Queue()
+        self._connections: List[aiosqlite.Connection] = []
+        self._write_lock = asyncio.Lock()
+
+    async def _connect(self, query_only: bool = False) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.path, cached_statements=DB_STATEMENT_CACHE)
+        conn.row_factory = aiosqlite.Row
+        for pragma in SQLITE_PRAGMAS:
+            await conn.execute(pragma)
+        if query_only:
+            await conn.execute("PRAGMA query_only=ON")
+        self._connections.append(conn)
+        return conn
+
+    async def open(self):
+        self._writer = await self._connect()
+        for _ in range(self.size):
+            self._readers.put_nowait(await self._connect(query_only=True))
+
+    async def close(self):
+        if self._writer is not None:
+            await self._writer.execute("PRAGMA optimize")
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
+        self._writer = None
+
+    @asynccontextmanager
+    async def reader(self):
+        conn = await self._readers.get()
+        try:
+            yield TimedConnection(conn)
+        finally:
+            self._readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def writer(self):
+        async with self._write_lock:
+            try:
+                yield TimedConnection(self._writer)
+                await self._writer.commit()
+            except BaseException:
+                await self._writer.rollback()
+                raise
+
+@functools.lru_cache(maxsize=512)
+def _to_postgres(sql: str) -> str:
+    """Rewrite qmark placeholders as asyncpg's $1, $2, ... outside string literals."""
+    numbers = itertools.count(1)
+    parts = sql.split("'")
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\?", lambda _: f"${next(numbers)}", parts[i])
+    return "'".join(parts)
+
+def _dialect(sqlite: str, postgres: str) -> str:
+    return postgres if USE_POSTGRES else sqlite
+
+class PostgresCursor:
+    def __init__(self, rows: list):
+        self._rows = rows
+    
+    async def fetchone(self):
+        return self._rows[0] if self._rows else None
+    
+    async def fetchall(self):
+        return self._rows
+    
+    async def close(self):
+        pass
+
+class PostgresConnection:
+    """An asyncpg connection behind the subset of the aiosqlite API used in this module."""
+
+    def __init__(self, conn):
+        self._conn = conn
+    
+    async def execute(self, sql: str, params: Sequence[Any] = ()) -> PostgresCursor:
+        return PostgresCursor(await self._conn.fetch(_to_postgres(sql), *params))
+    
+    async def executemany(self, sql: str, params: Sequence[Sequence[Any]]):
+        await self._conn.executemany(_to_postgres(sql), params)
+    
+    async def execute_fetchall(self, sql: str, params: Sequence[Any] = ()) -> list:
+        return await self._conn.fetch(_to_postgres(sql), *params)
+
+class PostgresPool:
+    """asyncpg pool with the same reader()/writer() interface as ConnectionPool.
+
+    Postgres handles concurrent writers itself, so writer() only wraps the
+    borrowed connection in a transaction instead of taking a global lock.
+    """
+
+    def __init__(self, dsn: str, size: int = DB_READERS + 1):
+        self.dsn = dsn
+        self.size = max(2, size)
+        self._pool = None
+    
+    async def open(self):
+        self._pool = await asyncpg.create_pool(
+            self.dsn, min_size=1, max_size=self.size,
+            statement_cache_size=DB_STATEMENT_CACHE
+        )
+    
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+    
+    @asynccontextmanager
+    async def reader(self):
+        async with self._pool.acquire() as conn:
+            yield TimedConnection(PostgresConnection(conn))
+    
+    @asynccontextmanager
+    async def writer(self):
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                yield TimedConnection(PostgresConnection(conn))
+
+_captured_queries: contextvars.ContextVar[Optional[List[Tuple[str, tuple]]]] = contextvars.ContextVar("captured_queries", default=None)
+_query_plans: Dict[str, List[str]] = {}
+
+class TimedConnection:
+    """A pooled connection that times each statement and logs the slow ones.
+    
+    A statement taking longer than SLOW_QUERY_MS is logged with the public
+    function that issued it, the shape of its parameters (types and lengths,
+    never values) and its query plan. Anything else is passed through to the
+    wrapped connection.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+    async def execute(self, sql: str, params: Sequence[Any] = ()):
+        started = time.perf_counter()
+        result = await self._conn.execute(sql, params)
+        await self._observe(sql, params, started)
+        return result
+
+    async def executemany(self, sql: str, params: Sequence[Sequence[Any]]):
+        params = list(params)
+        started = time.perf_counter()
+        await self._conn.executemany(sql, params)
+        await self._observe(sql, params[0] if params else (), started, len(params))
+
+    async def execute_fetchall(self, sql: str, params: Sequence[Any] = ()):
+        started = time.perf_counter()
+        result = await self._conn.execute_fetchall(sql, params)
+        await self._observe(sql, params, started)
+        return result
+
+    async def _observe(self, sql: str, params: Sequence[Any], started: float, rows: int = 1):
+        elapsed = (time.perf_counter() - started) * 1000
+        captured = _captured_queries.get()
+        if captured is not None:
+            captured.append((sql, tuple(params)))
+        if SLOW_QUERY_MS <= 0 or elapsed < SLOW_QUERY_MS:
+            return
+        
+        function = _calling_function()
+        DB_SLOW_QUERIES.labels(function).inc()
+        shape = _param_shape(params)
+        if rows != 1:
+            shape = f"{rows} x {shape}"
+        plan = _query_plans.get(sql)
+        if plan is None:
+            plan = await _explain(self._conn, sql, params)
+            if len(_query_plans) >= 256:
+                _query_plans.clear()
+            _query_plans[sql] = plan
+        log.warning(f"Slow query in {function} ({elapsed:.0f}ms, params {shape}): "
+                    f"{' '.join(sql.split())} | plan: {'; '.join(plan) or 'none'}")
+
+def _calling_function() -> str:
+    """The innermost public function of this module on the stack, else the innermost private one."""
+    frame = sys._getframe(3)  # skip this function, _observe and the execute method
+    private = None
+    while frame is not None:
+        if frame.f_globals is globals():
+            name = frame.f_code.co_name
+            if not name.startswith("_"):
+                return name
+            private = private or name
+        frame = frame.f_back
+    return private or "unknown"
+
+def _param_shape(params: Sequence[Any]) -> str:
+    """Parameter types with string and bytes lengths, runs of the same shape collapsed."""
+    shapes = []
+    for value in params:
+        shape = type(value).__name__
+        if isinstance(value, (str, bytes)):
+            shape += f"[{len(value)}]"
+        if shapes and shapes[-1][0] == shape:
+            shapes[-1][1] += 1
+        else:
+            shapes.append([shape, 1])
+    return "(" + ", ".join(shape if count == 1 else f"{shape} x{count}" for shape, count in shapes) + ")"
+
+async def _explain(conn, sql: str, params: Sequence[Any] = ()) -> List[str]:
+    """Query plan lines from EXPLAIN QUERY PLAN on SQLite or EXPLAIN on Postgres."""
+    if sql.split(None, 1)[0].upper() not in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE"):
+        return []
+    try:
+        if USE_POSTGRES:
+            # Inside a savepoint, so a statement EXPLAIN rejects does not abort
+            # the caller's transaction.
+            async with conn._conn.transaction():
+                rows = await conn.execute_fetchall(f"EXPLAIN {sql}", params)
+            return [row[0].strip() for row in rows]
+        rows = await conn.execute_fetchall(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[3] for row in rows]
+    except Exception as e:
+        return [f"unavailable: {e}"]
+
+@contextmanager
+def capture_queries():
+    """Collect the (sql, params) of every statement run by this task inside the block."""
+    queries: List[Tuple[str, tuple]] = []
+    token = _captured_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        _captured_queries.reset(token)
+
+async def explain_query(sql: str, params: Sequence[Any] = ()) -> List[str]:
+    pool = await _get_pool()
+    async with pool.reader() as db:
+        return await _explain(db._conn, sql, params)
+
+class IngestBuffer:
+    """Group commit for report inserts.
+
+    A report submitted while no group is being written is written at once.
+    Reports submitted while a write is in flight are held until it finishes,
+    for at most `max_delay` seconds or until `max_rows` are waiting, then
+    written by `write` in one transaction, and each caller's future is
+    resolved with the id of its own row. If a group fails, its rows are
+    retried one at a time so a single bad row only fails its own caller.
+    """
+
+    def __init__(self, write: Callable[[List[Dict]], Awaitable[List[int]]], max_rows: int, max_delay: float):
+        self._write = write
+        self.max_rows = max(1, max_rows)
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+        self.groups = 0
+        self.rows = 0
+
+    async def submit(self, row: Dict) -> int:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_rows or not self._flushes:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._start_flush)
+        return await future
+
+    def _start_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        group, self._pending = self._pending, []
+        task = asyncio.create_task(self._flush(group))
+        self._flushes.add(task)
+        task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task):
+        self._flushes.discard(task)
+        if not self._flushes and self._pending:
+            self._start_flush()
+
+    async def _flush(self, group: List[Tuple[Dict, asyncio.Future]]):
+        try:
+            ids = await self._write([row for row, _ in group])
+        except Exception as e:
+            if len(group) == 1:
+                if not group[0][1].done():
+                    group[0][1].set_exception(e)
+                return
+            for item in group:
+                await self._flush([item])
+            return
+        
+        self.groups += 1
+        self.rows += len(group)
+        for (_, future), row_id in zip(group, ids):
+            if not future.done():
+                future.set_result(row_id)
+
+    async def flush(self):
+        self._start_flush()
+        while self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "groups": self.groups,
+            "rows": self.rows
+        }
+
+_pool = None
+_pool_lock = asyncio.Lock()
+_ingest = IngestBuffer(lambda reports: add_reports(reports), INGEST_BATCH_SIZE, INGEST_MAX_DELAY_MS / 1000)
+
+async def open_database():
+    global _pool
+    async with _pool_lock:
+        if _pool is None:
+            if USE_POSTGRES:
+                pool = PostgresPool(DATABASE_URL)
+            else:
+                os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
+                pool = ConnectionPool(DB_FILE)
+            await pool.open()
+            _pool = pool
+
+async def close_database():
+    global _pool
+    await _ingest.flush()
+    async with _pool_lock:
+        if _pool is not None:
+            pool, _pool = _pool, None
+            await pool.close()
+
+async def _get_pool():
+    if _pool is None:
+        await open_database()
+    return _pool
+
+@asynccontextmanager
+async def _transaction():
+    pool = await _get_pool()
+    async with pool.writer() as db:
+        yield db
+
+async def _lock_report_writes(db):
+    # The report triggers upsert counter rows in whatever order the inserted
+    # rows arrive, so two concurrent Postgres writers can deadlock on them.
+    # SQLite already has a single writer.
+    if USE_POSTGRES:
+        await db.execute("SELECT pg_advisory_xact_lock(?)", (REPORT_WRITE_LOCK,))
+
+async def _fetchall(sql: str, params: Sequence[Any] = ()) -> List[aiosqlite.Row]:
+    pool = await _get_pool()
+    async with pool.reader() as db:
+        return list(await db.execute_fetchall(sql, params))
+
+async def _fetchone(sql: str, params: Sequence[Any] = ()) -> Optional[aiosqlite.Row]:
+    pool = await _get_pool()
+    async with pool.reader() as db:
+        cursor = await db.execute(sql, params)
+        row = await cursor.fetchone()
+        await cursor.close()
+        return row
+
+async def _fetchval(sql: str, params: Sequence[Any] = (), default: Any = 0) -> Any:
+    row = await _fetchone(sql, params)
+    return row[0] if row else default
+
 async def init_database():
-    os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
-    async with aiosqlite.connect(DB_FILE) as db:
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS reports (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                reporter_id INTEGER NOT NULL,
-                reported_id INTEGER NOT NULL,
-                abuse_type TEXT NOT NULL,
-                additional_info TEXT,
-                timestamp INTEGER NOT NULL,
-                server_id TEXT,
-                place_id INTEGER,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    global _full_text_search
+    await open_database()
+    async with _transaction() as db:
+        if USE_POSTGRES:
+            await _create_postgres_schema(db)
+            _full_text_search = True
+        else:
+            await _create_sqlite_schema(db)
+            _full_text_search = await _create_sqlite_search_index(db)
+        await _backfill_sketches(db)
+
+async def _create_sqlite_schema(db):
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS reports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reporter_id INTEGER NOT NULL,
+            reported_id INTEGER NOT NULL,
+            abuse_type TEXT NOT NULL,
+            additional_info TEXT,
+            timestamp INTEGER NOT NULL,
+            server_id TEXT,
+            place_id INTEGER,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reported_id ON reports(reported_id)
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reporter_id ON reports(reporter_id)
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_timestamp ON reports(timestamp)
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_abuse_type ON reports(abuse_type)
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reported_timestamp ON reports(reported_id, timestamp, id)
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_timestamp_id ON reports(timestamp, id)
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reported_abuse_type ON reports(reported_id, abuse_type)
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    
+    await db.execute("""
+        INSERT INTO counters (name, value)
+        SELECT 'total_reports', COUNT(*) FROM reports
+        WHERE NOT EXISTS (SELECT 1 FROM counters WHERE name = 'total_reports')
+        ON CONFLICT (name) DO NOTHING
+    """)
+    
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_reports_total AFTER INSERT ON reports
+        BEGIN
+            UPDATE counters SET value = value + 1 WHERE name = 'total_reports';
+        END
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS report_rollups (
+            bucket INTEGER NOT NULL,
+            abuse_type TEXT NOT NULL,
+            place_id INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (bucket, abuse_type, place_id)
+        ) WITHOUT ROWID
+    """)
+    
+    await db.execute(ROLLUP_BACKFILL_SQL)
+    await db.execute(ROLLUP_ALL_TIME_BACKFILL_SQL)
+    
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_reports_rollup AFTER INSERT ON reports
+        BEGIN
+            INSERT INTO report_rollups (bucket, abuse_type, place_id, count)
+            VALUES (new.timestamp - new.timestamp % 3600, new.abuse_type, COALESCE(new.place_id, 0), 1)
+            ON CONFLICT (bucket, abuse_type, place_id) DO UPDATE SET count = count + 1;
+        END
+    """)
+    
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_reports_rollup_all_time AFTER INSERT ON reports
+        BEGIN
+            INSERT INTO report_rollups (bucket, abuse_type, place_id, count)
+            VALUES (-1, new.abuse_type, COALESCE(new.place_id, 0), 1)
+            ON CONFLICT (bucket, abuse_type, place_id) DO UPDATE SET count = count + 1;
+        END
+    """)
+    
+    for table, daily_table, column in LEADERBOARD_TABLES.values():
+        await db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {column} INTEGER PRIMARY KEY,
+                report_count INTEGER NOT NULL,
+                last_report_time INTEGER NOT NULL
             )
         """)
-        
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_reported_id ON reports(reported_id)
+        await db.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_count ON {table}(report_count DESC)
         """)
-        
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_reporter_id ON reports(reporter_id)
+        await db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {daily_table} (
+                day INTEGER NOT NULL,
+                {column} INTEGER NOT NULL,
+                report_count INTEGER NOT NULL,
+                last_report_time INTEGER NOT NULL,
+                PRIMARY KEY (day, {column})
+            ) WITHOUT ROWID
         """)
-        
+    
+    await _backfill_leaderboards(db)
+    
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_reports_leaderboards AFTER INSERT ON reports
+        BEGIN
+            INSERT INTO player_report_counts (reported_id, report_count, last_report_time)
+            VALUES (new.reported_id, 1, new.timestamp)
+            ON CONFLICT (reported_id) DO UPDATE SET
+                report_count = report_count + 1,
+                last_report_time = MAX(last_report_time, excluded.last_report_time);
+            INSERT INTO reporter_counts (reporter_id, report_count, last_report_time)
+            VALUES (new.reporter_id, 1, new.timestamp)
+            ON CONFLICT (reporter_id) DO UPDATE SET
+                report_count = report_count + 1,
+                last_report_time = MAX(last_report_time, excluded.last_report_time);
+            INSERT INTO player_daily_counts (day, reported_id, report_count, last_report_time)
+            VALUES (new.timestamp - new.timestamp % 86400, new.reported_id, 1, new.timestamp)
+            ON CONFLICT (day, reported_id) DO UPDATE SET
+                report_count = report_count + 1,
+                last_report_time = MAX(last_report_time, excluded.last_report_time);
+            INSERT INTO reporter_daily_counts (day, reporter_id, report_count, last_report_time)
+            VALUES (new.timestamp - new.timestamp % 86400, new.reporter_id, 1, new.timestamp)
+            ON CONFLICT (day, reporter_id) DO UPDATE SET
+                report_count = report_count + 1,
+                last_report_time = MAX(last_report_time, excluded.last_report_time);
+        END
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS report_sketches (
+            metric TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            registers BLOB NOT NULL,
+            PRIMARY KEY (metric, bucket)
+        )
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS report_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at INTEGER NOT NULL,
+            last_error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_outbox_due ON report_outbox(status, next_attempt_at)
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS report_archive (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            month TEXT NOT NULL,
+            first_timestamp INTEGER NOT NULL,
+            last_timestamp INTEGER NOT NULL,
+            report_count INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS report_archive_players (
+            reported_id INTEGER NOT NULL,
+            archive_id INTEGER NOT NULL,
+            report_count INTEGER NOT NULL,
+            PRIMARY KEY (reported_id, archive_id)
+        ) WITHOUT ROWID
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS report_archive_reasons (
+            reported_id INTEGER NOT NULL,
+            abuse_type TEXT NOT NULL,
+            report_count INTEGER NOT NULL,
+            last_timestamp INTEGER NOT NULL,
+            PRIMARY KEY (reported_id, abuse_type)
+        ) WITHOUT ROWID
+    """)
+    
+    await _backfill_archive_reasons(db)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS admin_users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            discord_user_id INTEGER NOT NULL UNIQUE,
+            added_by INTEGER,
+            added_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_admin_user_id ON admin_users(discord_user_id)
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS admin_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_token TEXT NOT NULL UNIQUE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            expires_at DATETIME NOT NULL
+        )
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS revoked_sessions (
+            session_id TEXT PRIMARY KEY,
+            expires_at INTEGER NOT NULL
+        )
+    """)
+
+async def _create_sqlite_search_index(db) -> bool:
+    cursor = await db.execute("SELECT 1 FROM sqlite_master WHERE name = 'reports_fts'")
+    exists = await cursor.fetchone() is not None
+    await cursor.close()
+    
+    try:
         await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_timestamp ON reports(timestamp)
+            CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+                abuse_type,
+                additional_info,
+                content='reports',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
         """)
-        
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_abuse_type ON reports(abuse_type)
+    except aiosqlite.OperationalError as e:
+        log.warning(f"FTS5 unavailable, searching reports with LIKE: {e}")
+        return False
+    
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_reports_fts_insert AFTER INSERT ON reports
+        BEGIN
+            INSERT INTO reports_fts (rowid, abuse_type, additional_info)
+            VALUES (new.id, new.abuse_type, new.additional_info);
+        END
+    """)
+    
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_reports_fts_delete AFTER DELETE ON reports
+        BEGIN
+            INSERT INTO reports_fts (reports_fts, rowid, abuse_type, additional_info)
+            VALUES ('delete', old.id, old.abuse_type, old.additional_info);
+        END
+    """)
+    
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_reports_fts_update AFTER UPDATE OF abuse_type, additional_info ON reports
+        BEGIN
+            INSERT INTO reports_fts (reports_fts, rowid, abuse_type, additional_info)
+            VALUES ('delete', old.id, old.abuse_type, old.additional_info);
+            INSERT INTO reports_fts (rowid, abuse_type, additional_info)
+            VALUES (new.id, new.abuse_type, new.additional_info);
+        END
+    """)
+    
+    if not exists:
+        await db.execute("INSERT INTO reports_fts (reports_fts) VALUES ('rebuild')")
+    return True
+
+async def _backfill_leaderboards(db):
+    oldest_day = int(datetime.now().timestamp()) - LEADERBOARD_DAYS * LEADERBOARD_DAY_SECONDS
+    for table, daily_table, column in LEADERBOARD_TABLES.values():
+        await db.execute(f"""
+            INSERT INTO {table} ({column}, report_count, last_report_time)
+            SELECT {column}, COUNT(*), MAX(timestamp)
+            FROM reports
+            WHERE NOT EXISTS (SELECT 1 FROM {table})
+            GROUP BY {column}
         """)
-        
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS admin_users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                discord_user_id INTEGER NOT NULL UNIQUE,
-                added_by INTEGER,
-                added_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        await db.execute(f"""
+            INSERT INTO {daily_table} (day, {column}, report_count, last_report_time)
+            SELECT timestamp - timestamp % 86400, {column}, COUNT(*), MAX(timestamp)
+            FROM reports
+            WHERE timestamp >= ? AND NOT EXISTS (SELECT 1 FROM {daily_table})
+            GROUP BY 1, 2
+        """, (oldest_day,))
+
+async def _create_postgres_schema(db):
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS reports (
+            id BIGSERIAL PRIMARY KEY,
+            reporter_id BIGINT NOT NULL,
+            reported_id BIGINT NOT NULL,
+            abuse_type TEXT NOT NULL,
+            additional_info TEXT,
+            timestamp BIGINT NOT NULL,
+            server_id TEXT,
+            place_id BIGINT,
+            created_at TEXT DEFAULT to_char(NOW() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')
+        )
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reported_id ON reports(reported_id)
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reporter_id ON reports(reporter_id)
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_timestamp ON reports(timestamp)
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_abuse_type ON reports(abuse_type)
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reported_timestamp ON reports(reported_id, timestamp, id)
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_timestamp_id ON reports(timestamp, id)
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_reported_abuse_type ON reports(reported_id, abuse_type)
+    """)
+    
+    await db.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_reports_search ON reports USING GIN ({POSTGRES_SEARCH_VECTOR})
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS counters (
+            name TEXT PRIMARY KEY,
+            value BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+    
+    await db.execute("""
+        INSERT INTO counters (name, value)
+        SELECT 'total_reports', COUNT(*) FROM reports
+        WHERE NOT EXISTS (SELECT 1 FROM counters WHERE name = 'total_reports')
+        ON CONFLICT (name) DO NOTHING
+    """)
+    
+    await db.execute("""
+        CREATE OR REPLACE FUNCTION reports_total_increment() RETURNS trigger AS $$
+        BEGIN
+            UPDATE counters SET value = value + (SELECT COUNT(*) FROM inserted)
+            WHERE name = 'total_reports';
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    
+    await db.execute("""
+        CREATE OR REPLACE TRIGGER trg_reports_total AFTER INSERT ON reports
+        REFERENCING NEW TABLE AS inserted
+        FOR EACH STATEMENT EXECUTE FUNCTION reports_total_increment()
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS report_rollups (
+            bucket BIGINT NOT NULL,
+            abuse_type TEXT NOT NULL,
+            place_id BIGINT NOT NULL,
+            count BIGINT NOT NULL,
+            PRIMARY KEY (bucket, abuse_type, place_id)
+        )
+    """)
+    
+    await db.execute(ROLLUP_BACKFILL_SQL)
+    await db.execute(ROLLUP_ALL_TIME_BACKFILL_SQL)
+    
+    await db.execute("""
+        CREATE OR REPLACE FUNCTION reports_rollup_increment() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO report_rollups (bucket, abuse_type, place_id, count)
+            SELECT timestamp - timestamp % 3600, abuse_type, COALESCE(place_id, 0), COUNT(*)
+            FROM inserted
+            GROUP BY 1, 2, 3
+            ON CONFLICT (bucket, abuse_type, place_id)
+            DO UPDATE SET count = report_rollups.count + EXCLUDED.count;
+            INSERT INTO report_rollups (bucket, abuse_type, place_id, count)
+            SELECT -1, abuse_type, COALESCE(place_id, 0), COUNT(*)
+            FROM inserted
+            GROUP BY 2, 3
+            ON CONFLICT (bucket, abuse_type, place_id)
+            DO UPDATE SET count = report_rollups.count + EXCLUDED.count;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    
+    await db.execute("""
+        CREATE OR REPLACE TRIGGER trg_reports_rollup AFTER INSERT ON reports
+        REFERENCING NEW TABLE AS inserted
+        FOR EACH STATEMENT EXECUTE FUNCTION reports_rollup_increment()
+    """)
+    
+    for table, daily_table, column in LEADERBOARD_TABLES.values():
+        await db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {column} BIGINT PRIMARY KEY,
+                report_count BIGINT NOT NULL,
+                last_report_time BIGINT NOT NULL
             )
         """)
-        
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_admin_user_id ON admin_users(discord_user_id)
+        await db.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_count ON {table}(report_count DESC)
         """)
-        
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS admin_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_token TEXT NOT NULL UNIQUE,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                expires_at DATETIME NOT NULL
+        await db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {daily_table} (
+                day BIGINT NOT NULL,
+                {column} BIGINT NOT NULL,
+                report_count BIGINT NOT NULL,
+                last_report_time BIGINT NOT NULL,
+                PRIMARY KEY (day, {column})
             )
         """)
+    
+    await _backfill_leaderboards(db)
+    
+    upserts = "".join(f"""
+            INSERT INTO {table} ({keys}, report_count, last_report_time)
+            SELECT {select}, COUNT(*), MAX(timestamp)
+            FROM inserted
+            GROUP BY {groups}
+            ON CONFLICT ({keys}) DO UPDATE SET
+                report_count = {table}.report_count + EXCLUDED.report_count,
+                last_report_time = GREATEST({table}.last_report_time, EXCLUDED.last_report_time);
+    """ for table, keys, select, groups in [
+        (table, column, column, "1") for table, _, column in LEADERBOARD_TABLES.values()
+    ] + [
+        (daily_table, f"day, {column}", f"timestamp - timestamp % 86400, {column}", "1, 2")
+        for _, daily_table, column in LEADERBOARD_TABLES.values()
+    ])
+    await db.execute(f"""
+        CREATE OR REPLACE FUNCTION reports_leaderboards_increment() RETURNS trigger AS $$
+        BEGIN
+            {upserts}
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    
+    await db.execute("""
+        CREATE OR REPLACE TRIGGER trg_reports_leaderboards AFTER INSERT ON reports
+        REFERENCING NEW TABLE AS inserted
+        FOR EACH STATEMENT EXECUTE FUNCTION reports_leaderboards_increment()
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS report_sketches (
+            metric TEXT NOT NULL,
+            bucket BIGINT NOT NULL,
+            registers BYTEA NOT NULL,
+            PRIMARY KEY (metric, bucket)
+        )
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS report_outbox (
+            id BIGSERIAL PRIMARY KEY,
+            report_id BIGINT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at BIGINT NOT NULL,
+            last_error TEXT,
+            created_at TEXT DEFAULT to_char(NOW() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')
+        )
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_outbox_due ON report_outbox(status, next_attempt_at)
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS report_archive (
+            id BIGSERIAL PRIMARY KEY,
+            month TEXT NOT NULL,
+            first_timestamp BIGINT NOT NULL,
+            last_timestamp BIGINT NOT NULL,
+            report_count INTEGER NOT NULL,
+            data BYTEA NOT NULL
+        )
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS report_archive_players (
+            reported_id BIGINT NOT NULL,
+            archive_id BIGINT NOT NULL,
+            report_count INTEGER NOT NULL,
+            PRIMARY KEY (reported_id, archive_id)
+        )
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS report_archive_reasons (
+            reported_id BIGINT NOT NULL,
+            abuse_type TEXT NOT NULL,
+            report_count INTEGER NOT NULL,
+            last_timestamp BIGINT NOT NULL,
+            PRIMARY KEY (reported_id, abuse_type)
+        )
+    """)
+    
+    await _backfill_archive_reasons(db)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS admin_users (
+            id SERIAL PRIMARY KEY,
+            discord_user_id BIGINT NOT NULL UNIQUE,
+            added_by BIGINT,
+            added_at TEXT DEFAULT to_char(NOW() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')
+        )
+    """)
+    
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_admin_user_id ON admin_users(discord_user_id)
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS admin_sessions (
+            id SERIAL PRIMARY KEY,
+            session_token TEXT NOT NULL UNIQUE,
+            created_at TEXT DEFAULT to_char(NOW() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS'),
+            expires_at TIMESTAMP NOT NULL
+        )
+    """)
+    
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS revoked_sessions (
+            session_id TEXT PRIMARY KEY,
+            expires_at BIGINT NOT NULL
+        )
+    """)
+
+JSON_IMPORT_CHUNK = 5000
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_JSON_SCALAR = re.compile(r"[^,\] \t\n\r]*")
+
+def _iter_json_array(f, read_size: int = 1 << 20, max_element: int = 16 << 20) -> Iterator[Tuple[Any, int]]:
+    """Yield each element of the JSON array in binary file `f` with the bytes read so far.
+
+    Only the current read and one partly read element are held in memory, so
+    the file can be far larger than the memory available.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    pos = 0
+    bytes_read = 0
+    eof = False
+    state = "start"
+    while True:
+        pos = _JSON_WHITESPACE.match(buffer, pos).end()
+        if state == "value":
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Most likely cut off by the end of the read; a report is
+                # never this large, so past the limit it is malformed.
+                if len(buffer) - pos > max_element:
+                    raise
+                end = None
+            # A number or literal running to the end of the buffer may continue
+            # in the next read, so it only counts once a delimiter follows.
+            if end is not None and buffer[pos] not in '{["':
+                if _JSON_SCALAR.match(buffer, pos).end() == len(buffer) and not eof:
+                    end = None
+            if end is not None:
+                pos = end
+                state = "separator"
+                yield value, bytes_read
+                continue
+            if eof:
+                raise ValueError(f"Malformed value in JSON array after {bytes_read} bytes")
+        elif pos < len(buffer):
+            char = buffer[pos]
+            if state == "start" and char == "[":
+                state = "first"
+            elif char == "]" and state in ("first", "separator"):
+                return
+            elif state == "separator" and char == ",":
+                state = "value"
+            elif state == "first":
+                state = "value"
+                continue
+            else:
+                raise ValueError(f"Unexpected {char!r} in JSON array after {bytes_read} bytes")
+            pos += 1
+            continue
+        
+        if eof:
+            raise ValueError("JSON array ends before its closing bracket")
+        chunk = f.read(read_size)
+        bytes_read += len(chunk)
+        eof = not chunk
+        buffer = buffer[pos:] + text.decode(chunk, final=eof)
+        pos = 0
+
+def report_timestamp(value: Any, default: Optional[int] = None) -> int:
+    """`value` as whole epoch seconds, or `default` (now) if it is not a usable timestamp."""
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            value = None
+    if (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value) and 0 <= value <= MAX_TIMESTAMP):
+        return int(value)
+    return int(datetime.now().timestamp()) if default is None else default
+
+def _json_report_row(report: Any) -> Optional[tuple]:
+    if not isinstance(report, dict):
+        return None
+    return (
+        report.get('reporterId', 0),
+        report.get('reportedId', 0),
+        report.get('abuseType', 'Unknown'),
+        report.get('additionalInfo', ''),
+        report_timestamp(report.get('timestamp')),
+        report.get('serverId', ''),
+        report.get('placeId', 0)
+    )
+
+def _json_import_names(path: str) -> Tuple[str, str]:
+    """Counter names for the checkpoint and completion of importing this file."""
+    key = f"{os.path.basename(path)}:{os.path.getsize(path)}"
+    return f"json_import:{key}", f"json_import_complete:{key}"
+
+async def _write_json_chunk(checkpoint_name: str, complete_name: str, rows: List[tuple],
+                            committed: int, position: int, finished: bool) -> bool:
+    """Insert one chunk of an import and move its checkpoint from `committed` to `position`."""
+    async with _transaction() as db:
+        await _lock_report_writes(db)
+        cursor = await db.execute("SELECT value FROM counters WHERE name = ?", (checkpoint_name,))
+        row = await cursor.fetchone()
+        await cursor.close()
+        if (row[0] if row else 0) != committed:
+            # Another process committed this part of the file since we
+            # read the checkpoint.
+            return False
         
-        await db.commit()
+        sketches = {}
+        if rows:
+            await db.executemany("""
+                INSERT INTO reports 
+                (reporter_id, reported_id, abuse_type, additional_info, timestamp, server_id, place_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            sketches = await _record_sketches_safely(db, [
+                {"reporter_id": row[0], "reported_id": row[1], "timestamp": row[4]} for row in rows
+            ])
+        await db.executemany("""
+            INSERT INTO counters (name, value) VALUES (?, ?)
+            ON CONFLICT (name) DO UPDATE SET value = excluded.value
+        """, [(checkpoint_name, position)] + ([(complete_name, 1)] if finished else []))
+    _cache_sketches(sketches)
+    return True
+
+async def import_json_reports(path: str, chunk_size: int = JSON_IMPORT_CHUNK,
+                              progress: Optional[Callable[[int, int, int], None]] = None) -> int:
+    """Stream the reports in a legacy JSON array file into the database.
+
+    Reports are inserted `chunk_size` at a time, each chunk in one transaction
+    with a checkpoint of how far into the file the import is, so an interrupted
+    import resumes after the last committed chunk. A finished import is
+    recorded in counters and later calls for the same file return at once.
+    `progress` is called after each chunk with the elements done, bytes read
+    and file size. Returns the number of reports inserted by this call.
+    """
+    checkpoint_name, complete_name = _json_import_names(path)
+    if await _fetchval("SELECT value FROM counters WHERE name = ?", (complete_name,)):
+        return 0
+    
+    start = await _fetchval("SELECT value FROM counters WHERE name = ?", (checkpoint_name,))
+    total_bytes = os.path.getsize(path)
+    inserted = 0
+    
+    with open(path, "rb") as f:
+        committed = position = 0
+        rows: List[tuple] = []
+        for report, bytes_read in _iter_json_array(f):
+            position += 1
+            if position <= start:
+                committed = position
+                continue
+            row = _json_report_row(report)
+            if row is not None:
+                rows.append(row)
+            if len(rows) >= chunk_size:
+                if not await _write_json_chunk(checkpoint_name, complete_name, rows, committed, position, False):
+                    return inserted
+                inserted += len(rows)
+                committed = position
+                rows = []
+                if progress:
+                    progress(position, bytes_read, total_bytes)
+    
+    if not await _write_json_chunk(checkpoint_name, complete_name, rows, committed, position, True):
+        return inserted
+    inserted += len(rows)
+    if progress:
+        progress(position, total_bytes, total_bytes)
+    return inserted
+
+async def _json_imported_before_checkpoints(path: str, backup_file: str) -> bool:
+    """Whether `path` was imported before imports were checkpointed, marking it complete if so.
+
+    The old startup migration wrote the backup once the file was in the
+    table, so a backup, or reports without any checkpoint for this file,
+    means it is already imported.
+    """
+    checkpoint_name, complete_name = _json_import_names(path)
+    async with _transaction() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM counters WHERE name IN (?, ?)", (checkpoint_name, complete_name))
+        started = (await cursor.fetchone())[0]
+        await cursor.close()
+        if started:
+            return False
+        if not os.path.exists(backup_file):
+            cursor = await db.execute("SELECT 1 FROM reports LIMIT 1")
+            populated = await cursor.fetchone()
+            await cursor.close()
+            if not populated:
+                return False
+        await db.execute("INSERT INTO counters (name, value) VALUES (?, 1) ON CONFLICT (name) DO NOTHING", (complete_name,))
+    return True
 
 async def migrate_json_to_db():
+    """Import the legacy reports.json on startup; a no-op once it has been imported."""
     if not os.path.exists(REPORTS_FILE):
         return
     
     try:
-        with open(REPORTS_FILE, 'r') as f:
-            reports = json.load(f)
-        
-        if not reports:
+        backup_file = f"{REPORTS_FILE}.backup"
+        if await _json_imported_before_checkpoints(REPORTS_FILE, backup_file):
+            log.info(f"{REPORTS_FILE} was imported by an earlier version, skipping it")
             return
         
-        async with aiosqlite.connect(DB_FILE) as db:
-            for report in reports:
-                await db.execute("""
-                    INSERT OR IGNORE INTO reports 
-                    (reporter_id, reported_id, abuse_type, additional_info, timestamp, server_id, place_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    report.get('reporterId', 0),
-                    report.get('reportedId', 0),
-                    report.get('abuseType', 'Unknown'),
-                    report.get('additionalInfo', ''),
-                    report.get('timestamp', int(datetime.now().timestamp())),
-                    report.get('serverId', ''),
-                    report.get('placeId', 0)
-                ))
-            
-            await db.commit()
+        inserted = await import_json_reports(REPORTS_FILE)
+        if inserted:
+            log.info(f"Imported {inserted} report(s) from {REPORTS_FILE}")
         
-        backup_file = f"{REPORTS_FILE}.backup"
         if not os.path.exists(backup_file):
-            with open(backup_file, 'w') as f:
-                json.dump(reports, f, indent=2)
+            shutil.copyfile(REPORTS_FILE, backup_file)
         
     except Exception as e:
-        print(f"[database] Error migrating JSON to database: {e}")
+        log.error(f"Error migrating JSON to database: {e}")
 
 async def add_report(reporter_id: int, reported_id: int, abuse_type: str, 
-                     additional_info: str, timestamp: int, server_id: str, place_id: int) -> int:
-    async with aiosqlite.connect(DB_FILE) as db:
+                     additional_info: str, timestamp: int, server_id: str, place_id: int,
+                     outbox_payload: Optional[Dict] = None) -> int:
+    report = {
+        "reporter_id": reporter_id,
+        "reported_id": reported_id,
+        "abuse_type": abuse_type,
+        "additional_info": additional_info,
+        "timestamp": timestamp,
+        "server_id": server_id,
+        "place_id": place_id,
+        "outbox_payload": outbox_payload
+    }
+    if INGEST_MAX_DELAY_MS > 0:
+        return await _ingest.submit(report)
+    return (await add_reports([report]))[0]
+
+async def _allocate_report_ids(db, count: int) -> List[int]:
+    if USE_POSTGRES:
         cursor = await db.execute("""
+            SELECT nextval(pg_get_serial_sequence('reports', 'id')) FROM generate_series(1, ?)
+        """, (count,))
+        return [row[0] for row in await cursor.fetchall()]
+    
+    # The writer lock is held for the whole transaction, so nothing else can
+    # take ids from the AUTOINCREMENT sequence between this read and the insert.
+    cursor = await db.execute("""
+        SELECT MAX(
+            COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'reports'), 0),
+            COALESCE((SELECT MAX(id) FROM reports), 0)
+        )
+    """)
+    last_id = (await cursor.fetchone())[0]
+    await cursor.close()
+    return list(range(last_id + 1, last_id + count + 1))
+
+async def add_reports(reports: List[Dict]) -> List[int]:
+    """Insert several reports (keyed like add_report's arguments) in one transaction."""
+    now = int(datetime.now().timestamp())
+    async with _transaction() as db:
+        if USE_POSTGRES and INGEST_DURABILITY == "relaxed":
+            await db.execute("SET LOCAL synchronous_commit = off")
+        await _lock_report_writes(db)
+        
+        report_ids = await _allocate_report_ids(db, len(reports))
+        await db.executemany("""
             INSERT INTO reports 
-            (reporter_id, reported_id, abuse_type, additional_info, timestamp, server_id, place_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (reporter_id, reported_id, abuse_type, additional_info, timestamp, server_id, place_id))
+            (id, reporter_id, reported_id, abuse_type, additional_info, timestamp, server_id, place_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(report_id, report['reporter_id'], report['reported_id'], report['abuse_type'], report['additional_info'],
+               report['timestamp'], report['server_id'], report['place_id'])
+              for report_id, report in zip(report_ids, reports)])
         
-        await db.commit()
-        return cursor.lastrowid
-
-async def get_reports_last_24h(reported_id: int) -> int:
-    async with aiosqlite.connect(DB_FILE) as db:
-        now = datetime.now().timestamp()
-        day_ago = now - 86400
+        outbox = [(report_id, json.dumps(report['outbox_payload']), now)
+                  for report_id, report in zip(report_ids, reports)
+                  if report.get('outbox_payload') is not None]
+        if outbox:
+            await db.executemany("""
+                INSERT INTO report_outbox (report_id, payload, next_attempt_at)
+                VALUES (?, ?, ?)
+            """, outbox)
         
+        sketches = await _record_sketches_safely(db, reports)
+    
+    _cache_sketches(sketches)
+    for report_id, report in zip(report_ids, reports):
+        _player_index.record(report_id, report['reporter_id'], report['reported_id'],
+                             report['abuse_type'], report['timestamp'], now)
+    return report_ids
+
+def _sketch_buckets(timestamp: int) -> Tuple[int, int]:
+    return SKETCH_ALL_TIME, timestamp - timestamp % SKETCH_BUCKET_SECONDS
+
+async def _load_sketches(db, buckets: Set[int]) -> Dict[Tuple[str, int], hll.HyperLogLog]:
+    if not buckets:
+        return {}
+    cursor = await db.execute(f"""
+        SELECT metric, bucket, registers FROM report_sketches
+        WHERE metric IN (?, ?) AND bucket IN ({", ".join("?" * len(buckets))})
+    """, (*SKETCH_METRICS, *buckets))
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return {(row[0], row[1]): hll.HyperLogLog.from_bytes(row[2]) for row in rows}
+
+async def _save_sketches(db, sketches: Dict[Tuple[str, int], hll.HyperLogLog]):
+    if not sketches:
+        return
+    await db.executemany("""
+        INSERT INTO report_sketches (metric, bucket, registers) VALUES (?, ?, ?)
+        ON CONFLICT (metric, bucket) DO UPDATE SET registers = excluded.registers
+    """, [(metric, bucket, sketch.to_bytes()) for (metric, bucket), sketch in sketches.items()])
+
+async def _record_sketches_safely(db, reports: List[Dict]) -> Dict[Tuple[str, int], hll.HyperLogLog]:
+    """_record_sketches() in a savepoint, so a failure skips the sketch update but not the insert.
+    
+    Sketches that missed a batch undercount until `manage.py rebuild-sketches`.
+    """
+    await db.execute("SAVEPOINT report_sketches")
+    try:
+        sketches = await _record_sketches(db, reports)
+    except Exception as e:
+        log.error(f"Error updating report sketches, run rebuild-sketches: {e}")
+        await db.execute("ROLLBACK TO SAVEPOINT report_sketches")
+        sketches = {}
+    await db.execute("RELEASE SAVEPOINT report_sketches")
+    return sketches
+
+async def _record_sketches(db, reports: List[Dict]) -> Dict[Tuple[str, int], hll.HyperLogLog]:
+    """Add a batch of reports to the distinct-count sketches, inside its transaction.
+    
+    The sketches for the current buckets are kept in memory. Once a register
+    is set most inserts leave it unchanged, so a sketch is only written back
+    when the batch changed it, after folding in the stored copy in case
+    another instance has written to it since it was cached. The updated
+    sketches are returned for _cache_sketches() once the transaction commits.
+    """
+    buckets = {bucket for report in reports for bucket in _sketch_buckets(report['timestamp'])}
+    uncached = {bucket for bucket in buckets if any((metric, bucket) not in _sketches for metric in SKETCH_METRICS)}
+    stored = await _load_sketches(db, uncached)
+    
+    updated: Dict[Tuple[str, int], hll.HyperLogLog] = {}
+    for bucket in buckets:
+        for metric in SKETCH_METRICS:
+            base = stored.get((metric, bucket)) if bucket in uncached else _sketches[(metric, bucket)]
+            updated[(metric, bucket)] = hll.HyperLogLog(SKETCH_PRECISION, base.registers if base else None)
+    
+    dirty = set()
+    for report in reports:
+        for bucket in _sketch_buckets(report['timestamp']):
+            for metric, column in SKETCH_METRICS.items():
+                if updated[(metric, bucket)].add(report[column]):
+                    dirty.add((metric, bucket))
+    
+    stale = await _load_sketches(db, {bucket for _, bucket in dirty if bucket not in uncached})
+    for key, sketch in stale.items():
+        if key in dirty:
+            updated[key].merge(sketch)
+    await _save_sketches(db, {key: updated[key] for key in dirty})
+    return updated
+
+def _cache_sketches(updated: Dict[Tuple[str, int], hll.HyperLogLog]):
+    _sketches.update(updated)
+    oldest_bucket = _sketch_buckets(int(datetime.now().timestamp()))[1] - SKETCH_BUCKET_SECONDS
+    for key in [key for key in _sketches if SKETCH_ALL_TIME < key[1] < oldest_bucket]:
+        del _sketches[key]
+
+async def _backfill_sketches(db, chunk_size: int = 10000):
+    cursor = await db.execute("""
+        SELECT EXISTS (SELECT 1 FROM report_sketches),
+            EXISTS (SELECT 1 FROM reports) OR EXISTS (SELECT 1 FROM report_archive)
+    """)
+    has_sketches, has_reports = await cursor.fetchone()
+    await cursor.close()
+    if has_sketches or not has_reports:
+        return
+    
+    sketches: Dict[Tuple[str, int], hll.HyperLogLog] = {}
+    
+    def add(reporter_id: int, reported_id: int, timestamp: int):
+        for bucket in _sketch_buckets(timestamp):
+            for metric, value in (("reporters", reporter_id), ("reported", reported_id)):
+                key = (metric, bucket)
+                if key not in sketches:
+                    sketches[key] = hll.HyperLogLog(SKETCH_PRECISION)
+                sketches[key].add(value)
+    
+    async for reports in _archived_chunks(db):
+        for report in reports:
+            add(report['reporter_id'], report['reported_id'], report['timestamp'])
+    
+    last_id = 0
+    while True:
         cursor = await db.execute("""
-            SELECT COUNT(*) FROM reports 
-            WHERE reported_id = ? AND timestamp >= ?
-        """, (reported_id, day_ago))
-        
-        result = await cursor.fetchone()
-        return result[0] if result else 0
+            SELECT id, reporter_id, reported_id, timestamp FROM reports
+            WHERE id > ? ORDER BY id LIMIT ?
+        """, (last_id, chunk_size))
+        rows = await cursor.fetchall()
+        await cursor.close()
+        if not rows:
+            break
+        for row in rows:
+            add(row[1], row[2], row[3])
+        last_id = rows[-1][0]
+    
+    await _save_sketches(db, sketches)
 
-async def get_reports_last_month(reported_id: int) -> int:
-    async with aiosqlite.connect(DB_FILE) as db:
-        now = datetime.now().timestamp()
-        month_ago = now - (86400 * 30)
+async def rebuild_sketches() -> int:
+    async with _transaction() as db:
+        await _lock_report_writes(db)
+        await db.execute("DELETE FROM report_sketches")
+        _sketches.clear()
+        await _backfill_sketches(db)
+        cursor = await db.execute("SELECT COUNT(*) FROM report_sketches")
+        sketches = (await cursor.fetchone())[0]
+        await cursor.close()
+    return sketches
+
+async def get_unique_counts(window: Optional[int] = None, exact: bool = False) -> Dict[str, int]:
+    """Distinct reported users and reporters, all time or over the last `window` seconds.
+    
+    The estimates come from the sketches and are within a couple of percent.
+    A window merges the daily sketches lying inside it and adds the ids from
+    the partial day at its start, read through the timestamp index. `exact`
+    runs COUNT(DISTINCT) over the reports instead, which scans the table.
+    """
+    cutoff = None if window is None else int(datetime.now().timestamp()) - window
+    if exact:
+        where, params = ("", ()) if cutoff is None else ("WHERE timestamp >= ?", (cutoff,))
+        row = await _fetchone(f"""
+            SELECT COUNT(DISTINCT reported_id), COUNT(DISTINCT reporter_id) FROM reports {where}
+        """, params)
+        return {"reported": row[0], "reporters": row[1]}
+    
+    merged = {metric: hll.HyperLogLog(SKETCH_PRECISION) for metric in SKETCH_METRICS}
+    if cutoff is None:
+        rows = await _fetchall("""
+            SELECT metric, registers FROM report_sketches WHERE metric IN (?, ?) AND bucket = ?
+        """, (*SKETCH_METRICS, SKETCH_ALL_TIME))
+    else:
+        first_bucket = -(-cutoff // SKETCH_BUCKET_SECONDS) * SKETCH_BUCKET_SECONDS
+        rows = await _fetchall("""
+            SELECT metric, registers FROM report_sketches WHERE metric IN (?, ?) AND bucket >= ?
+        """, (*SKETCH_METRICS, first_bucket))
+        partial = await _fetchall("""
+            SELECT reported_id, reporter_id FROM reports WHERE timestamp >= ? AND timestamp < ?
+        """, (cutoff, first_bucket))
+        for row in partial:
+            merged["reported"].add(row[0])
+            merged["reporters"].add(row[1])
+    
+    for row in rows:
+        merged[row[0]].merge(hll.HyperLogLog.from_bytes(row[1]))
+    return {metric: sketch.count() for metric, sketch in merged.items()}
+
+async def get_database_size() -> int:
+    """Bytes on disk for the database, including an unmerged SQLite WAL."""
+    if USE_POSTGRES:
+        return await _fetchval("SELECT pg_database_size(current_database())")
+    return sum(os.path.getsize(path) for path in (DB_FILE, f"{DB_FILE}-wal") if os.path.exists(path))
+
+async def analyze_database():
+    """Refresh the query planner's table statistics."""
+    async with _transaction() as db:
+        await db.execute("ANALYZE")
+
+def get_ingest_stats() -> Dict:
+    return _ingest.stats()
+
+async def claim_outbox(limit: int, lease_seconds: int) -> List[Dict]:
+    """Lease up to `limit` due outbox entries and return them with their report rows.
+
+    A claimed entry is pushed `lease_seconds` into the future, so it is picked up
+    again if the process dies before calling complete_outbox or retry_outbox.
+    """
+    now = int(datetime.now().timestamp())
+    async with _transaction() as db:
+        cursor = await db.execute(f"""
+            UPDATE report_outbox
+            SET next_attempt_at = ?, attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM report_outbox
+                WHERE status = 'pending' AND next_attempt_at <= ?
+                ORDER BY next_attempt_at, id
+                LIMIT ?
+                {_dialect("", "FOR UPDATE SKIP LOCKED")}
+            )
+            RETURNING id, report_id, payload, attempts
+        """, (now + lease_seconds, now, limit))
+        claimed = await cursor.fetchall()
         
-        cursor = await db.execute("""
-            SELECT COUNT(*) FROM reports 
-            WHERE reported_id = ? AND timestamp >= ?
-        """, (reported_id, month_ago))
+        if not claimed:
+            return []
         
-        result = await cursor.fetchone()
-        return result[0] if result else 0
+        report_ids = [row['report_id'] for row in claimed]
+        cursor = await db.execute(f"""
+            SELECT * FROM reports WHERE id IN ({','.join('?' * len(report_ids))})
+        """, report_ids)
+        reports = {row['id']: dict(row) for row in await cursor.fetchall()}
+    
+    return [{
+        "outbox_id": row['id'],
+        "attempts": row['attempts'],
+        "payload": json.loads(row['payload']),
+        "report": reports.get(row['report_id'])
+    } for row in sorted(claimed, key=lambda row: row['id'])]
+
+async def complete_outbox(outbox_ids: List[int]):
+    async with _transaction() as db:
+        await db.executemany("""
+            DELETE FROM report_outbox WHERE id = ?
+        """, [(outbox_id,) for outbox_id in outbox_ids])
+
+async def retry_outbox(outbox_ids: List[int], error: str, retry_at: Optional[int] = None):
+    """Reschedule entries for retry_at, or park them as failed when retry_at is None."""
+    async with _transaction() as db:
+        if retry_at is None:
+            await db.executemany("""
+                UPDATE report_outbox SET status = 'failed', last_error = ? WHERE id = ?
+            """, [(error, outbox_id) for outbox_id in outbox_ids])
+        else:
+            await db.executemany("""
+                UPDATE report_outbox SET next_attempt_at = ?, last_error = ? WHERE id = ?
+            """, [(retry_at, error, outbox_id) for outbox_id in outbox_ids])
+
+async def get_outbox_backlog() -> Dict:
+    rows = await _fetchall("""
+        SELECT status, COUNT(*) as count FROM report_outbox
+        GROUP BY status
+    """)
+    
+    counts = {row['status']: row['count'] for row in rows}
+    return {"pending": counts.get('pending', 0), "failed": counts.get('failed', 0)}
+
+async def get_reports_last_24h(reported_id: int) -> int:
+    now = int(datetime.now().timestamp())
+    day_ago = now - 86400
+    
+    return await _fetchval("""
+        SELECT COUNT(*) FROM reports 
+        WHERE reported_id = ? AND timestamp >= ?
+    """, (reported_id, day_ago))
+
+async def get_reports_last_month(reported_id: int) -> int:
+    now = int(datetime.now().timestamp())
+    month_ago = now - (86400 * 30)
+    
+    return await _fetchval("""
+        SELECT COUNT(*) FROM reports 
+        WHERE reported_id = ? AND timestamp >= ?
+    """, (reported_id, month_ago))
 
 async def get_reporter_history(reporter_id: int) -> int:
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute("""
-            SELECT COUNT(*) FROM reports 
-            WHERE reporter_id = ?
-        """, (reporter_id,))
-        
-        result = await cursor.fetchone()
-        return result[0] if result else 0
+    return await _fetchval("""
+        SELECT COUNT(*) FROM reports 
+        WHERE reporter_id = ?
+    """, (reporter_id,))
 
 async def get_time_since_last_report(reported_id: int, exclude_timestamp: Optional[int] = None) -> Optional[str]:
-    async with aiosqlite.connect(DB_FILE) as db:
-        if exclude_timestamp:
-            cursor = await db.execute("""
-                SELECT timestamp FROM reports 
-                WHERE reported_id = ? AND timestamp != ?
-                ORDER BY timestamp DESC LIMIT 1
-            """, (reported_id, exclude_timestamp))
-        else:
-            cursor = await db.execute("""
-                SELECT timestamp FROM reports 
-                WHERE reported_id = ?
-                ORDER BY timestamp DESC LIMIT 1
-            """, (reported_id,))
-        
-        result = await cursor.fetchone()
-        if not result or not result[0]:
-            return None
-        
-        latest_time = result[0]
-        time_diff = datetime.now().timestamp() - latest_time
-        
-        if time_diff < 60:
-            return f"{int(time_diff)} seconds ago"
-        elif time_diff < 3600:
-            return f"{int(time_diff / 60)} minutes ago"
-        elif time_diff < 86400:
-            return f"{int(time_diff / 3600)} hours ago"
-        else:
-            return f"{int(time_diff / 86400)} days ago"
+    if exclude_timestamp:
+        result = await _fetchone("""
+            SELECT timestamp FROM reports 
+            WHERE reported_id = ? AND timestamp != ?
+            ORDER BY timestamp DESC LIMIT 1
+        """, (reported_id, exclude_timestamp))
+    else:
+        result = await _fetchone("""
+            SELECT timestamp FROM reports 
+            WHERE reported_id = ?
+            ORDER BY timestamp DESC LIMIT 1
+        """, (reported_id,))
+    
+    if not result or not result[0]:
+        return None
+    
+    return _format_time_ago(result[0])
+
+def _format_time_ago(latest_time: int, now: Optional[float] = None) -> str:
+    time_diff = max((datetime.now().timestamp() if now is None else now) - latest_time, 0)
+    
+    if time_diff < 60:
+        return f"{int(time_diff)} seconds ago"
+    elif time_diff < 3600:
+        return f"{int(time_diff / 60)} minutes ago"
+    elif time_diff < 86400:
+        return f"{int(time_diff / 3600)} hours ago"
+    else:
+        return f"{int(time_diff / 86400)} days ago"
 
 async def get_most_common_reason(reported_id: int, exclude_timestamp: Optional[int] = None) -> Optional[str]:
-    async with aiosqlite.connect(DB_FILE) as db:
-        if exclude_timestamp:
-            cursor = await db.execute("""
-                SELECT abuse_type, COUNT(*) as count FROM reports 
-                WHERE reported_id = ? AND timestamp != ?
+    if exclude_timestamp:
+        result = await _fetchone("""
+            SELECT abuse_type, COUNT(*) as count FROM reports 
+            WHERE reported_id = ? AND timestamp != ?
+            GROUP BY abuse_type
+            ORDER BY count DESC LIMIT 1
+        """, (reported_id, exclude_timestamp))
+    else:
+        result = await _fetchone("""
+            SELECT abuse_type, COUNT(*) as count FROM reports 
+            WHERE reported_id = ?
+            GROUP BY abuse_type
+            ORDER BY count DESC LIMIT 1
+        """, (reported_id,))
+    
+    if not result:
+        return None
+    
+    return f"{result[0]} ({result[1]} times)"
+
+async def get_report_context(reporter_id: int, reported_id: int, report_id: int,
+                             now: Optional[int] = None) -> Dict:
+    """Statistics shown on a report embed, as of the moment report_id was inserted.
+
+    Counts include the report itself; the last-report time and most common
+    reason look only at earlier rows, identified by id rather than timestamp.
+    `now` is the time the windows and the time since the last report are
+    measured from, by default the current time. Served from the in-memory
+    player index when both players are in it.
+    """
+    if now is None:
+        now = int(datetime.now().timestamp())
+    context = _player_index.context(reporter_id, reported_id, report_id, now)
+    if context is None:
+        context = await _query_report_context(reporter_id, reported_id, report_id, now)
+        _schedule_player_index_load(reporter_id, reported_id)
+    
+    return {
+        "reports_24h": context['reports_24h'],
+        "reports_month": context['reports_month'],
+        "reporter_history": context['reporter_history'],
+        "time_since_last": _format_time_ago(context['last_report_time'], now) if context['last_report_time'] else None,
+        "most_common_reason": f"{context['common_abuse_type']} ({context['common_count']} times)" if context['common_abuse_type'] is not None else None,
+        "total_reports": context['total_reports'] or 0
+    }
+
+async def _query_report_context(reporter_id: int, reported_id: int, report_id: int, now: int) -> Dict:
+    day_ago = now - 86400
+    month_ago = now - (86400 * 30)
+    
+    # Archived reports still count towards the reporter's history, the most
+    # common reason and the last report time; the leaderboard and archive
+    # reason tables keep them once the rows themselves are gone.
+    row = await _fetchone("""
+        WITH common AS (
+            SELECT abuse_type, CAST(SUM(count) AS BIGINT) as count FROM (
+                SELECT abuse_type, COUNT(*) as count FROM reports
+                WHERE reported_id = ? AND id < ?
                 GROUP BY abuse_type
-                ORDER BY count DESC LIMIT 1
-            """, (reported_id, exclude_timestamp))
-        else:
-            cursor = await db.execute("""
-                SELECT abuse_type, COUNT(*) as count FROM reports 
+                UNION ALL
+                SELECT abuse_type, report_count FROM report_archive_reasons
                 WHERE reported_id = ?
-                GROUP BY abuse_type
-                ORDER BY count DESC LIMIT 1
-            """, (reported_id,))
-        
-        result = await cursor.fetchone()
-        if not result:
-            return None
-        
-        return f"{result[0]} ({result[1]} times)"
+            ) reasons
+            GROUP BY abuse_type
+            ORDER BY count DESC LIMIT 1
+        )
+        SELECT
+            (SELECT COUNT(*) FROM reports
+             WHERE reported_id = ? AND id <= ? AND timestamp >= ?) as reports_24h,
+            (SELECT COUNT(*) FROM reports
+             WHERE reported_id = ? AND id <= ? AND timestamp >= ?) as reports_month,
+            COALESCE((SELECT report_count FROM reporter_counts WHERE reporter_id = ?), 0)
+                - (SELECT COUNT(*) FROM reports WHERE reporter_id = ? AND id > ?) as reporter_history,
+            (SELECT MAX(timestamp) FROM (
+                SELECT MAX(timestamp) as timestamp FROM reports
+                WHERE reported_id = ? AND id < ?
+                UNION ALL
+                SELECT MAX(last_timestamp) FROM report_archive_reasons
+                WHERE reported_id = ?
+            ) latest) as last_report_time,
+            (SELECT abuse_type FROM common) as common_abuse_type,
+            (SELECT count FROM common) as common_count,
+            (SELECT value FROM counters WHERE name = 'total_reports') as total_reports
+    """, (
+        reported_id, report_id, reported_id,
+        reported_id, report_id, day_ago,
+        reported_id, report_id, month_ago,
+        reporter_id, reporter_id, report_id,
+        reported_id, report_id, reported_id,
+    ))
+    
+    return dict(row)
 
-async def get_reports_by_user(user_id: int, limit: int = 10) -> List[Dict]:
-    async with aiosqlite.connect(DB_FILE) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("""
-            SELECT * FROM reports 
+def _newest_reports_sql(where: str) -> str:
+    """Rows among each reported player's newest by id or by timestamp, ranked both ways."""
+    return f"""
+        SELECT * FROM (
+            SELECT reported_id, id, timestamp, abuse_type,
+                ROW_NUMBER() OVER (PARTITION BY reported_id ORDER BY id DESC) as by_id,
+                ROW_NUMBER() OVER (PARTITION BY reported_id ORDER BY timestamp DESC, id DESC) as by_time
+            FROM reports
+            WHERE {where}
+        ) ranked
+        WHERE by_id <= ? OR by_time <= ?
+    """
+
+def _add_ranked_rows(entry: player_index.ReportedEntry, rows: list):
+    entry.recent = sorted((row['id'], row['timestamp'], row['abuse_type']) for row in rows if row['by_id'] <= player_index.RECENT_DEPTH)
+    entry.latest = sorted((row['timestamp'], row['id']) for row in rows if row['by_time'] <= player_index.RECENT_DEPTH)
+
+def _add_archived_reasons(entry: player_index.ReportedEntry, rows: list):
+    """Count a player's archived reports in the entry's reasons, total and last report time."""
+    for row in rows:
+        entry.reasons[row['abuse_type']] = entry.reasons.get(row['abuse_type'], 0) + row['report_count']
+        entry.total += row['report_count']
+    if rows:
+        # Archived reports are earlier than any report being given statistics.
+        last = max(row['last_timestamp'] for row in rows)
+        entry.latest = sorted(entry.latest + [(last, 0)])[-player_index.RECENT_DEPTH:]
+
+def _schedule_player_index_load(reporter_id: int, reported_id: int):
+    if not _player_index.enabled or _player_index.total_reports is None:
+        return
+    if not _player_index.has_reported(reported_id) and _player_index.begin_load("reported", reported_id):
+        task = asyncio.create_task(_load_reported_entry(reported_id))
+        _index_loads.add(task)
+        task.add_done_callback(_index_loads.discard)
+    if not _player_index.has_reporter(reporter_id) and _player_index.begin_load("reporter", reporter_id):
+        task = asyncio.create_task(_load_reporter_entry(reporter_id))
+        _index_loads.add(task)
+        task.add_done_callback(_index_loads.discard)
+
+async def _load_reported_entry(reported_id: int):
+    now = int(datetime.now().timestamp())
+    try:
+        max_id = await _fetchval("SELECT MAX(id) FROM reports WHERE reported_id = ?", (reported_id,), None) or 0
+        reasons = await _fetchall("""
+            SELECT abuse_type, COUNT(*) as count FROM reports
+            WHERE reported_id = ? AND id <= ?
+            GROUP BY abuse_type
+        """, (reported_id, max_id))
+        timestamps = await _fetchall("""
+            SELECT timestamp FROM reports
+            WHERE reported_id = ? AND id <= ? AND timestamp >= ?
+            ORDER BY timestamp
+        """, (reported_id, max_id, now - player_index.WINDOW_SECONDS))
+        by_id = await _fetchall("""
+            SELECT id, timestamp, abuse_type FROM reports
+            WHERE reported_id = ? AND id <= ?
+            ORDER BY id DESC LIMIT ?
+        """, (reported_id, max_id, player_index.RECENT_DEPTH))
+        by_time = await _fetchall("""
+            SELECT id, timestamp FROM reports
+            WHERE reported_id = ? AND id <= ?
+            ORDER BY timestamp DESC, id DESC LIMIT ?
+        """, (reported_id, max_id, player_index.RECENT_DEPTH))
+        archived = await _fetchall("""
+            SELECT abuse_type, report_count, last_timestamp FROM report_archive_reasons
             WHERE reported_id = ?
-            ORDER BY timestamp DESC
-            LIMIT ?
-        """, (user_id, limit))
-        
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        """, (reported_id,))
+    except Exception as e:
+        _player_index.abort_load("reported", reported_id)
+        log.error(f"Error loading player index entry for {reported_id}: {e}")
+        return
+    
+    entry = player_index.ReportedEntry(now - player_index.WINDOW_SECONDS)
+    entry.reasons = {row['abuse_type']: row['count'] for row in reasons}
+    entry.total = sum(entry.reasons.values())
+    entry.timestamps.extend(int(row['timestamp']) for row in timestamps)
+    entry.recent = sorted((row['id'], row['timestamp'], row['abuse_type']) for row in by_id)
+    entry.latest = sorted((row['timestamp'], row['id']) for row in by_time)
+    _add_archived_reasons(entry, archived)
+    _player_index.finish_load("reported", reported_id, entry, max_id, now)
+
+async def _load_reporter_entry(reporter_id: int):
+    now = int(datetime.now().timestamp())
+    try:
+        recent = await _fetchall("""
+            SELECT id FROM reports
+            WHERE reporter_id = ?
+            ORDER BY id DESC LIMIT ?
+        """, (reporter_id, player_index.RECENT_DEPTH))
+        max_id = recent[0]['id'] if recent else 0
+        # The leaderboard count includes archived reports.
+        total = await _fetchval("""
+            SELECT COALESCE((SELECT report_count FROM reporter_counts WHERE reporter_id = ?), 0)
+                - (SELECT COUNT(*) FROM reports WHERE reporter_id = ? AND id > ?)
+        """, (reporter_id, reporter_id, max_id))
+    except Exception as e:
+        _player_index.abort_load("reporter", reporter_id)
+        log.error(f"Error loading player index entry for reporter {reporter_id}: {e}")
+        return
+    
+    entry = player_index.ReporterEntry()
+    entry.total = total
+    entry.recent = sorted(row['id'] for row in recent)
+    _player_index.finish_load("reporter", reporter_id, entry, max_id, now)
+
+async def warm_player_index():
+    """Load statistics for players reported, and reporters active, in the last 30 days."""
+    if not _player_index.enabled:
+        return
+    
+    now = int(datetime.now().timestamp())
+    since = now - player_index.WINDOW_SECONDS
+    limit = _player_index.capacity
+    active_reported = """
+        SELECT reported_id FROM reports WHERE timestamp >= ?
+        GROUP BY reported_id ORDER BY MAX(id) DESC LIMIT ?
+    """
+    active_reporters = """
+        SELECT reporter_id FROM reports WHERE timestamp >= ?
+        GROUP BY reporter_id ORDER BY MAX(id) DESC LIMIT ?
+    """
+    
+    total = await get_total_reports()
+    reported: Dict[int, player_index.ReportedEntry] = {}
+    for row in await _fetchall(f"""
+        SELECT reported_id, abuse_type, COUNT(*) as count FROM reports
+        WHERE reported_id IN ({active_reported})
+        GROUP BY reported_id, abuse_type
+    """, (since, limit)):
+        entry = reported.setdefault(row['reported_id'], player_index.ReportedEntry(since))
+        entry.reasons[row['abuse_type']] = row['count']
+        entry.total += row['count']
+    
+    for row in await _fetchall("""
+        SELECT reported_id, timestamp FROM reports
+        WHERE timestamp >= ?
+        ORDER BY timestamp
+    """, (since,)):
+        if row['reported_id'] in reported:
+            reported[row['reported_id']].timestamps.append(int(row['timestamp']))
+    
+    ranked_rows: Dict[int, list] = {}
+    for row in await _fetchall(
+        _newest_reports_sql(f"reported_id IN ({active_reported})"),
+        (since, limit, player_index.RECENT_DEPTH, player_index.RECENT_DEPTH)
+    ):
+        ranked_rows.setdefault(row['reported_id'], []).append(row)
+    for reported_id, rows in ranked_rows.items():
+        _add_ranked_rows(reported[reported_id], rows)
+    
+    archived_rows: Dict[int, list] = {}
+    for row in await _fetchall(f"""
+        SELECT reported_id, abuse_type, report_count, last_timestamp FROM report_archive_reasons
+        WHERE reported_id IN ({active_reported})
+    """, (since, limit)):
+        archived_rows.setdefault(row['reported_id'], []).append(row)
+    for reported_id, rows in archived_rows.items():
+        _add_archived_reasons(reported[reported_id], rows)
+    
+    reporters: Dict[int, player_index.ReporterEntry] = {}
+    for row in await _fetchall(f"""
+        SELECT reporter_id, report_count as count FROM reporter_counts
+        WHERE reporter_id IN ({active_reporters})
+    """, (since, limit)):
+        entry = reporters.setdefault(row['reporter_id'], player_index.ReporterEntry())
+        entry.total = row['count']
+    
+    for row in await _fetchall(f"""
+        SELECT reporter_id, id FROM (
+            SELECT reporter_id, id,
+                ROW_NUMBER() OVER (PARTITION BY reporter_id ORDER BY id DESC) as position
+            FROM reports
+            WHERE reporter_id IN ({active_reporters})
+        ) ranked
+        WHERE position <= ?
+        ORDER BY id
+    """, (since, limit, player_index.RECENT_DEPTH)):
+        reporters[row['reporter_id']].recent.append(row['id'])
+    
+    def by_recency(item):
+        return item[1].recent[-1] if item[1].recent else 0
+    
+    _player_index.load(
+        dict(sorted(reported.items(), key=by_recency)),
+        dict(sorted(reporters.items(), key=by_recency)),
+        total
+    )
+
+def get_player_index_stats() -> Dict:
+    return _player_index.stats()
+
+async def get_total_reports() -> int:
+    return await _fetchval("SELECT value FROM counters WHERE name = 'total_reports'")
+
+async def get_reports_by_user(user_id: int, limit: int = 10) -> List[Dict]:
+    rows = await _fetchall("""
+        SELECT * FROM reports 
+        WHERE reported_id = ?
+        ORDER BY timestamp DESC
+        LIMIT ?
+    """, (user_id, limit))
+    
+    return [dict(row) for row in rows]
 
 async def get_recent_reports(limit: int = 10) -> List[Dict]:
-    async with aiosqlite.connect(DB_FILE) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("""
-            SELECT * FROM reports 
-            ORDER BY timestamp DESC
-            LIMIT ?
-        """, (limit,))
-        
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+    rows = await _fetchall("""
+        SELECT * FROM reports 
+        ORDER BY timestamp DESC
+        LIMIT ?
+    """, (limit,))
+    
+    return [dict(row) for row in rows]
+
+REPORT_COLUMNS = ("id", "reporter_id", "reported_id", "abuse_type", "additional_info",
+                  "timestamp", "server_id", "place_id", "created_at")
+
+async def iter_reports(since: Optional[int] = None, until: Optional[int] = None,
+                       reported_id: Optional[int] = None, reporter_id: Optional[int] = None,
+                       abuse_type: Optional[str] = None, place_id: Optional[int] = None,
+                       chunk_size: int = 1000) -> AsyncIterator[List[Dict]]:
+    """Yield matching reports in id order, `chunk_size` rows at a time.
+
+    Each chunk is a separate keyset query (id > last id seen), so memory use
+    does not grow with the result and no connection is held between chunks.
+    """
+    conditions = ["id > ?"]
+    params: List[Any] = []
+    for column, op, value in (("timestamp", ">=", since), ("timestamp", "<", until),
+                              ("reported_id", "=", reported_id), ("reporter_id", "=", reporter_id),
+                              ("abuse_type", "=", abuse_type), ("place_id", "=", place_id)):
+        if value is not None:
+            conditions.append(f"{column} {op} ?")
+            params.append(value)
+    
+    sql = f"""
+        SELECT {', '.join(REPORT_COLUMNS)} FROM reports
+        WHERE {' AND '.join(conditions)}
+        ORDER BY id
+        LIMIT ?
+    """
+    last_id = 0
+    while True:
+        rows = await _fetchall(sql, (last_id, *params, chunk_size))
+        if not rows:
+            return
+        yield [dict(row) for row in rows]
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1]['id']
+
+def _search_terms(search_term: str) -> List[Tuple[List[str], bool]]:
+    """Split a search into (words, is_prefix) terms; "quoted text" is a phrase and word* a prefix."""
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', search_term):
+        words = re.findall(r"\w+", phrase or word)
+        if words:
+            terms.append((words, not phrase and len(words) == 1 and word.endswith('*')))
+    return terms
+
+def _fts_query(terms: List[Tuple[List[str], bool]]) -> str:
+    if USE_POSTGRES:
+        return " & ".join("<->".join(words) + (":*" if prefix else "") for words, prefix in terms)
+    return " ".join(f'"{" ".join(words)}"' + ("*" if prefix else "") for words, prefix in terms)
+
+def _search_sql(search_term: str) -> Tuple[str, tuple]:
+    """Base query for a search, with a highlighted snippet when the index is used."""
+    terms = _search_terms(search_term)
+    if _full_text_search and terms:
+        if USE_POSTGRES:
+            return f"""
+                SELECT reports.*, ts_headline('simple', COALESCE(additional_info, ''), query,
+                    'StartSel=**, StopSel=**, MaxWords=16, MinWords=6') as snippet
+                FROM reports, to_tsquery('simple', ?) AS query
+                WHERE {POSTGRES_SEARCH_VECTOR} @@ query
+            """, (_fts_query(terms),)
+        return """
+            SELECT r.*, snippet(reports_fts, 1, '**', '**', '…', 12) as snippet
+            FROM reports_fts
+            JOIN reports r ON r.id = reports_fts.rowid
+            WHERE reports_fts MATCH ?
+        """, (_fts_query(terms),)
+    
+    search_pattern = f"%{search_term}%"
+    like = _dialect("LIKE", "ILIKE")
+    return f"""
+        SELECT * FROM reports 
+        WHERE abuse_type {like} ? OR additional_info {like} ?
+    """, (search_pattern, search_pattern)
 
 async def search_reports(search_term: str, limit: int = 20) -> List[Dict]:
-    async with aiosqlite.connect(DB_FILE) as db:
-        db.row_factory = aiosqlite.Row
-        search_pattern = f"%{search_term}%"
-        cursor = await db.execute("""
-            SELECT * FROM reports 
-            WHERE abuse_type LIKE ? OR additional_info LIKE ?
-            ORDER BY timestamp DESC
-            LIMIT ?
-        """, (search_pattern, search_pattern, limit))
-        
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+    page = await search_reports_page(search_term, limit)
+    return page["reports"]
+
+async def _fetch_page(base_sql: str, params: Sequence[Any], key: Tuple[str, str], limit: int,
+                      after: Optional[tuple] = None, before: Optional[tuple] = None) -> Dict:
+    """One page of base_sql, ordered by the two `key` columns descending.
 
-async def get_report_stats() -> Dict:
-    async with aiosqlite.connect(DB_FILE) as db:
-        total_reports = await db.execute("SELECT COUNT(*) FROM reports")
+    `after` continues past the last row of the previous page and `before` goes
+    back from the first row of the next one. Both are key tuples, so each page
+    is a range seek on the key rather than an OFFSET scan.
+    """
+    columns = f"{key[0]}, {key[1]}"
+    if before is not None:
+        where, order, cursor = f"WHERE ({columns}) > (?, ?)", "ASC", tuple(before)
+    elif after is not None:
+        where, order, cursor = f"WHERE ({columns}) < (?, ?)", "DESC", tuple(after)
+    else:
+        where, order, cursor = "", "DESC", ()
+    
+    rows = await _fetchall(f"""
+        SELECT * FROM ({base_sql}) AS page
+        {where}
+        ORDER BY {key[0]} {order}, {key[1]} {order}
+        LIMIT ?
+    """, (*params, *cursor, limit + 1))
+    return _page_result(rows, key, limit, before)
+
+def _page_result(rows: Sequence[Any], key: Tuple[str, str], limit: int, before: Optional[tuple]) -> Dict:
+    has_more = len(rows) > limit
+    reports = [dict(row) for row in rows[:limit]]
+    if before is not None:
+        reports.reverse()
+    return {
+        "reports": reports,
+        "has_more": has_more,
+        "first": (reports[0][key[0]], reports[0][key[1]]) if reports else None,
+        "last": (reports[-1][key[0]], reports[-1][key[1]]) if reports else None
+    }
+
+async def get_reports_by_user_page(user_id: int, limit: int = 5,
+                                   after: Optional[tuple] = None, before: Optional[tuple] = None) -> Dict:
+    return await _fetch_page(
+        "SELECT * FROM reports WHERE reported_id = ?", (user_id,),
+        ("timestamp", "id"), limit, after, before
+    )
+
+async def get_recent_reports_page(limit: int = 10,
+                                  after: Optional[tuple] = None, before: Optional[tuple] = None) -> Dict:
+    return await _fetch_page("SELECT * FROM reports", (), ("timestamp", "id"), limit, after, before)
+
+async def search_reports_page(search_term: str, limit: int = 10,
+                              after: Optional[tuple] = None, before: Optional[tuple] = None) -> Dict:
+    # Matches are paged newest first rather than by relevance: bm25 scores
+    # move as reports are added, so a score cursor could skip or repeat rows.
+    base_sql, params = _search_sql(search_term)
+    return await _fetch_page(base_sql, params, ("timestamp", "id"), limit, after, before)
+
+async def count_reports_for_user(user_id: int) -> int:
+    return await _fetchval("SELECT COUNT(*) FROM reports WHERE reported_id = ?", (user_id,))
+
+async def get_archived_reports_page(user_id: int, limit: int = 5,
+                                    after: Optional[tuple] = None, before: Optional[tuple] = None) -> Dict:
+    """A page of one player's archived reports, in the same form as get_reports_by_user_page().
+
+    The player's archive chunks are read newest first (oldest first going
+    back), and reading stops once no remaining chunk's time range can hold a
+    row for the page, so a page usually decompresses one or two chunks.
+    """
+    descending = before is None
+    cursor = tuple(before) if before is not None else tuple(after) if after is not None else None
+    chunks = await _fetchall("""
+        SELECT a.id, a.first_timestamp, a.last_timestamp FROM report_archive_players p
+        JOIN report_archive a ON a.id = p.archive_id
+        WHERE p.reported_id = ?
+    """, (user_id,))
+    if descending:
+        chunks = sorted((chunk for chunk in chunks if cursor is None or chunk['first_timestamp'] <= cursor[0]),
+                        key=lambda chunk: chunk['last_timestamp'], reverse=True)
+    else:
+        chunks = sorted((chunk for chunk in chunks if chunk['last_timestamp'] >= cursor[0]),
+                        key=lambda chunk: chunk['first_timestamp'])
+    
+    def key(report: Dict) -> tuple:
+        return report['timestamp'], report['id']
+    
+    reports: List[Dict] = []
+    for chunk in chunks:
+        if len(reports) > limit:
+            edge = reports[limit]['timestamp']
+            if (chunk['last_timestamp'] < edge) if descending else (chunk['first_timestamp'] > edge):
+                break
+        data = await _fetchval("SELECT data FROM report_archive WHERE id = ?", (chunk['id'],))
+        reports.extend(
+            report for report in _decode_archive(data)
+            if report['reported_id'] == user_id
+            and (cursor is None or (key(report) < cursor if descending else key(report) > cursor))
+        )
+        reports.sort(key=key, reverse=descending)
+        del reports[limit + 1:]
+    return _page_result(reports, ("timestamp", "id"), limit, before)
+
+async def count_archived_reports_for_user(user_id: int) -> int:
+    return await _fetchval("""
+        SELECT CAST(COALESCE(SUM(report_count), 0) AS BIGINT) FROM report_archive_players WHERE reported_id = ?
+    """, (user_id,))
+
+async def rebuild_rollups() -> int:
+    async with _transaction() as db:
+        await _lock_report_writes(db)
+        await db.execute("DELETE FROM report_rollups")
+        await db.execute(ROLLUP_BACKFILL_SQL)
+        await _add_archived_rollups(db)
+        await db.execute(ROLLUP_ALL_TIME_BACKFILL_SQL)
+        cursor = await db.execute("SELECT COUNT(*) FROM report_rollups WHERE bucket >= 0")
+        buckets = (await cursor.fetchone())[0]
+        await cursor.close()
+    return buckets
+
+async def _add_archived_rollups(db):
+    counts = collections.Counter()
+    async for reports in _archived_chunks(db):
+        for report in reports:
+            timestamp = report['timestamp']
+            counts[(timestamp - timestamp % ROLLUP_BUCKET_SECONDS, report['abuse_type'], report['place_id'] or 0)] += 1
+    if counts:
+        await db.executemany("""
+            INSERT INTO report_rollups (bucket, abuse_type, place_id, count) VALUES (?, ?, ?, ?)
+            ON CONFLICT (bucket, abuse_type, place_id) DO UPDATE SET count = report_rollups.count + excluded.count
+        """, [(*key, count) for key, count in counts.items()])
+
+def _rollup_window(cutoff: int) -> int:
+    """First rollup bucket lying entirely at or after cutoff."""
+    return -(-cutoff // ROLLUP_BUCKET_SECONDS) * ROLLUP_BUCKET_SECONDS
+
+async def _count_reports_since(db, cutoff: int) -> int:
+    # Whole hours come from the rollups; only the partial hour at the start of
+    # the window is counted from reports, through the timestamp index.
+    first_bucket = _rollup_window(cutoff)
+    cursor = await db.execute("""
+        SELECT
+            (SELECT CAST(COALESCE(SUM(count), 0) AS BIGINT) FROM report_rollups WHERE bucket >= ?),
+            (SELECT COUNT(*) FROM reports WHERE timestamp >= ? AND timestamp < ?)
+    """, (first_bucket, cutoff, first_bucket))
+    row = await cursor.fetchone()
+    await cursor.close()
+    return row[0] + row[1]
+
+async def get_report_stats(exact: bool = False) -> Dict:
+    unique_counts = await get_unique_counts(exact=exact)
+    pool = await _get_pool()
+    async with pool.reader() as db:
+        total_reports = await db.execute("SELECT value FROM counters WHERE name = 'total_reports'")
         total_result = await total_reports.fetchone()
         total_count = total_result[0] if total_result else 0
         
-        today_reports = await db.execute("""
-            SELECT COUNT(*) FROM reports 
-            WHERE timestamp >= ?
-        """, (datetime.now().timestamp() - 86400,))
-        today_result = await today_reports.fetchone()
-        today_count = today_result[0] if today_result else 0
-        
-        unique_reported = await db.execute("SELECT COUNT(DISTINCT reported_id) FROM reports")
-        unique_result = await unique_reported.fetchone()
-        unique_count = unique_result[0] if unique_result else 0
+        today_count = await _count_reports_since(db, int(datetime.now().timestamp()) - 86400)
         
         top_abuse = await db.execute("""
-            SELECT abuse_type, COUNT(*) as count FROM reports 
+            SELECT abuse_type, CAST(SUM(count) AS BIGINT) as count FROM report_rollups 
+            WHERE bucket = ?
             GROUP BY abuse_type
             ORDER BY count DESC LIMIT 1
-        """)
+        """, (ROLLUP_ALL_TIME,))
         top_result = await top_abuse.fetchone()
         top_abuse_type = f"{top_result[0]} ({top_result[1]})" if top_result else "N/A"
         
         return {
             "total_reports": total_count,
             "today_reports": today_count,
-            "unique_reported": unique_count,
+            "unique_reported": unique_counts["reported"],
+            "unique_reporters": unique_counts["reporters"],
             "top_abuse_type": top_abuse_type
         }
 
+async def _bump_admin_version(db):
+    await db.execute("""
+        INSERT INTO counters (name, value) VALUES ('admin_version', 1)
+        ON CONFLICT (name) DO UPDATE SET value = counters.value + 1
+    """)
+
+async def load_admins():
+    global _admin_ids, _admin_version
+    version = await _fetchval("SELECT value FROM counters WHERE name = 'admin_version'")
+    rows = await _fetchall("SELECT discord_user_id FROM admin_users")
+    _admin_ids = {row['discord_user_id'] for row in rows}
+    _admin_version = version
+
+async def sync_admins() -> bool:
+    """Reload the admin set if another instance has changed admin_users."""
+    version = await _fetchval("SELECT value FROM counters WHERE name = 'admin_version'")
+    if _admin_ids is not None and version == _admin_version:
+        return False
+    await load_admins()
+    return True
+
 async def is_admin(discord_user_id: int) -> bool:
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute("""
-            SELECT COUNT(*) FROM admin_users 
-            WHERE discord_user_id = ?
-        """, (discord_user_id,))
-        
-        result = await cursor.fetchone()
-        return (result[0] if result else 0) > 0
+    if _admin_ids is not None:
+        return discord_user_id in _admin_ids
+    
+    count = await _fetchval("""
+        SELECT COUNT(*) FROM admin_users 
+        WHERE discord_user_id = ?
+    """, (discord_user_id,))
+    
+    return count > 0
 
 async def add_admin(discord_user_id: int, added_by: Optional[int] = None) -> bool:
     try:
-        async with aiosqlite.connect(DB_FILE) as db:
-            await db.execute("""
-                INSERT OR IGNORE INTO admin_users (discord_user_id, added_by)
+        async with _transaction() as db:
+            cursor = await db.execute("""
+                INSERT INTO admin_users (discord_user_id, added_by)
                 VALUES (?, ?)
+                ON CONFLICT (discord_user_id) DO NOTHING
+                RETURNING id
             """, (discord_user_id, added_by))
-            await db.commit()
-            return True
+            added = await cursor.fetchall()
+            if added:
+                await _bump_admin_version(db)
+        if added and _admin_ids is not None:
+            _admin_ids.add(discord_user_id)
+        return True
     except Exception:
         return False
 
 async def remove_admin(discord_user_id: int) -> bool:
     try:
-        async with aiosqlite.connect(DB_FILE) as db:
+        async with _transaction() as db:
             cursor = await db.execute("""
                 DELETE FROM admin_users WHERE discord_user_id = ?
+                RETURNING id
             """, (discord_user_id,))
-            await db.commit()
-            return cursor.rowcount > 0
+            removed = await cursor.fetchall()
+            if removed:
+                await _bump_admin_version(db)
+        if removed and _admin_ids is not None:
+            _admin_ids.discard(discord_user_id)
+        return len(removed) > 0
     except Exception:
         return False
 
 async def get_all_admins() -> List[Dict]:
-    async with aiosqlite.connect(DB_FILE) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("""
-            SELECT * FROM admin_users 
-            ORDER BY added_at DESC
-        """)
-        
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+    rows = await _fetchall("""
+        SELECT * FROM admin_users 
+        ORDER BY added_at DESC
+    """)
+    
+    return [dict(row) for row in rows]
 
-async def create_admin_session(session_token: str, expires_at: datetime) -> bool:
+async def revoke_admin_session(session_id: str, expires_at: int) -> bool:
     try:
-        async with aiosqlite.connect(DB_FILE) as db:
+        async with _transaction() as db:
             await db.execute("""
-                INSERT INTO admin_sessions (session_token, expires_at)
+                INSERT INTO revoked_sessions (session_id, expires_at)
                 VALUES (?, ?)
-            """, (session_token, expires_at))
-            await db.commit()
-            return True
-    except Exception:
+                ON CONFLICT (session_id) DO NOTHING
+            """, (session_id, expires_at))
+        return True
+    except Exception as e:
+        log.error(f"Error revoking admin session: {e}")
         return False
 
-async def validate_admin_session(session_token: str) -> bool:
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute("""
-            SELECT COUNT(*) FROM admin_sessions 
-            WHERE session_token = ? AND expires_at > datetime('now')
-        """, (session_token,))
-        
-        result = await cursor.fetchone()
-        return (result[0] if result else 0) > 0
+async def get_revoked_sessions() -> Dict[str, int]:
+    rows = await _fetchall("""
+        SELECT session_id, expires_at FROM revoked_sessions
+        WHERE expires_at > ?
+    """, (int(datetime.now().timestamp()),))
+    
+    return {row['session_id']: row['expires_at'] for row in rows}
 
 async def cleanup_expired_sessions():
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _transaction() as db:
         await db.execute("""
+            DELETE FROM revoked_sessions 
+            WHERE expires_at <= ?
+        """, (int(datetime.now().timestamp()),))
+        await db.execute(f"""
             DELETE FROM admin_sessions 
-            WHERE expires_at <= datetime('now')
+            WHERE expires_at <= {_dialect("datetime('now')", "NOW()")}
         """)
-        await db.commit()
 
-async def get_most_reported_players(limit: int = 10) -> List[Dict]:
-    async with aiosqlite.connect(DB_FILE) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("""
-            SELECT 
-                reported_id,
-                COUNT(*) as report_count,
-                MAX(timestamp) as last_report_time
-            FROM reports
-            GROUP BY reported_id
+async def _leaderboard(kind: str, limit: int, window: Optional[int]) -> List[Dict]:
+    table, daily_table, column = LEADERBOARD_TABLES[kind]
+    if window is None:
+        rows = await _fetchall(f"""
+            SELECT {column}, report_count, last_report_time
+            FROM {table}
             ORDER BY report_count DESC
             LIMIT ?
         """, (limit,))
-        
-        rows = await cursor.fetchall()
         return [dict(row) for row in rows]
+    
+    # Whole days come from the daily counts; the partial day at the start of
+    # the window is counted from reports through the timestamp index.
+    cutoff = int(datetime.now().timestamp()) - window
+    first_day = -(-cutoff // LEADERBOARD_DAY_SECONDS) * LEADERBOARD_DAY_SECONDS
+    rows = await _fetchall(f"""
+        SELECT {column}, CAST(SUM(report_count) AS BIGINT) as report_count, MAX(last_report_time) as last_report_time
+        FROM (
+            SELECT {column}, report_count, last_report_time
+            FROM {daily_table}
+            WHERE day >= ?
+            UNION ALL
+            SELECT {column}, COUNT(*), MAX(timestamp)
+            FROM reports
+            WHERE timestamp >= ? AND timestamp < ?
+            GROUP BY {column}
+        ) AS windowed
+        GROUP BY {column}
+        ORDER BY report_count DESC
+        LIMIT ?
+    """, (first_day, cutoff, first_day, limit))
+    return [dict(row) for row in rows]
 
-async def get_reports_by_abuse_type() -> List[Dict]:
-    async with aiosqlite.connect(DB_FILE) as db:
-        db.row_factory = aiosqlite.Row
+async def get_most_reported_players(limit: int = 10, window: Optional[int] = None) -> List[Dict]:
+    return await _leaderboard("players", limit, window)
+
+async def get_top_reporters(limit: int = 10, window: Optional[int] = None) -> List[Dict]:
+    return await _leaderboard("reporters", limit, window)
+
+async def rebuild_leaderboards():
+    async with _transaction() as db:
+        await _lock_report_writes(db)
+        for table, daily_table, _ in LEADERBOARD_TABLES.values():
+            await db.execute(f"DELETE FROM {table}")
+            await db.execute(f"DELETE FROM {daily_table}")
+        await _backfill_leaderboards(db)
+        await _add_archived_leaderboards(db)
+
+async def _add_archived_leaderboards(db):
+    # Archived reports are older than the daily tables reach, so only the
+    # all-time counts include them.
+    counts: Dict[str, Dict[int, List[int]]] = {kind: {} for kind in LEADERBOARD_TABLES}
+    async for reports in _archived_chunks(db):
+        for report in reports:
+            for kind, (_, _, column) in LEADERBOARD_TABLES.items():
+                entry = counts[kind].setdefault(report[column], [0, 0])
+                entry[0] += 1
+                entry[1] = max(entry[1], report['timestamp'])
+    
+    greatest = _dialect("MAX", "GREATEST")
+    for kind, (table, _, column) in LEADERBOARD_TABLES.items():
+        if not counts[kind]:
+            continue
+        await db.executemany(f"""
+            INSERT INTO {table} ({column}, report_count, last_report_time) VALUES (?, ?, ?)
+            ON CONFLICT ({column}) DO UPDATE SET
+                report_count = {table}.report_count + excluded.report_count,
+                last_report_time = {greatest}({table}.last_report_time, excluded.last_report_time)
+        """, [(key, count, last) for key, (count, last) in counts[kind].items()])
+
+async def prune_leaderboard_days():
+    oldest_day = int(datetime.now().timestamp()) - LEADERBOARD_DAYS * LEADERBOARD_DAY_SECONDS
+    async with _transaction() as db:
+        for _, daily_table, _ in LEADERBOARD_TABLES.values():
+            await db.execute(f"DELETE FROM {daily_table} WHERE day < ?", (oldest_day - oldest_day % LEADERBOARD_DAY_SECONDS,))
+
+def _encode_archive(reports: List[Dict]) -> bytes:
+    lines = (json.dumps(report, separators=(",", ":")) for report in reports)
+    return gzip.compress("\n".join(lines).encode("utf-8"))
+
+def _decode_archive(data: bytes) -> List[Dict]:
+    return [json.loads(line) for line in gzip.decompress(data).splitlines()]
+
+async def _archived_chunks(db, chunk_size: int = 20) -> AsyncIterator[List[Dict]]:
+    """Every archived report, one decompressed archive chunk at a time."""
+    last_id = 0
+    while True:
         cursor = await db.execute("""
-            SELECT 
-                abuse_type,
-                COUNT(*) as count
-            FROM reports
-            GROUP BY abuse_type
-            ORDER BY count DESC
-        """)
-        
+            SELECT id, data FROM report_archive WHERE id > ? ORDER BY id LIMIT ?
+        """, (last_id, chunk_size))
         rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+        await cursor.close()
+        if not rows:
+            return
+        for row in rows:
+            yield _decode_archive(row[1])
+        last_id = rows[-1][0]
 
-async def get_reports_today() -> int:
-    async with aiosqlite.connect(DB_FILE) as db:
-        now = datetime.now().timestamp()
-        day_start = now - 86400
+async def _add_archive_reasons(db, reports: List[Dict]):
+    """Add archived reports to the per-player abuse type totals the embed statistics read."""
+    reasons: Dict[Tuple[int, str], List[int]] = {}
+    for report in reports:
+        entry = reasons.setdefault((report['reported_id'], report['abuse_type']), [0, 0])
+        entry[0] += 1
+        entry[1] = max(entry[1], report['timestamp'])
+    if not reasons:
+        return
+    greatest = _dialect("MAX", "GREATEST")
+    await db.executemany(f"""
+        INSERT INTO report_archive_reasons (reported_id, abuse_type, report_count, last_timestamp)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (reported_id, abuse_type) DO UPDATE SET
+            report_count = report_archive_reasons.report_count + excluded.report_count,
+            last_timestamp = {greatest}(report_archive_reasons.last_timestamp, excluded.last_timestamp)
+    """, [(reported_id, abuse_type, count, last) for (reported_id, abuse_type), (count, last) in reasons.items()])
+
+async def _backfill_archive_reasons(db):
+    cursor = await db.execute("""
+        SELECT EXISTS (SELECT 1 FROM report_archive), EXISTS (SELECT 1 FROM report_archive_reasons)
+    """)
+    archived, counted = await cursor.fetchone()
+    await cursor.close()
+    if archived and not counted:
+        async for reports in _archived_chunks(db):
+            await _add_archive_reasons(db, reports)
+
+async def _archive_batch(cutoff: int, batch_size: int) -> int:
+    async with _transaction() as db:
+        await _lock_report_writes(db)
+        # Reports still waiting for delivery stay until the dispatcher is done
+        # with them; entries it gave up on are dropped along with their report.
+        cursor = await db.execute(f"""
+            SELECT {', '.join(REPORT_COLUMNS)} FROM reports
+            WHERE timestamp < ? AND id NOT IN (SELECT report_id FROM report_outbox WHERE status = 'pending')
+            ORDER BY timestamp, id
+            LIMIT ?
+        """, (cutoff, batch_size))
+        reports = [dict(row) for row in await cursor.fetchall()]
+        await cursor.close()
+        if not reports:
+            return 0
         
-        cursor = await db.execute("""
-            SELECT COUNT(*) FROM reports 
-            WHERE timestamp >= ?
-        """, (day_start,))
+        def month(report: Dict) -> str:
+            return time.strftime("%Y-%m", time.gmtime(report['timestamp']))
         
-        result = await cursor.fetchone()
-        return result[0] if result else 0
+        for name, chunk in itertools.groupby(reports, key=month):
+            chunk = list(chunk)
+            cursor = await db.execute("""
+                INSERT INTO report_archive (month, first_timestamp, last_timestamp, report_count, data)
+                VALUES (?, ?, ?, ?, ?)
+                RETURNING id
+            """, (name, chunk[0]['timestamp'], chunk[-1]['timestamp'], len(chunk), _encode_archive(chunk)))
+            archive_id = (await cursor.fetchone())[0]
+            await cursor.close()
+            players = collections.Counter(report['reported_id'] for report in chunk)
+            await db.executemany("""
+                INSERT INTO report_archive_players (reported_id, archive_id, report_count) VALUES (?, ?, ?)
+            """, [(reported_id, archive_id, count) for reported_id, count in players.items()])
+        await _add_archive_reasons(db, reports)
+        
+        await db.executemany("DELETE FROM reports WHERE id = ?", [(report['id'],) for report in reports])
+        await db.execute("""
+            DELETE FROM report_outbox
+            WHERE status = 'failed' AND NOT EXISTS (SELECT 1 FROM reports WHERE reports.id = report_outbox.report_id)
+        """)
+        await db.execute("""
+            INSERT INTO counters (name, value) VALUES ('archived_reports', ?)
+            ON CONFLICT (name) DO UPDATE SET value = counters.value + excluded.value
+        """, (len(reports),))
+    return len(reports)
+
+async def archive_reports(retention_days: int, batch_size: int = ARCHIVE_BATCH,
+                          progress: Optional[Callable[[int], None]] = None) -> int:
+    """Move reports older than retention_days (at least ARCHIVE_MIN_DAYS) into the archive.
+    
+    Rollups, leaderboards, sketches and the report total are only ever added
+    to by the insert triggers, so all-time statistics are unchanged, and the
+    embed statistics read archived reasons from report_archive_reasons.
+    Per-player history, search and exports see live reports only; a player's
+    archived reports are read back with get_archived_reports_page(). Each batch is
+    its own transaction, so reports keep arriving while a backlog is moved.
+    Returns the number of reports archived.
+    """
+    days = max(retention_days, ARCHIVE_MIN_DAYS)
+    cutoff = int(datetime.now().timestamp()) - days * 86400
+    cutoff -= cutoff % 86400
+    
+    archived = 0
+    while True:
+        moved = await _archive_batch(cutoff, batch_size)
+        archived += moved
+        if progress and moved:
+            progress(archived)
+        if moved < batch_size:
+            break
+    
+    return archived
+
+async def get_archive_stats() -> List[Dict]:
+    rows = await _fetchall("""
+        SELECT month, COUNT(*) as chunks, CAST(SUM(report_count) AS BIGINT) as reports,
+            CAST(SUM(LENGTH(data)) AS BIGINT) as bytes
+        FROM report_archive
+        GROUP BY month
+        ORDER BY month
+    """)
+    return [dict(row) for row in rows]
+
+async def compact_database(full: bool = False) -> int:
+    """Give space freed by archiving back to the filesystem; returns bytes freed.
+    
+    SQLite databases in incremental auto-vacuum mode, which new databases are
+    created in, release their free pages. `full` rebuilds the file with VACUUM
+    instead, which also switches an older database to incremental mode but
+    blocks writes while it runs. On Postgres autovacuum reclaims the space,
+    and `full` runs VACUUM ANALYZE on the reports table.
+    """
+    before = await get_database_size()
+    pool = await _get_pool()
+    if USE_POSTGRES:
+        if full:
+            # VACUUM cannot run inside writer()'s transaction.
+            async with pool.reader() as db:
+                await db.execute("VACUUM ANALYZE reports")
+    else:
+        async with pool.writer() as db:
+            if full:
+                await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                await db.execute("VACUUM")
+            else:
+                mode = await db.execute_fetchall("PRAGMA auto_vacuum")
+                if mode[0][0] == 2:
+                    await db.execute_fetchall("PRAGMA incremental_vacuum")
+        async with pool.writer() as db:
+            await db.execute_fetchall("PRAGMA wal_checkpoint(TRUNCATE)")
+    return before - await get_database_size()
+
+async def get_reports_by_abuse_type() -> List[Dict]:
+    rows = await _fetchall("""
+        SELECT 
+            abuse_type,
+            CAST(SUM(count) AS BIGINT) as count
+        FROM report_rollups
+        WHERE bucket = ?
+        GROUP BY abuse_type
+        ORDER BY count DESC
+    """, (ROLLUP_ALL_TIME,))
+    
+    return [dict(row) for row in rows]
+
+async def _count_reports_in_window(seconds: int) -> int:
+    pool = await _get_pool()
+    async with pool.reader() as db:
+        return await _count_reports_since(db, int(datetime.now().timestamp()) - seconds)
+
+async def get_reports_today() -> int:
+    return await _count_reports_in_window(86400)
 
 async def get_reports_this_week() -> int:
-    async with aiosqlite.connect(DB_FILE) as db:
-        now = datetime.now().timestamp()
-        week_start = now - (86400 * 7)
-        
-        cursor = await db.execute("""
-            SELECT COUNT(*) FROM reports 
-            WHERE timestamp >= ?
-        """, (week_start,))
-        
-        result = await cursor.fetchone()
-        return result[0] if result else 0
+    return await _count_reports_in_window(86400 * 7)
 
 async def get_reports_this_month() -> int:
-    async with aiosqlite.connect(DB_FILE) as db:
-        now = datetime.now().timestamp()
-        month_start = now - (86400 * 30)
-        
-        cursor = await db.execute("""
-            SELECT COUNT(*) FROM reports 
-            WHERE timestamp >= ?
-        """, (month_start,))
-        
-        result = await cursor.fetchone()
-        return result[0] if result else 0
+    return await _count_reports_in_window(86400 * 30)
 
 async def get_recent_reports_detailed(limit: int = 20) -> List[Dict]:
-    async with aiosqlite.connect(DB_FILE) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("""
-            SELECT * FROM reports 
-            ORDER BY timestamp DESC
-            LIMIT ?
-        """, (limit,))
-        
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+    rows = await _fetchall("""
+        SELECT * FROM reports 
+        ORDER BY timestamp DESC
+        LIMIT ?
+    """, (limit,))
+    
+    return [dict(row) for row in rows]
 
 async def get_reports_by_hour() -> List[Dict]:
-    async with aiosqlite.connect(DB_FILE) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("""
-            SELECT 
-                strftime('%H', datetime(timestamp, 'unixepoch')) as hour,
-                COUNT(*) as count
-            FROM reports
-            WHERE timestamp >= ?
-            GROUP BY hour
-            ORDER BY hour
-        """, (datetime.now().timestamp() - 86400,))
-        
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+    cutoff = int(datetime.now().timestamp()) - 86400
+    first_bucket = _rollup_window(cutoff)
+    rows = await _fetchall("""
+        SELECT bucket, CAST(SUM(count) AS BIGINT) as count
+        FROM report_rollups
+        WHERE bucket >= ?
+        GROUP BY bucket
+    """, (first_bucket,))
+    partial = await _fetchval("""
+        SELECT COUNT(*) FROM reports 
+        WHERE timestamp >= ? AND timestamp < ?
+    """, (cutoff, first_bucket))
+    
+    by_hour: Dict[str, int] = {}
+    buckets = [(row['bucket'], row['count']) for row in rows]
+    if partial:
+        buckets.append((first_bucket - ROLLUP_BUCKET_SECONDS, partial))
+    for bucket, count in buckets:
+        hour = f"{bucket % 86400 // ROLLUP_BUCKET_SECONDS:02d}"
+        by_hour[hour] = by_hour.get(hour, 0) + count
+    
+    return [{"hour": hour, "count": count} for hour, count in sorted(by_hour.items())]
 
-async def get_top_reporters(limit: int = 10) -> List[Dict]:
-    async with aiosqlite.connect(DB_FILE) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("""
-            SELECT 
-                reporter_id,
-                COUNT(*) as report_count
-            FROM reports
-            GROUP BY reporter_id
-            ORDER BY report_count DESC
-            LIMIT ?
-        """, (limit,))
-        
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+DB_CALL_SECONDS = metrics.Histogram("db_call_duration_seconds", "Time spent in database functions, by function", ["function"])
+DB_CALL_ERRORS = metrics.Counter("db_call_errors_total", "Database function calls that raised, by function", ["function"])
+DB_SLOW_QUERIES = metrics.Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS, by calling function", ["function"])
+
+def _instrument_functions():
+    # Every public coroutine function in this module is timed. Calls between
+    # them look the name up at call time, so they go through the wrapper too.
+    for name, value in list(globals().items()):
+        if not name.startswith("_") and inspect.iscoroutinefunction(value) and value.__module__ == __name__:
+            globals()[name] = metrics.time_coroutine(value, DB_CALL_SECONDS, DB_CALL_ERRORS)
 
+_instrument_functions()
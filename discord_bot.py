@@ -1,44 +1,79 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from aiohttp import web, ClientSession
+from aiohttp import web
 from aiohttp.web import Response
 import asyncio
-from datetime import datetime, timedelta
-from collections import defaultdict
-from typing import Tuple, Dict, Optional
+from datetime import datetime
+from typing import Tuple, Dict
 import time
-import secrets
+import math
 import hashlib
+import hmac
 import json
+import csv
+import io
+import functools
 
 import database
+import dispatcher
+import metrics
+from dashboard_cache import SnapshotCache
+from live_feed import Broadcaster, DashboardFeed
+from roblox_api import RobloxClient
+from rate_limiter import RateLimiter
+from admin_sessions import SessionManager, derive_secret
+from report_views import ReportPager
 import logger
 import config
 
 log = logger.setup_logger("discord_bot")
 
 intents = discord.Intents.default()
-bot = commands.Bot(command_prefix='!', intents=intents)
+bot = commands.Bot(command_prefix='!', intents=intents, http_trace=dispatcher.http_trace())
 
 CHANNEL_ID = config.DISCORD_CHANNEL_ID
-app = web.Application()
+app = web.Application(middlewares=[metrics.http_middleware])
 routes = web.RouteTableDef()
 
-rate_limit_store = defaultdict(list)
+rate_limiter = RateLimiter(
+    config.RATE_LIMIT_REQUESTS,
+    config.RATE_LIMIT_WINDOW,
+    max_keys=config.RATE_LIMIT_MAX_KEYS
+)
 
-def check_rate_limit(ip: str) -> bool:
-    now = time.time()
-    window_start = now - config.RATE_LIMIT_WINDOW
-    
-    requests = rate_limit_store[ip]
-    requests[:] = [req_time for req_time in requests if req_time > window_start]
+metrics.Counter("rate_limiter_allowed_total", "Requests the rate limiter let through").set_function(lambda: rate_limiter.allowed)
+metrics.Counter("rate_limiter_rejected_total", "Requests the rate limiter rejected with 429").set_function(lambda: rate_limiter.rejected)
+metrics.Gauge("rate_limiter_tracked_keys", "Clients the rate limiter is tracking").set_function(lambda: rate_limiter.stats()["tracked_keys"])
+metrics.Gauge("ingest_pending_reports", "Reports waiting in the group-commit buffer").set_function(lambda: database.get_ingest_stats()["pending"])
+metrics.Counter("ingest_groups_total", "Group commits written by the ingest buffer").set_function(lambda: database.get_ingest_stats()["groups"])
+
+async def rate_limit_key(request: web.Request) -> str:
+    mode = config.RATE_LIMIT_KEY
     
-    if len(requests) >= config.RATE_LIMIT_REQUESTS:
-        return False
+    if mode == "forwarded":
+        forwarded_for = request.headers.get('X-Forwarded-For', '')
+        if forwarded_for:
+            return f"ip:{forwarded_for.split(',')[-1].strip()}"
+    elif mode == "api_key":
+        api_key = request.headers.get('X-API-Key', '')
+        if api_key:
+            return f"key:{hashlib.sha256(api_key.encode()).hexdigest()[:16]}"
+    elif mode == "server":
+        try:
+            data = await request.json()
+            if isinstance(data, list) and data:
+                data = data[0]
+            server_id = data.get('serverId') if isinstance(data, dict) else None
+        except Exception:
+            server_id = None
+        if server_id:
+            return f"server:{server_id}"
     
-    requests.append(now)
-    return True
+    return f"ip:{request.remote}"
+
+def check_rate_limit(key: str, cost: int = 1) -> Tuple[bool, float]:
+    return rate_limiter.check(key, cost)
 
 def validate_report_data(data: dict) -> Tuple[bool, str]:
     if not isinstance(data, dict):
@@ -69,31 +104,88 @@ def validate_report_data(data: dict) -> Tuple[bool, str]:
     
     return True, ""
 
+def build_report_record(data: dict) -> Dict:
+    reporter = data.get('reporter', {})
+    reported = data.get('reported', {})
+    now = int(datetime.now().timestamp())
+    
+    return {
+        "reporter_id": reporter.get('userId', 0),
+        "reported_id": reported.get('userId', 0),
+        "abuse_type": data.get('abuseType', 'Unknown'),
+        "additional_info": data.get('additionalInfo', ''),
+        "timestamp": database.report_timestamp(data.get('timestamp'), now),
+        "server_id": str(data.get('serverId', 'Unknown')),
+        "place_id": data.get('placeId', 0),
+        "outbox_payload": {
+            "reporter": {
+                "name": reporter.get('name', 'Unknown'),
+                "thumbnail": reporter.get('thumbnail', ''),
+                "profileUrl": reporter.get('profileUrl', '')
+            },
+            "reported": {
+                "name": reported.get('name', 'Unknown'),
+                "thumbnail": reported.get('thumbnail', ''),
+                "profileUrl": reported.get('profileUrl', '')
+            },
+            "received_at": now
+        }
+    }
+
+def rate_limited_response(limit_key: str, retry_after: float) -> web.Response:
+    log.warning(f"Rate limit exceeded for {limit_key}")
+    return web.json_response(
+        {"status": "error", "message": "Rate limit exceeded"},
+        status=429,
+        headers={"Retry-After": str(math.ceil(retry_after))}
+    )
+
+def check_api_key(request: web.Request) -> bool:
+    if config.API_KEY and config.API_KEY != "":
+        api_key = request.headers.get('X-API-Key', '')
+        if api_key != config.API_KEY:
+            log.warning(f"Invalid API key from IP: {request.remote}")
+            return False
+    return True
+
 @routes.get('/')
 async def health_check(request):
-    return web.json_response({"status": "online", "bot": "ready"})
+    return web.json_response({
+        "status": "online",
+        "bot": "ready",
+        "dispatcher": dispatcher.stats,
+        "rate_limiter": rate_limiter.stats(),
+        "ingest": database.get_ingest_stats()
+    })
+
+@routes.get('/metrics')
+async def metrics_endpoint(request):
+    if config.METRICS_TOKEN:
+        # Compared as bytes: compare_digest raises on non-ASCII strings.
+        expected = f"Bearer {config.METRICS_TOKEN}".encode()
+        if not hmac.compare_digest(request.headers.get('Authorization', '').encode('utf-8', 'surrogateescape'), expected):
+            return web.Response(status=401, text="Unauthorized")
+    
+    return web.Response(
+        body=metrics.render().encode(),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+    )
 
 @routes.post('/report')
 async def handle_report(request):
     client_ip = request.remote
+    limit_key = await rate_limit_key(request)
+    
+    allowed, retry_after = check_rate_limit(limit_key)
+    if not allowed:
+        return rate_limited_response(limit_key, retry_after)
     
-    if not check_rate_limit(client_ip):
-        log.warning(f"Rate limit exceeded for IP: {client_ip}")
+    if not check_api_key(request):
         return web.json_response(
-            {"status": "error", "message": "Rate limit exceeded"},
-            status=429,
-            headers={"Retry-After": str(config.RATE_LIMIT_WINDOW)}
+            {"status": "error", "message": "Unauthorized"},
+            status=401
         )
     
-    if config.API_KEY and config.API_KEY != "":
-        api_key = request.headers.get('X-API-Key', '')
-        if api_key != config.API_KEY:
-            log.warning(f"Invalid API key from IP: {client_ip}")
-            return web.json_response(
-                {"status": "error", "message": "Unauthorized"},
-                status=401
-            )
-    
     try:
         data = await request.json()
         
@@ -105,115 +197,121 @@ async def handle_report(request):
                 status=400
             )
         
-        reporter = data.get('reporter', {})
-        reported = data.get('reported', {})
-        abuse_type = data.get('abuseType', 'Unknown')
-        additional_info = data.get('additionalInfo', '')
+        record = build_report_record(data)
+        report_id = await database.add_report(**record)
+        dispatcher.notify()
+        dashboard_snapshot.invalidate()
+        dashboard_feed.reports_added([feed_report(report_id, record)])
         
-        reporter_name = reporter.get('name', 'Unknown')
-        reporter_id = reporter.get('userId', 0)
-        reporter_thumbnail = reporter.get('thumbnail', '')
-        reporter_profile = reporter.get('profileUrl', '')
+        log.info(f"Report #{report_id} received: {record['reported_id']} reported by {record['reporter_id']}")
         
-        reported_name = reported.get('name', 'Unknown')
-        reported_id = reported.get('userId', 0)
-        reported_thumbnail = reported.get('thumbnail', '')
-        reported_profile = reported.get('profileUrl', '')
-        
-        server_id = data.get('serverId', 'Unknown')
-        place_id = data.get('placeId', 0)
-        timestamp = data.get('timestamp', int(datetime.now().timestamp()))
-        
-        report_id = await database.add_report(
-            reporter_id, reported_id, abuse_type, additional_info,
-            timestamp, str(server_id), place_id
-        )
-        
-        log.info(f"Report #{report_id} received: {reported_id} reported by {reporter_id}")
-        
-        reports_24h = await database.get_reports_last_24h(reported_id)
-        reports_month = await database.get_reports_last_month(reported_id)
-        reporter_history = await database.get_reporter_history(reporter_id)
-        time_since_last = await database.get_time_since_last_report(reported_id, exclude_timestamp=timestamp)
-        most_common_reason = await database.get_most_common_reason(reported_id, exclude_timestamp=timestamp)
-        
-        embed = discord.Embed(
-            title="🚨 Player Report",
-            color=discord.Color.red(),
-            timestamp=discord.utils.utcnow()
-        )
-        
-        embed.add_field(
-            name="📋 Abuse Type",
-            value=f"**{abuse_type}**",
-            inline=False
-        )
-        
-        if additional_info and additional_info.strip():
-            embed.add_field(
-                name="📝 Additional Information",
-                value=additional_info[:1024],
-                inline=False
-            )
-        
-        embed.add_field(
-            name="👤 Reporter",
-            value=f"[{reporter_name}]({reporter_profile})\nID: `{reporter_id}`\nTotal Reports Made: `{reporter_history}`",
-            inline=True
+        return web.json_response({"status": "accepted", "report_id": report_id}, status=202)
+    
+    except Exception as e:
+        log.error(f"Error handling report from IP {client_ip}: {e}", exc_info=True)
+        return web.json_response(
+            {"status": "error", "message": "Internal server error"},
+            status=500
         )
-        
-        embed.add_field(
-            name="🎯 Reported Player",
-            value=f"[{reported_name}]({reported_profile})\nID: `{reported_id}`",
-            inline=True
+
+@routes.post('/report/batch')
+async def handle_report_batch(request):
+    client_ip = request.remote
+    limit_key = await rate_limit_key(request)
+    
+    allowed, retry_after = check_rate_limit(limit_key)
+    if not allowed:
+        return rate_limited_response(limit_key, retry_after)
+    
+    if not check_api_key(request):
+        return web.json_response(
+            {"status": "error", "message": "Unauthorized"},
+            status=401
         )
-        
-        stats_text = f"Last 24 Hours: `{reports_24h}`\nLast Month: `{reports_month}`"
-        if time_since_last:
-            stats_text += f"\nLast Report: `{time_since_last}`"
-        if most_common_reason:
-            stats_text += f"\nMost Common Reason: `{most_common_reason}`"
-        
-        embed.add_field(
-            name="📊 Report Statistics",
-            value=stats_text,
-            inline=False
+    
+    try:
+        items = await request.json()
+    except Exception:
+        items = None
+    if isinstance(items, dict):
+        items = items.get('reports')
+    if not isinstance(items, list) or not items:
+        return web.json_response(
+            {"status": "error", "message": "Expected a non-empty array of reports"},
+            status=400
         )
-        
-        embed.add_field(
-            name="🌐 Server Information",
-            value=f"Job ID: `{server_id}`\nPlace ID: `{place_id}`",
-            inline=False
+    
+    # A batch larger than the limiter's burst could never be admitted.
+    max_batch = min(config.REPORT_BATCH_MAX, rate_limiter.limit)
+    if len(items) > max_batch:
+        return web.json_response(
+            {"status": "error", "message": f"Batch too large (max {max_batch} reports)"},
+            status=413
         )
-        
-        embed.set_thumbnail(url=reported_thumbnail)
-        embed.set_image(url=reporter_thumbnail)
-        
-        total_reports = await database.get_report_stats()
-        embed.set_footer(text=f"Reported by {reporter_name} • Report #{report_id} • Total: {total_reports['total_reports']}")
-        
-        channel = bot.get_channel(CHANNEL_ID)
-        if channel:
+    
+    # Every report costs the same as a /report request; the first was
+    # charged before authenticating.
+    if len(items) > 1:
+        allowed, retry_after = check_rate_limit(limit_key, cost=len(items) - 1)
+        if not allowed:
+            return rate_limited_response(limit_key, retry_after)
+    
+    try:
+        results = []
+        records = []
+        for index, data in enumerate(items):
+            is_valid, error_msg = validate_report_data(data)
+            if is_valid:
+                records.append((index, build_report_record(data)))
+                results.append(None)
+            else:
+                results.append({"index": index, "status": "error", "message": error_msg})
+        
+        stored = []
+        if records:
             try:
-                await channel.send(embed=embed)
-                log.info(f"Report #{report_id} sent to Discord channel")
-            except discord.errors.HTTPException as e:
-                log.error(f"Failed to send embed to Discord: {e}")
-                return web.json_response(
-                    {"status": "error", "message": "Failed to send to Discord"},
-                    status=500
-                )
+                report_ids = await database.add_reports([record for _, record in records])
+                stored = [(index, record, report_id) for (index, record), report_id in zip(records, report_ids)]
+            except Exception as e:
+                # Store the reports one by one so one bad report or a
+                # transient error does not cost the rest of the batch.
+                log.error(f"Error storing batch from IP {client_ip}, retrying its reports one by one: {e}")
+                for index, record in records:
+                    try:
+                        stored.append((index, record, (await database.add_reports([record]))[0]))
+                    except Exception as e:
+                        log.error(f"Error storing report {index} of batch from IP {client_ip}: {e}")
+                        results[index] = {"index": index, "status": "error", "message": "Internal server error", "retry": True}
+        
+        for index, _, report_id in stored:
+            results[index] = {"index": index, "status": "accepted", "report_id": report_id}
+        if stored:
+            dispatcher.notify(len(stored))
+            dashboard_snapshot.invalidate()
+            dashboard_feed.reports_added([feed_report(report_id, record) for _, record, report_id in stored])
+        
+        rejected = len(items) - len(stored)
+        if rejected:
+            log.warning(f"Rejected {rejected} of {len(items)} batched report(s) from IP {client_ip}")
+        if stored:
+            log.info(f"Batch of {len(stored)} report(s) received from IP {client_ip}: {', '.join(f'#{report_id}' for _, _, report_id in stored)}")
+        
+        if stored:
+            status = 202
+        elif len(records) > len(stored):
+            # Nothing could be stored, so the whole batch can be sent again.
+            status = 500
         else:
-            log.error(f"Channel {CHANNEL_ID} not found!")
-            return web.json_response(
-                {"status": "error", "message": "Discord channel not found"},
-                status=500
-            )
-        
-        return web.json_response({"status": "success", "report_id": report_id})
+            status = 400
+        return web.json_response({
+            "status": "accepted" if stored else "error",
+            "accepted": len(stored),
+            "rejected": rejected,
+            "results": results
+        }, status=status)
     
     except Exception as e:
-        log.error(f"Error handling report from IP {client_ip}: {e}", exc_info=True)
+        log.error(f"Error handling report batch from IP {client_ip}: {e}", exc_info=True)
         return web.json_response(
             {"status": "error", "message": "Internal server error"},
             status=500
@@ -224,41 +322,119 @@ async def is_admin(user_id: int) -> bool:
         return True
     return await database.is_admin(user_id)
 
+REPORTS_PAGE_SIZE = 5
+RECENT_PAGE_MAX = 20
+SEARCH_PAGE_SIZE = 10
+
+def user_reports_embed(user_id: int, total: int, page: Dict, number: int, archived: bool = False) -> discord.Embed:
+    embed = discord.Embed(
+        title=f"📋 {'Archived Reports' if archived else 'Reports'} for User {user_id}",
+        color=discord.Color.blue(),
+        timestamp=discord.utils.utcnow()
+    )
+    
+    report_text = ""
+    start = (number - 1) * REPORTS_PAGE_SIZE
+    for i, report in enumerate(page['reports'], start + 1):
+        timestamp_str = datetime.fromtimestamp(report['timestamp']).strftime('%Y-%m-%d %H:%M')
+        report_text += f"**{i}.** {report['abuse_type']} - {timestamp_str}\n"
+        if report['additional_info']:
+            info_preview = report['additional_info'][:50]
+            report_text += f"   *{info_preview}...*\n"
+    
+    embed.add_field(name="Reports", value=report_text[:1024] or "None", inline=False)
+    embed.set_footer(text=f"Page {number} • Total: {total} reports")
+    return embed
+
+def user_reports_source(user_id: int, archived: bool):
+    """The page fetcher and count function for a player's live or archived reports."""
+    if archived:
+        return (functools.partial(database.get_archived_reports_page, user_id, REPORTS_PAGE_SIZE),
+                database.count_archived_reports_for_user)
+    return (functools.partial(database.get_reports_by_user_page, user_id, REPORTS_PAGE_SIZE),
+            database.count_reports_for_user)
+
+async def no_reports_message(user_id: int, archived: bool, archive_hint: str) -> str:
+    if archived:
+        return f"📋 No archived reports found for user ID: `{user_id}`"
+    message = f"📋 No reports found for user ID: `{user_id}`"
+    count = await database.count_archived_reports_for_user(user_id)
+    if count:
+        message += f" ({count} older report(s) archived, use {archive_hint})"
+    return message
+
+def recent_reports_embed(page_size: int, page: Dict, number: int) -> discord.Embed:
+    embed = discord.Embed(
+        title="📋 Recent Reports",
+        color=discord.Color.orange(),
+        timestamp=discord.utils.utcnow()
+    )
+    
+    report_text = ""
+    start = (number - 1) * page_size
+    for i, report in enumerate(page['reports'], start + 1):
+        timestamp_str = datetime.fromtimestamp(report['timestamp']).strftime('%m-%d %H:%M')
+        report_text += f"**{i}.** User `{report['reported_id']}` - {report['abuse_type']} - {timestamp_str}\n"
+    
+    embed.add_field(name="Reports", value=report_text[:1024] or "None", inline=False)
+    embed.set_footer(text=f"Page {number}")
+    return embed
+
+def search_results_embed(search_term: str, page: Dict, number: int) -> discord.Embed:
+    embed = discord.Embed(
+        title=f"🔍 Search Results for: {search_term}",
+        color=discord.Color.purple(),
+        timestamp=discord.utils.utcnow()
+    )
+    
+    report_text = ""
+    start = (number - 1) * SEARCH_PAGE_SIZE
+    for i, report in enumerate(page['reports'], start + 1):
+        timestamp_str = datetime.fromtimestamp(report['timestamp']).strftime('%m-%d %H:%M')
+        report_text += f"**{i}.** User `{report['reported_id']}` - {report['abuse_type']} - {timestamp_str}\n"
+        if report.get('snippet'):
+            report_text += f"> {' '.join(report['snippet'].split())[:150]}\n"
+    
+    embed.add_field(name="Results", value=report_text[:1024] or "None", inline=False)
+    embed.set_footer(text=f"Page {number}")
+    return embed
+
+async def send_report_pages(target, owner_id: int, fetch, render, first_page: Dict):
+    embed = render(first_page, 1)
+    if not first_page['has_more']:
+        if isinstance(target, discord.Interaction):
+            await target.response.send_message(embed=embed)
+        else:
+            await target.send(embed=embed)
+        return
+    
+    view = ReportPager(owner_id, fetch, render, first_page)
+    if isinstance(target, discord.Interaction):
+        await target.response.send_message(embed=embed, view=view)
+        view.message = await target.original_response()
+    else:
+        view.message = await target.send(embed=embed, view=view)
+
 @bot.tree.command(name="reports", description="View reports for a specific user")
-@app_commands.describe(user_id="The Roblox user ID to check reports for")
-async def reports_slash(interaction: discord.Interaction, user_id: int):
+@app_commands.describe(user_id="The Roblox user ID to check reports for",
+                       archive="Show reports older than the retention period, read from the archive")
+async def reports_slash(interaction: discord.Interaction, user_id: int, archive: bool = False):
     if not await is_admin(interaction.user.id):
         await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
         return
     
     try:
-        reports = await database.get_reports_by_user(user_id, limit=10)
+        fetch, count = user_reports_source(user_id, archive)
+        page = await fetch()
         
-        if not reports:
-            await interaction.response.send_message(f"📋 No reports found for user ID: `{user_id}`", ephemeral=True)
+        if not page['reports']:
+            message = await no_reports_message(user_id, archive, "`archive: True`")
+            await interaction.response.send_message(message, ephemeral=True)
             return
         
-        embed = discord.Embed(
-            title=f"📋 Reports for User {user_id}",
-            color=discord.Color.blue(),
-            timestamp=discord.utils.utcnow()
-        )
-        
-        report_text = ""
-        for i, report in enumerate(reports[:5], 1):
-            timestamp_str = datetime.fromtimestamp(report['timestamp']).strftime('%Y-%m-%d %H:%M')
-            report_text += f"**{i}.** {report['abuse_type']} - {timestamp_str}\n"
-            if report['additional_info']:
-                info_preview = report['additional_info'][:50]
-                report_text += f"   *{info_preview}...*\n"
-        
-        if len(reports) > 5:
-            report_text += f"\n*... and {len(reports) - 5} more*"
-        
-        embed.add_field(name="Recent Reports", value=report_text or "None", inline=False)
-        embed.set_footer(text=f"Total: {len(reports)} reports")
-        
-        await interaction.response.send_message(embed=embed)
+        total = await count(user_id)
+        render = functools.partial(user_reports_embed, user_id, total, archived=archive)
+        await send_report_pages(interaction, interaction.user.id, fetch, render, page)
         log.info(f"Admin {interaction.user.id} queried reports for user {user_id}")
     
     except Exception as e:
@@ -266,43 +442,27 @@ async def reports_slash(interaction: discord.Interaction, user_id: int):
         await interaction.response.send_message("❌ An error occurred while fetching reports.", ephemeral=True)
 
 @bot.command(name='reports')
-async def reports_command(ctx, user_id: int = None):
+async def reports_command(ctx, user_id: int = None, scope: str = ""):
     if not await is_admin(ctx.author.id):
         await ctx.send("❌ You don't have permission to use this command.")
         return
     
-    if not user_id:
-        await ctx.send("❌ Usage: `!reports <user_id>`")
+    if not user_id or scope.lower() not in ("", "archive"):
+        await ctx.send("❌ Usage: `!reports <user_id> [archive]`")
         return
     
     try:
-        reports = await database.get_reports_by_user(user_id, limit=10)
+        archive = scope.lower() == "archive"
+        fetch, count = user_reports_source(user_id, archive)
+        page = await fetch()
         
-        if not reports:
-            await ctx.send(f"📋 No reports found for user ID: `{user_id}`")
+        if not page['reports']:
+            await ctx.send(await no_reports_message(user_id, archive, f"`!reports {user_id} archive`"))
             return
         
-        embed = discord.Embed(
-            title=f"📋 Reports for User {user_id}",
-            color=discord.Color.blue(),
-            timestamp=discord.utils.utcnow()
-        )
-        
-        report_text = ""
-        for i, report in enumerate(reports[:5], 1):
-            timestamp_str = datetime.fromtimestamp(report['timestamp']).strftime('%Y-%m-%d %H:%M')
-            report_text += f"**{i}.** {report['abuse_type']} - {timestamp_str}\n"
-            if report['additional_info']:
-                info_preview = report['additional_info'][:50]
-                report_text += f"   *{info_preview}...*\n"
-        
-        if len(reports) > 5:
-            report_text += f"\n*... and {len(reports) - 5} more*"
-        
-        embed.add_field(name="Recent Reports", value=report_text or "None", inline=False)
-        embed.set_footer(text=f"Total: {len(reports)} reports")
-        
-        await ctx.send(embed=embed)
+        total = await count(user_id)
+        render = functools.partial(user_reports_embed, user_id, total, archived=archive)
+        await send_report_pages(ctx, ctx.author.id, fetch, render, page)
         log.info(f"Admin {ctx.author.id} queried reports for user {user_id}")
     
     except ValueError:
@@ -312,13 +472,14 @@ async def reports_command(ctx, user_id: int = None):
         await ctx.send("❌ An error occurred while fetching reports.")
 
 @bot.tree.command(name="stats", description="View report statistics")
-async def stats_slash(interaction: discord.Interaction):
+@app_commands.describe(exact="Count unique users exactly instead of estimating (slower)")
+async def stats_slash(interaction: discord.Interaction, exact: bool = False):
     if not await is_admin(interaction.user.id):
         await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
         return
     
     try:
-        stats = await database.get_report_stats()
+        stats = await database.get_report_stats(exact=exact)
         
         embed = discord.Embed(
             title="📊 Report Statistics",
@@ -329,7 +490,10 @@ async def stats_slash(interaction: discord.Interaction):
         embed.add_field(name="Total Reports", value=f"`{stats['total_reports']}`", inline=True)
         embed.add_field(name="Today's Reports", value=f"`{stats['today_reports']}`", inline=True)
         embed.add_field(name="Unique Reported Users", value=f"`{stats['unique_reported']}`", inline=True)
+        embed.add_field(name="Unique Reporters", value=f"`{stats['unique_reporters']}`", inline=True)
         embed.add_field(name="Most Common Abuse Type", value=f"`{stats['top_abuse_type']}`", inline=False)
+        if not exact:
+            embed.set_footer(text="Unique counts are estimates; use /stats exact:True for exact figures")
         
         await interaction.response.send_message(embed=embed)
         log.info(f"Admin {interaction.user.id} queried statistics")
@@ -339,13 +503,14 @@ async def stats_slash(interaction: discord.Interaction):
         await interaction.response.send_message("❌ An error occurred while fetching statistics.", ephemeral=True)
 
 @bot.command(name='stats')
-async def stats_command(ctx):
+async def stats_command(ctx, mode: str = ""):
     if not await is_admin(ctx.author.id):
         await ctx.send("❌ You don't have permission to use this command.")
         return
     
     try:
-        stats = await database.get_report_stats()
+        exact = mode.lower() == "exact"
+        stats = await database.get_report_stats(exact=exact)
         
         embed = discord.Embed(
             title="📊 Report Statistics",
@@ -356,7 +521,10 @@ async def stats_command(ctx):
         embed.add_field(name="Total Reports", value=f"`{stats['total_reports']}`", inline=True)
         embed.add_field(name="Today's Reports", value=f"`{stats['today_reports']}`", inline=True)
         embed.add_field(name="Unique Reported Users", value=f"`{stats['unique_reported']}`", inline=True)
+        embed.add_field(name="Unique Reporters", value=f"`{stats['unique_reporters']}`", inline=True)
         embed.add_field(name="Most Common Abuse Type", value=f"`{stats['top_abuse_type']}`", inline=False)
+        if not exact:
+            embed.set_footer(text="Unique counts are estimates; use !stats exact for exact figures")
         
         await ctx.send(embed=embed)
         log.info(f"Admin {ctx.author.id} queried statistics")
@@ -366,37 +534,26 @@ async def stats_command(ctx):
         await ctx.send("❌ An error occurred while fetching statistics.")
 
 @bot.tree.command(name="recent", description="View recent reports")
-@app_commands.describe(count="Number of reports to show (1-20)")
+@app_commands.describe(count="Number of reports per page (1-20)")
 async def recent_slash(interaction: discord.Interaction, count: int = 10):
     if not await is_admin(interaction.user.id):
         await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
         return
     
-    if count < 1 or count > 20:
-        await interaction.response.send_message("❌ Count must be between 1 and 20.", ephemeral=True)
+    if count < 1 or count > RECENT_PAGE_MAX:
+        await interaction.response.send_message(f"❌ Count must be between 1 and {RECENT_PAGE_MAX}.", ephemeral=True)
         return
     
     try:
-        reports = await database.get_recent_reports(limit=count)
+        fetch = functools.partial(database.get_recent_reports_page, count)
+        page = await fetch()
         
-        if not reports:
+        if not page['reports']:
             await interaction.response.send_message("📋 No reports found.", ephemeral=True)
             return
         
-        embed = discord.Embed(
-            title=f"📋 Recent Reports ({len(reports)})",
-            color=discord.Color.orange(),
-            timestamp=discord.utils.utcnow()
-        )
-        
-        report_text = ""
-        for i, report in enumerate(reports, 1):
-            timestamp_str = datetime.fromtimestamp(report['timestamp']).strftime('%m-%d %H:%M')
-            report_text += f"**{i}.** User `{report['reported_id']}` - {report['abuse_type']} - {timestamp_str}\n"
-        
-        embed.add_field(name="Reports", value=report_text[:1024] or "None", inline=False)
-        
-        await interaction.response.send_message(embed=embed)
+        render = functools.partial(recent_reports_embed, count)
+        await send_report_pages(interaction, interaction.user.id, fetch, render, page)
         log.info(f"Admin {interaction.user.id} queried recent {count} reports")
     
     except Exception as e:
@@ -409,31 +566,20 @@ async def recent_command(ctx, count: int = 10):
         await ctx.send("❌ You don't have permission to use this command.")
         return
     
-    if count < 1 or count > 20:
-        await ctx.send("❌ Count must be between 1 and 20.")
+    if count < 1 or count > RECENT_PAGE_MAX:
+        await ctx.send(f"❌ Count must be between 1 and {RECENT_PAGE_MAX}.")
         return
     
     try:
-        reports = await database.get_recent_reports(limit=count)
+        fetch = functools.partial(database.get_recent_reports_page, count)
+        page = await fetch()
         
-        if not reports:
+        if not page['reports']:
             await ctx.send("📋 No reports found.")
             return
         
-        embed = discord.Embed(
-            title=f"📋 Recent Reports ({len(reports)})",
-            color=discord.Color.orange(),
-            timestamp=discord.utils.utcnow()
-        )
-        
-        report_text = ""
-        for i, report in enumerate(reports, 1):
-            timestamp_str = datetime.fromtimestamp(report['timestamp']).strftime('%m-%d %H:%M')
-            report_text += f"**{i}.** User `{report['reported_id']}` - {report['abuse_type']} - {timestamp_str}\n"
-        
-        embed.add_field(name="Reports", value=report_text[:1024] or "None", inline=False)
-        
-        await ctx.send(embed=embed)
+        render = functools.partial(recent_reports_embed, count)
+        await send_report_pages(ctx, ctx.author.id, fetch, render, page)
         log.info(f"Admin {ctx.author.id} queried recent {count} reports")
     
     except ValueError:
@@ -450,27 +596,15 @@ async def search_slash(interaction: discord.Interaction, search_term: str):
         return
     
     try:
-        reports = await database.search_reports(search_term, limit=10)
+        fetch = functools.partial(database.search_reports_page, search_term, SEARCH_PAGE_SIZE)
+        page = await fetch()
         
-        if not reports:
+        if not page['reports']:
             await interaction.response.send_message(f"📋 No reports found matching: `{search_term}`", ephemeral=True)
             return
         
-        embed = discord.Embed(
-            title=f"🔍 Search Results for: {search_term}",
-            color=discord.Color.purple(),
-            timestamp=discord.utils.utcnow()
-        )
-        
-        report_text = ""
-        for i, report in enumerate(reports, 1):
-            timestamp_str = datetime.fromtimestamp(report['timestamp']).strftime('%m-%d %H:%M')
-            report_text += f"**{i}.** User `{report['reported_id']}` - {report['abuse_type']} - {timestamp_str}\n"
-        
-        embed.add_field(name="Results", value=report_text[:1024] or "None", inline=False)
-        embed.set_footer(text=f"Found {len(reports)} results")
-        
-        await interaction.response.send_message(embed=embed)
+        render = functools.partial(search_results_embed, search_term)
+        await send_report_pages(interaction, interaction.user.id, fetch, render, page)
         log.info(f"Admin {interaction.user.id} searched for: {search_term}")
     
     except Exception as e:
@@ -488,27 +622,15 @@ async def search_command(ctx, *, search_term: str = None):
         return
     
     try:
-        reports = await database.search_reports(search_term, limit=10)
+        fetch = functools.partial(database.search_reports_page, search_term, SEARCH_PAGE_SIZE)
+        page = await fetch()
         
-        if not reports:
+        if not page['reports']:
             await ctx.send(f"📋 No reports found matching: `{search_term}`")
             return
         
-        embed = discord.Embed(
-            title=f"🔍 Search Results for: {search_term}",
-            color=discord.Color.purple(),
-            timestamp=discord.utils.utcnow()
-        )
-        
-        report_text = ""
-        for i, report in enumerate(reports, 1):
-            timestamp_str = datetime.fromtimestamp(report['timestamp']).strftime('%m-%d %H:%M')
-            report_text += f"**{i}.** User `{report['reported_id']}` - {report['abuse_type']} - {timestamp_str}\n"
-        
-        embed.add_field(name="Results", value=report_text[:1024] or "None", inline=False)
-        embed.set_footer(text=f"Found {len(reports)} results")
-        
-        await ctx.send(embed=embed)
+        render = functools.partial(search_results_embed, search_term)
+        await send_report_pages(ctx, ctx.author.id, fetch, render, page)
         log.info(f"Admin {ctx.author.id} searched for: {search_term}")
     
     except Exception as e:
@@ -518,10 +640,15 @@ async def search_command(ctx, *, search_term: str = None):
 def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode()).hexdigest()
 
+admin_sessions = SessionManager(
+    config.SESSION_SECRET.encode() if config.SESSION_SECRET else derive_secret(config.DISCORD_BOT_TOKEN, config.ADMIN_PASSWORD),
+    ttl=config.SESSION_TTL
+)
+
 async def check_auth(request: web.Request) -> bool:
     session_token = request.cookies.get('admin_session', '')
     if session_token:
-        return await database.validate_admin_session(session_token)
+        return admin_sessions.verify(session_token)
     return False
 
 @routes.post('/admin/login')
@@ -531,13 +658,10 @@ async def admin_login(request):
         password = data.get('password', '')
         
         if hash_password(password) == hash_password(config.ADMIN_PASSWORD):
-            session_token = secrets.token_urlsafe(32)
-            expires_at = datetime.now() + timedelta(hours=24)
-            
-            await database.create_admin_session(session_token, expires_at)
+            session_token = admin_sessions.issue()
             
             response = web.json_response({"status": "success", "message": "Login successful"})
-            response.set_cookie('admin_session', session_token, max_age=86400, httponly=True, samesite='Lax')
+            response.set_cookie('admin_session', session_token, max_age=admin_sessions.ttl, httponly=True, samesite='Lax')
             return response
         else:
             return web.json_response({"status": "error", "message": "Invalid password"}, status=401)
@@ -547,6 +671,12 @@ async def admin_login(request):
 
 @routes.post('/admin/logout')
 async def admin_logout(request):
+    session_token = request.cookies.get('admin_session', '')
+    if session_token:
+        revoked = admin_sessions.revoke(session_token)
+        if revoked:
+            await database.revoke_admin_session(*revoked)
+    
     response = web.json_response({"status": "success", "message": "Logged out"})
     response.del_cookie('admin_session')
     return response
@@ -609,54 +739,57 @@ async def remove_admin_endpoint(request):
         log.error(f"Error removing admin: {e}", exc_info=True)
         return web.json_response({"status": "error", "message": "Internal server error"}, status=500)
 
-async def fetch_roblox_game_stats(place_id: str) -> Optional[Dict]:
-    if not place_id:
-        return None
+roblox_client = RobloxClient(
+    base_url=config.ROBLOX_GAMES_API,
+    timeout=config.ROBLOX_API_TIMEOUT
+)
+
+async def build_dashboard_data() -> Dict:
+    game_stats = roblox_client.get_game_stats(config.PLACE_ID)
     
-    try:
-        async with ClientSession() as session:
-            place_url = f"https://games.roblox.com/v1/games?placeIds={place_id}"
-            async with session.get(place_url, timeout=10) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('data') and len(data['data']) > 0:
-                        place_data = data['data'][0]
-                        universe_id = place_data.get('universeId')
-                        
-                        if universe_id:
-                            universe_url = f"https://games.roblox.com/v1/games?universeIds={universe_id}"
-                            async with session.get(universe_url, timeout=10) as universe_response:
-                                if universe_response.status == 200:
-                                    universe_data = await universe_response.json()
-                                    if universe_data.get('data') and len(universe_data['data']) > 0:
-                                        universe_info = universe_data['data'][0]
-                                        return {
-                                            "name": universe_info.get('name', 'Unknown'),
-                                            "playing": universe_info.get('playing', 0),
-                                            "visits": universe_info.get('visits', 0),
-                                            "favorites": universe_info.get('favoritedCount', 0),
-                                            "likes": universe_info.get('likes', 0),
-                                            "maxPlayers": universe_info.get('maxPlayers', 0),
-                                            "created": universe_info.get('created', ''),
-                                            "updated": universe_info.get('updated', ''),
-                                            "universeId": universe_id,
-                                            "placeId": place_id
-                                        }
-                        
-                        return {
-                            "name": place_data.get('name', 'Unknown'),
-                            "playing": place_data.get('playing', 0),
-                            "visits": place_data.get('visits', 0),
-                            "favorites": place_data.get('favoritedCount', 0),
-                            "likes": place_data.get('likes', 0),
-                            "maxPlayers": place_data.get('maxPlayers', 0),
-                            "created": place_data.get('created', ''),
-                            "updated": place_data.get('updated', ''),
-                            "placeId": place_id
-                        }
-    except Exception as e:
-        log.error(f"Error fetching Roblox game stats: {e}", exc_info=True)
-        return None
+    report_stats = await database.get_report_stats()
+    most_reported = await database.get_most_reported_players(10)
+    recent_reports = await database.get_recent_reports_detailed(20)
+    abuse_types = await database.get_reports_by_abuse_type()
+    top_reporters = await database.get_top_reporters(10)
+    reports_by_hour = await database.get_reports_by_hour()
+    
+    today_reports = await database.get_reports_today()
+    week_reports = await database.get_reports_this_week()
+    month_reports = await database.get_reports_this_month()
+    
+    return {
+        "status": "success",
+        "game_stats": game_stats,
+        "report_stats": {
+            **report_stats,
+            "today": today_reports,
+            "week": week_reports,
+            "month": month_reports
+        },
+        "most_reported": most_reported,
+        "recent_reports": recent_reports,
+        "abuse_types": abuse_types,
+        "top_reporters": top_reporters,
+        "reports_by_hour": reports_by_hour
+    }
+
+dashboard_snapshot = SnapshotCache(
+    build_dashboard_data,
+    ttl=config.DASHBOARD_CACHE_TTL,
+    min_age=config.DASHBOARD_CACHE_MIN_AGE
+)
+
+dashboard_broadcaster = Broadcaster(config.DASHBOARD_STREAM_QUEUE)
+dashboard_feed = DashboardFeed(dashboard_snapshot, dashboard_broadcaster, min_interval=config.DASHBOARD_CACHE_MIN_AGE)
+
+metrics.Gauge("dashboard_stream_clients", "Dashboards connected to /api/dashboard/stream").set_function(lambda: dashboard_broadcaster.stats()["subscribers"])
+metrics.Counter("dashboard_stream_dropped_total", "Dashboard streams dropped for falling behind").set_function(lambda: dashboard_broadcaster.stats()["dropped"])
+
+def feed_report(report_id: int, record: Dict) -> Dict:
+    """A stored report in the shape of the dashboard's recent_reports rows."""
+    report = {key: value for key, value in record.items() if key != 'outbox_payload'}
+    return {"id": report_id, **report}
 
 @routes.get('/api/dashboard')
 async def dashboard_data(request):
@@ -664,38 +797,124 @@ async def dashboard_data(request):
         return web.json_response({"status": "error", "message": "Unauthorized"}, status=401)
     
     try:
-        game_stats = await fetch_roblox_game_stats(config.PLACE_ID)
-        
-        report_stats = await database.get_report_stats()
-        most_reported = await database.get_most_reported_players(10)
-        recent_reports = await database.get_recent_reports_detailed(20)
-        abuse_types = await database.get_reports_by_abuse_type()
-        top_reporters = await database.get_top_reporters(10)
-        reports_by_hour = await database.get_reports_by_hour()
-        
-        today_reports = await database.get_reports_today()
-        week_reports = await database.get_reports_this_week()
-        month_reports = await database.get_reports_this_month()
+        body, etag = await dashboard_snapshot.get()
+        headers = {"Cache-Control": "private, no-cache"}
         
-        return web.json_response({
-            "status": "success",
-            "game_stats": game_stats,
-            "report_stats": {
-                **report_stats,
-                "today": today_reports,
-                "week": week_reports,
-                "month": month_reports
-            },
-            "most_reported": most_reported,
-            "recent_reports": recent_reports,
-            "abuse_types": abuse_types,
-            "top_reporters": top_reporters,
-            "reports_by_hour": reports_by_hour
-        })
+        if any(tag.value == etag or tag.value == "*" for tag in request.if_none_match or ()):
+            response = web.Response(status=304, headers=headers)
+        else:
+            response = web.Response(body=body, content_type='application/json', headers=headers)
+        response.etag = etag
+        return response
     except Exception as e:
         log.error(f"Error getting dashboard data: {e}", exc_info=True)
         return web.json_response({"status": "error", "message": "Internal server error"}, status=500)
 
+@routes.get('/api/dashboard/stream')
+async def dashboard_stream(request):
+    if not await check_auth(request):
+        return web.json_response({"status": "error", "message": "Unauthorized"}, status=401)
+    
+    try:
+        return await dashboard_feed.stream(request)
+    except Exception as e:
+        log.error(f"Error streaming dashboard updates: {e}", exc_info=True)
+        raise
+
+LEADERBOARD_WINDOWS = {
+    "all": None,
+    "24h": 86400,
+    "7d": 86400 * 7,
+    "30d": 86400 * 30
+}
+
+@routes.get('/api/leaderboard')
+async def leaderboard(request):
+    if not await check_auth(request):
+        return web.json_response({"status": "error", "message": "Unauthorized"}, status=401)
+    
+    kind = request.query.get('kind', 'players')
+    window = request.query.get('window', 'all')
+    if kind not in ('players', 'reporters'):
+        return web.json_response({"status": "error", "message": "kind must be players or reporters"}, status=400)
+    if window not in LEADERBOARD_WINDOWS:
+        return web.json_response({"status": "error", "message": f"window must be one of {', '.join(LEADERBOARD_WINDOWS)}"}, status=400)
+    try:
+        limit = min(max(int(request.query.get('limit', '10')), 1), 100)
+    except ValueError:
+        return web.json_response({"status": "error", "message": "limit must be an integer"}, status=400)
+    
+    try:
+        if kind == 'players':
+            entries = await database.get_most_reported_players(limit, LEADERBOARD_WINDOWS[window])
+        else:
+            entries = await database.get_top_reporters(limit, LEADERBOARD_WINDOWS[window])
+        return web.json_response({"status": "success", "kind": kind, "window": window, "leaderboard": entries})
+    except Exception as e:
+        log.error(f"Error getting leaderboard: {e}", exc_info=True)
+        return web.json_response({"status": "error", "message": "Internal server error"}, status=500)
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+@routes.get('/api/reports/export')
+async def export_reports(request):
+    if not await check_auth(request):
+        return web.json_response({"status": "error", "message": "Unauthorized"}, status=401)
+    
+    export_format = request.query.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return web.json_response({"status": "error", "message": "format must be ndjson or csv"}, status=400)
+    
+    filters = {}
+    try:
+        for name in ('since', 'until', 'reported_id', 'reporter_id', 'place_id'):
+            if request.query.get(name):
+                filters[name] = int(request.query[name])
+    except ValueError:
+        return web.json_response({"status": "error", "message": f"{name} must be an integer"}, status=400)
+    if request.query.get('abuse_type'):
+        filters['abuse_type'] = request.query['abuse_type']
+    
+    response = web.StreamResponse(headers={
+        "Content-Type": f"{EXPORT_FORMATS[export_format]}; charset=utf-8",
+        "Content-Disposition": f'attachment; filename="reports-{int(time.time())}.{export_format}"',
+        "Cache-Control": "no-store"
+    })
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    
+    exported = 0
+    try:
+        if export_format == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(database.REPORT_COLUMNS)
+            await response.write(buffer.getvalue().encode('utf-8'))
+        
+        async for rows in database.iter_reports(**filters):
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([row[column] for column in database.REPORT_COLUMNS] for row in rows)
+                chunk = buffer.getvalue()
+            else:
+                chunk = "".join(json.dumps(row, default=str) + "\n" for row in rows)
+            await response.write(chunk.encode('utf-8'))
+            exported += len(rows)
+        
+        await response.write_eof()
+    except ConnectionResetError:
+        log.info(f"Report export cancelled by client after {exported} row(s)")
+        return response
+    except Exception as e:
+        log.error(f"Error exporting reports after {exported} row(s): {e}", exc_info=True)
+        raise
+    
+    log.info(f"Exported {exported} report(s) as {export_format} with filters {filters}")
+    return response
+
 @routes.get('/admin')
 async def admin_panel(request):
     import os
@@ -749,10 +968,58 @@ async def cleanup_sessions_task():
         try:
             await asyncio.sleep(3600)
             await database.cleanup_expired_sessions()
+            admin_sessions.load_revoked(await database.get_revoked_sessions())
             log.debug("Cleaned up expired admin sessions")
         except Exception as e:
             log.error(f"Error cleaning up sessions: {e}", exc_info=True)
 
+async def prune_leaderboards_task():
+    while True:
+        try:
+            await asyncio.sleep(3600)
+            await database.prune_leaderboard_days()
+            log.debug("Pruned expired daily leaderboard counts")
+        except Exception as e:
+            log.error(f"Error pruning leaderboard counts: {e}", exc_info=True)
+
+async def archive_reports_task():
+    while True:
+        try:
+            await asyncio.sleep(config.ARCHIVE_INTERVAL)
+            archived = await database.archive_reports(config.RETENTION_DAYS)
+            if archived:
+                freed = await database.compact_database()
+                log.info(f"Archived {archived} report(s) past the retention period, freed {freed} bytes")
+        except Exception as e:
+            log.error(f"Error archiving reports: {e}", exc_info=True)
+
+async def dashboard_feed_task():
+    while True:
+        try:
+            await asyncio.sleep(config.DASHBOARD_CACHE_TTL)
+            await dashboard_feed.refresh()
+        except Exception as e:
+            log.error(f"Error refreshing the dashboard feed: {e}", exc_info=True)
+
+async def sweep_rate_limits_task():
+    while True:
+        try:
+            await asyncio.sleep(config.RATE_LIMIT_WINDOW)
+            swept = rate_limiter.sweep()
+            if swept:
+                log.debug(f"Dropped {swept} idle rate limit key(s)")
+        except Exception as e:
+            log.error(f"Error sweeping rate limits: {e}", exc_info=True)
+
+async def sync_admins_task():
+    while True:
+        try:
+            await asyncio.sleep(config.ADMIN_SYNC_INTERVAL)
+            if await database.sync_admins():
+                log.info("Reloaded admin list after a change from another instance")
+        except Exception as e:
+            log.error(f"Error syncing admins: {e}", exc_info=True)
+
 async def main():
     try:
         await database.init_database()
@@ -761,12 +1028,27 @@ async def main():
         await database.migrate_json_to_db()
         log.info("JSON migration completed (if applicable)")
         
+        await database.warm_player_index()
+        log.info(f"Player index warmed: {database.get_player_index_stats()}")
+        
         if config.ADMIN_USER_IDS:
             for user_id in config.ADMIN_USER_IDS:
                 await database.add_admin(user_id)
             log.info(f"Migrated {len(config.ADMIN_USER_IDS)} admin(s) from config to database")
         
+        await database.load_admins()
+        
+        admin_sessions.load_revoked(await database.get_revoked_sessions())
         asyncio.create_task(cleanup_sessions_task())
+        if config.RETENTION_DAYS > 0:
+            asyncio.create_task(archive_reports_task())
+        asyncio.create_task(sweep_rate_limits_task())
+        asyncio.create_task(prune_leaderboards_task())
+        asyncio.create_task(sync_admins_task())
+        asyncio.create_task(dashboard_feed_task())
+        asyncio.create_task(metrics.monitor_event_loop())
+        dispatcher.start_dispatchers(bot)
+        roblox_client.start_refresh(config.PLACE_ID, config.ROBLOX_REFRESH_INTERVAL)
         
         await start_web_server()
         
@@ -775,6 +1057,13 @@ async def main():
     except Exception as e:
         log.critical(f"Fatal error during startup: {e}", exc_info=True)
         raise
+    
+    finally:
+        await dispatcher.stop_dispatchers()
+        await dashboard_feed.close()
+        await roblox_client.close()
+        await database.close_database()
+        log.info("Database connections closed")
 
 if __name__ == "__main__":
     try:
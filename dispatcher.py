@@ -0,0 +1,265 @@
+import discord
+import aiohttp
+import asyncio
+import time
+import functools
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import database
+import logger
+import metrics
+import config
+
+log = logger.setup_logger("dispatcher")
+
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+_wakeup: Optional[asyncio.Event] = None
+_tasks: List[asyncio.Task] = []
+_arrivals = deque(maxlen=1000)
+
+stats = {
+    "delivered": 0,
+    "retried": 0,
+    "failed": 0,
+    "messages_sent": 0,
+    "messages_saved": 0
+}
+
+DISCORD_SEND_SECONDS = metrics.Histogram("discord_send_duration_seconds",
+                                         "Time to post one report message, including discord.py's rate limit waits")
+DISCORD_SEND_FAILURES = metrics.Counter("discord_send_failures_total", "Report messages Discord did not accept")
+DISCORD_API_REQUESTS = metrics.Counter("discord_api_requests_total", "Discord API HTTP requests, by method and status",
+                                       ["method", "status"])
+DISCORD_API_SECONDS = metrics.Histogram("discord_api_request_duration_seconds", "Discord API HTTP request latency")
+DISCORD_RATE_LIMITED = metrics.Counter("discord_rate_limited_total", "Discord API responses with status 429")
+
+for name in ("delivered", "retried", "failed"):
+    metrics.Counter(f"reports_{name}_total", f"Reports {name} by the dispatcher").set_function(functools.partial(stats.get, name))
+
+def http_trace() -> aiohttp.TraceConfig:
+    """aiohttp tracing for the bot's Discord HTTP client; discord.py retries 429s internally, so they are only visible here."""
+    trace = aiohttp.TraceConfig()
+    
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+    
+    async def on_request_end(session, context, params):
+        status = params.response.status
+        DISCORD_API_REQUESTS.labels(params.method, status).inc()
+        DISCORD_API_SECONDS.observe(time.perf_counter() - context.started)
+        if status == 429:
+            DISCORD_RATE_LIMITED.inc()
+    
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+def build_report_embed(report: Dict, payload: Dict, context: Dict) -> discord.Embed:
+    reporter = payload.get('reporter', {})
+    reported = payload.get('reported', {})
+    
+    abuse_type = report['abuse_type']
+    additional_info = report['additional_info']
+    
+    reporter_name = reporter.get('name', 'Unknown')
+    reporter_id = report['reporter_id']
+    reporter_thumbnail = reporter.get('thumbnail', '')
+    reporter_profile = reporter.get('profileUrl', '')
+    
+    reported_name = reported.get('name', 'Unknown')
+    reported_id = report['reported_id']
+    reported_thumbnail = reported.get('thumbnail', '')
+    reported_profile = reported.get('profileUrl', '')
+    
+    server_id = report['server_id']
+    place_id = report['place_id']
+    received_at = payload.get('received_at')
+    
+    embed = discord.Embed(
+        title="🚨 Player Report",
+        color=discord.Color.red(),
+        timestamp=datetime.fromtimestamp(received_at, tz=timezone.utc) if received_at else discord.utils.utcnow()
+    )
+    
+    embed.add_field(
+        name="📋 Abuse Type",
+        value=f"**{abuse_type}**",
+        inline=False
+    )
+    
+    if additional_info and additional_info.strip():
+        embed.add_field(
+            name="📝 Additional Information",
+            value=additional_info[:1024],
+            inline=False
+        )
+    
+    embed.add_field(
+        name="👤 Reporter",
+        value=f"[{reporter_name}]({reporter_profile})\nID: `{reporter_id}`\nTotal Reports Made: `{context['reporter_history']}`",
+        inline=True
+    )
+    
+    embed.add_field(
+        name="🎯 Reported Player",
+        value=f"[{reported_name}]({reported_profile})\nID: `{reported_id}`",
+        inline=True
+    )
+    
+    stats_text = f"Last 24 Hours: `{context['reports_24h']}`\nLast Month: `{context['reports_month']}`"
+    if context['time_since_last']:
+        stats_text += f"\nLast Report: `{context['time_since_last']}`"
+    if context['most_common_reason']:
+        stats_text += f"\nMost Common Reason: `{context['most_common_reason']}`"
+    
+    embed.add_field(
+        name="📊 Report Statistics",
+        value=stats_text,
+        inline=False
+    )
+    
+    embed.add_field(
+        name="🌐 Server Information",
+        value=f"Job ID: `{server_id}`\nPlace ID: `{place_id}`",
+        inline=False
+    )
+    
+    embed.set_thumbnail(url=reported_thumbnail)
+    embed.set_image(url=reporter_thumbnail)
+    
+    embed.set_footer(text=f"Reported by {reporter_name} • Report #{report['id']} • Total: {context['total_reports']}")
+    
+    return embed
+
+def notify(count: int = 1):
+    _arrivals.extend([time.monotonic()] * count)
+    if _wakeup is not None:
+        _wakeup.set()
+
+def _is_bursting() -> bool:
+    cutoff = time.monotonic() - 1
+    while _arrivals and _arrivals[0] < cutoff:
+        _arrivals.popleft()
+    return len(_arrivals) > config.COALESCE_THRESHOLD
+
+def _pack_messages(entries: List[tuple]) -> List[List[tuple]]:
+    messages = []
+    current = []
+    current_chars = 0
+    for entry in entries:
+        embed_chars = len(entry[1])
+        if current and (len(current) >= MAX_EMBEDS_PER_MESSAGE or current_chars + embed_chars > MAX_EMBED_CHARS_PER_MESSAGE):
+            messages.append(current)
+            current = []
+            current_chars = 0
+        current.append(entry)
+        current_chars += embed_chars
+    if current:
+        messages.append(current)
+    return messages
+
+def _retry_at(attempts: int, error: Exception) -> Optional[int]:
+    if attempts >= config.OUTBOX_MAX_ATTEMPTS:
+        return None
+    if isinstance(error, discord.HTTPException) and 400 <= error.status < 500 and error.status != 429:
+        return None
+    
+    delay = min(config.OUTBOX_BACKOFF_BASE * (2 ** (attempts - 1)), config.OUTBOX_BACKOFF_MAX)
+    return int(datetime.now().timestamp()) + delay
+
+async def _fail(items: List[Dict], error: Exception):
+    for item in items:
+        report_id = item['report']['id']
+        retry_at = _retry_at(item['attempts'], error)
+        await database.retry_outbox([item['outbox_id']], str(error)[:500], retry_at)
+        if retry_at is None:
+            stats["failed"] += 1
+            log.error(f"Giving up on report #{report_id} after {item['attempts']} attempt(s): {error}")
+        else:
+            stats["retried"] += 1
+            log.warning(f"Failed to send report #{report_id} to Discord, retrying: {error}")
+
+async def _deliver(bot: discord.Client, batch: List[Dict]):
+    orphaned = [item['outbox_id'] for item in batch if item['report'] is None]
+    if orphaned:
+        await database.complete_outbox(orphaned)
+    batch = [item for item in batch if item['report'] is not None]
+    if not batch:
+        return
+    
+    channel = bot.get_channel(config.DISCORD_CHANNEL_ID)
+    if channel is None:
+        await _fail(batch, RuntimeError(f"Channel {config.DISCORD_CHANNEL_ID} not found"))
+        return
+    
+    entries = []
+    for item in batch:
+        report = item['report']
+        try:
+            # As of when the report arrived, not when a delayed delivery gets to it.
+            received_at = item['payload'].get('received_at') or report['timestamp']
+            context = await database.get_report_context(report['reporter_id'], report['reported_id'], report['id'], received_at)
+            entries.append((item, build_report_embed(report, item['payload'], context)))
+        except Exception as e:
+            await _fail([item], e)
+    
+    for message in _pack_messages(entries):
+        items = [item for item, _ in message]
+        started = time.perf_counter()
+        try:
+            await channel.send(embeds=[embed for _, embed in message])
+        except Exception as e:
+            DISCORD_SEND_FAILURES.inc()
+            await _fail(items, e)
+            continue
+        finally:
+            DISCORD_SEND_SECONDS.observe(time.perf_counter() - started)
+        
+        await database.complete_outbox([item['outbox_id'] for item in items])
+        stats["delivered"] += len(items)
+        stats["messages_sent"] += 1
+        stats["messages_saved"] += len(items) - 1
+        report_ids = ", ".join(f"#{item['report']['id']}" for item in items)
+        log.info(f"Report(s) {report_ids} sent to Discord channel")
+
+async def _worker(bot: discord.Client):
+    await bot.wait_until_ready()
+    while True:
+        if config.COALESCE_WINDOW > 0 and _is_bursting():
+            await asyncio.sleep(config.COALESCE_WINDOW)
+        
+        try:
+            batch = await database.claim_outbox(MAX_EMBEDS_PER_MESSAGE, config.OUTBOX_LEASE_SECONDS)
+        except Exception as e:
+            log.error(f"Error claiming outbox entries: {e}", exc_info=True)
+            batch = []
+        
+        if not batch:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=config.OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            _wakeup.clear()
+            continue
+        
+        try:
+            await _deliver(bot, batch)
+        except Exception as e:
+            log.error(f"Error dispatching outbox entries: {e}", exc_info=True)
+
+def start_dispatchers(bot: discord.Client):
+    global _wakeup
+    _wakeup = asyncio.Event()
+    for _ in range(max(1, config.DISPATCH_WORKERS)):
+        _tasks.append(asyncio.create_task(_worker(bot)))
+    log.info(f"Started {len(_tasks)} report dispatcher(s)")
+
+async def stop_dispatchers():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
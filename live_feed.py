@@ -0,0 +1,199 @@
+import asyncio
+import heapq
+import json
+from typing import Dict, List, Optional, Set
+
+from aiohttp import web
+
+from dashboard_cache import SnapshotCache
+import logger
+
+log = logger.setup_logger("live_feed")
+
+# Report ids remembered as published. Reports can be stored out of id order,
+# so the feed tracks ids rather than a high-water mark; ids older than the
+# remembered ones are treated as published.
+PUBLISHED_IDS = 1024
+
+def format_event(event: str, data: Dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode('utf-8')
+
+class Broadcaster:
+    """In-process fan-out of server-sent events with a bounded queue per client.
+    
+    publish() encodes an event once and never waits on a client. A client
+    whose queue is full has fallen behind, so it is dropped rather than
+    buffered for: its queue is replaced by an end-of-stream marker and its
+    browser reconnects to a fresh snapshot.
+    """
+
+    def __init__(self, queue_size: int = 64):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.published = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event: str, data: Dict):
+        if not self._subscribers:
+            return
+        frame = format_event(event, data)
+        self.published += 1
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._drop(queue)
+
+    def _drop(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+        self.dropped += 1
+
+    def stats(self) -> Dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": self.dropped
+        }
+
+class DashboardFeed:
+    """Live dashboard updates over server-sent events.
+    
+    A client first gets the cached dashboard snapshot. New reports are then
+    published from the ingest path as they are stored, and the snapshot's
+    other sections are checked `min_interval` seconds after reports arrive
+    and whenever refresh() is called, since time windows and game stats also
+    change on their own. Only sections that differ from the last published
+    copy are sent.
+    """
+
+    def __init__(self, snapshot: SnapshotCache, broadcaster: Broadcaster, min_interval: float,
+                 keepalive: float = 15, lifetime: float = 3600):
+        self.snapshot = snapshot
+        self.broadcaster = broadcaster
+        self.min_interval = min_interval
+        self.keepalive = keepalive
+        self.lifetime = lifetime
+        self._sections: Dict[str, str] = {}
+        self._published: Set[int] = set()
+        self._published_heap: List[int] = []
+        self._published_floor = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def reports_added(self, reports: List[Dict]):
+        if not self.broadcaster:
+            return
+        self._publish_reports(reports)
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_later())
+            self._refresh_task.add_done_callback(self._refresh_done)
+
+    def _publish_reports(self, reports: List[Dict]):
+        new = []
+        for report in sorted(reports, key=lambda report: report['id']):
+            if report['id'] > self._published_floor and report['id'] not in self._published:
+                self._mark_published(report['id'])
+                new.append(report)
+        if new:
+            self.broadcaster.publish("reports", {"reports": new})
+
+    def _mark_published(self, report_id: int):
+        self._published.add(report_id)
+        heapq.heappush(self._published_heap, report_id)
+        if len(self._published_heap) > PUBLISHED_IDS:
+            self._published_floor = heapq.heappop(self._published_heap)
+            self._published.discard(self._published_floor)
+
+    async def _refresh_later(self):
+        await asyncio.sleep(self.min_interval)
+        await self.refresh()
+
+    def _refresh_done(self, task: asyncio.Task):
+        if task is self._refresh_task:
+            self._refresh_task = None
+        if not task.cancelled() and task.exception() is not None:
+            log.error(f"Error refreshing the dashboard feed: {task.exception()}", exc_info=task.exception())
+
+    async def close(self):
+        """Cancel a pending refresh."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+
+    async def refresh(self):
+        """Publish whatever changed in the snapshot since the last refresh."""
+        if not self.broadcaster:
+            return
+        await self.snapshot.get()
+        data = self.snapshot.data
+        # Reports stored by another instance only show up in the snapshot.
+        self._publish_reports(data.get('recent_reports') or [])
+        changed = {name: value for name, value in data.items() if self._update_section(name, value)}
+        if changed:
+            self.broadcaster.publish("update", changed)
+
+    def _update_section(self, name: str, value) -> bool:
+        if name in ("status", "recent_reports"):
+            return False
+        encoded = json.dumps(value, sort_keys=True, default=str)
+        if self._sections.get(name) == encoded:
+            return False
+        self._sections[name] = encoded
+        return True
+
+    def _set_baseline(self, data: Dict):
+        if self._sections:
+            return
+        for name, value in data.items():
+            self._update_section(name, value)
+        # Reports older than the snapshot's were never going to be sent.
+        recent = [report['id'] for report in data.get('recent_reports') or []]
+        for report_id in recent:
+            self._mark_published(report_id)
+        self._published_floor = max(self._published_floor, min(recent, default=0))
+
+    async def stream(self, request: web.Request) -> web.StreamResponse:
+        # Subscribe before reading the snapshot so nothing published in
+        # between is missed; the page skips reports it already has.
+        queue = self.broadcaster.subscribe()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lifetime
+        response = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no"
+        })
+        try:
+            body, _ = await self.snapshot.get()
+            self._set_baseline(self.snapshot.data)
+            await response.prepare(request)
+            await response.write(b"retry: 5000\nevent: snapshot\ndata: " + body + b"\n\n")
+            
+            # The stream ends after `lifetime` so the reconnect re-checks the session.
+            while loop.time() < deadline:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    frame = b": keepalive\n\n"
+                if frame is None:
+                    break
+                # A client that cannot take a frame within `keepalive` is treated as gone.
+                await asyncio.wait_for(response.write(frame), self.keepalive)
+        except (ConnectionResetError, asyncio.TimeoutError):
+            pass
+        finally:
+            self.broadcaster.unsubscribe(queue)
+        return response
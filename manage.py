@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import os
+import time
+
+import database
+
+async def rebuild_rollups(args):
+    await database.init_database()
+    try:
+        buckets = await database.rebuild_rollups()
+        print(f"Rebuilt report rollups: {buckets} bucket(s)")
+    finally:
+        await database.close_database()
+
+async def rebuild_leaderboards(args):
+    await database.init_database()
+    try:
+        await database.rebuild_leaderboards()
+        print("Rebuilt player and reporter leaderboards")
+    finally:
+        await database.close_database()
+
+async def rebuild_sketches(args):
+    await database.init_database()
+    try:
+        sketches = await database.rebuild_sketches()
+        print(f"Rebuilt distinct-count sketches: {sketches} sketch(es)")
+    finally:
+        await database.close_database()
+
+async def import_json(args):
+    if not os.path.exists(args.path):
+        print(f"{args.path} does not exist")
+        return
+    
+    await database.init_database()
+    try:
+        started = time.monotonic()
+        reported = []
+        
+        def progress(done: int, bytes_read: int, total_bytes: int):
+            reported.append(done)
+            print(f"\r{done} report(s) read, {bytes_read / max(total_bytes, 1):.0%} of the file", end="", flush=True)
+        
+        inserted = await database.import_json_reports(args.path, args.chunk_size, progress)
+        if not reported:
+            print(f"{args.path} has already been imported")
+            return
+        print()
+        print(f"Imported {inserted} report(s) from {args.path} in {time.monotonic() - started:.1f}s")
+    finally:
+        await database.close_database()
+
+async def archive(args):
+    if args.days <= 0:
+        print("Pass the retention period in days or set RETENTION_DAYS")
+        return
+    
+    await database.init_database()
+    try:
+        started = time.monotonic()
+        days = max(args.days, database.ARCHIVE_MIN_DAYS)
+        
+        def progress(done: int):
+            print(f"\r{done} report(s) archived", end="", flush=True)
+        
+        archived = await database.archive_reports(days, args.batch_size, progress)
+        if archived:
+            print()
+        freed = await database.compact_database()
+        print(f"Archived {archived} report(s) older than {days} days in {time.monotonic() - started:.1f}s, freed {freed} bytes")
+        for month in await database.get_archive_stats():
+            print(f"  {month['month']}: {month['reports']} report(s) in {month['chunks']} chunk(s), {month['bytes']} bytes")
+    finally:
+        await database.close_database()
+
+async def compact(args):
+    await database.init_database()
+    try:
+        started = time.monotonic()
+        freed = await database.compact_database(full=True)
+        print(f"Compacted the database in {time.monotonic() - started:.1f}s, freed {freed} bytes")
+    finally:
+        await database.close_database()
+
+COMMANDS = {
+    "rebuild-rollups": (rebuild_rollups, "Regenerate the hourly report rollups from the reports table", []),
+    "rebuild-leaderboards": (rebuild_leaderboards, "Regenerate the player and reporter report counts from the reports table", []),
+    "rebuild-sketches": (rebuild_sketches, "Regenerate the unique reported/reporter sketches from the reports table", []),
+    "import-json": (import_json, "Import a legacy JSON array of reports, resuming an interrupted import", [
+        (("path",), {"nargs": "?", "default": database.REPORTS_FILE,
+                     "help": f"JSON file to import (default: {database.REPORTS_FILE})"}),
+        (("--chunk-size",), {"type": int, "default": database.JSON_IMPORT_CHUNK,
+                             "help": f"Reports inserted per transaction (default: {database.JSON_IMPORT_CHUNK})"}),
+    ]),
+    "archive": (archive, "Move reports older than the retention period into the compressed archive", [
+        (("days",), {"nargs": "?", "type": int, "default": int(os.getenv("RETENTION_DAYS", "0")),
+                     "help": f"Retention period in days, at least {database.ARCHIVE_MIN_DAYS} (default: RETENTION_DAYS)"}),
+        (("--batch-size",), {"type": int, "default": database.ARCHIVE_BATCH,
+                             "help": f"Reports archived per transaction (default: {database.ARCHIVE_BATCH})"}),
+    ]),
+    "compact": (compact, "Rebuild the database file to return free space, switching SQLite to incremental auto-vacuum", []),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance commands for the report database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text, arguments) in COMMANDS.items():
+        command = subparsers.add_parser(name, help=help_text)
+        for flags, options in arguments:
+            command.add_argument(*flags, **options)
+    
+    args = parser.parse_args()
+    asyncio.run(COMMANDS[args.command][0](args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import os
+import bisect
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+PLAYER_INDEX_SIZE = int(os.getenv("PLAYER_INDEX_SIZE", "20000"))
+
+# 30-day window counts, plus a day so statistics as of a report that is
+# delivered late can still be served from the index.
+WINDOW_SECONDS = 86400 * 31
+RECENT_DEPTH = 8
+
+class ReportedEntry:
+    """Rolling report counts for one reported player.
+    
+    The timestamps of the last 31 days of reports are kept sorted in an
+    array, eight bytes a report, so window counts match the SQL counts to
+    the second. The few newest reports by id and by timestamp are kept
+    individually so statistics can be given as of a specific report id.
+    `window_start` is the oldest timestamp the array is complete from.
+    """
+    
+    __slots__ = ("timestamps", "window_start", "reasons", "total", "recent", "latest")
+
+    def __init__(self, window_start: int = 0):
+        self.timestamps = array("q")
+        self.window_start = window_start
+        self.reasons: Dict[str, int] = {}
+        self.total = 0
+        self.recent: List[Tuple[int, int, str]] = []
+        self.latest: List[Tuple[int, int]] = []
+
+    def add(self, report_id: int, timestamp: int, abuse_type: str, now: int):
+        oldest = now - WINDOW_SECONDS
+        self.window_start = max(self.window_start, oldest)
+        if timestamp >= oldest:
+            bisect.insort(self.timestamps, int(timestamp))
+            if self.timestamps[0] < oldest:
+                del self.timestamps[:bisect.bisect_left(self.timestamps, oldest)]
+        self.reasons[abuse_type] = self.reasons.get(abuse_type, 0) + 1
+        self.total += 1
+        bisect.insort(self.recent, (report_id, timestamp, abuse_type))
+        if len(self.recent) > RECENT_DEPTH:
+            del self.recent[0]
+        bisect.insort(self.latest, (timestamp, report_id))
+        if len(self.latest) > RECENT_DEPTH:
+            del self.latest[0]
+
+    def count_since(self, cutoff: int) -> int:
+        return len(self.timestamps) - bisect.bisect_left(self.timestamps, cutoff)
+
+class ReporterEntry:
+    __slots__ = ("total", "recent")
+
+    def __init__(self):
+        self.total = 0
+        self.recent: List[int] = []
+
+    def add(self, report_id: int):
+        self.total += 1
+        bisect.insort(self.recent, report_id)
+        if len(self.recent) > RECENT_DEPTH:
+            del self.recent[0]
+
+class PlayerIndex:
+    """LRU-bounded in-memory index of per-player report statistics.
+    
+    Entries are only ever complete: a player missing from the index is served
+    from SQL and loaded in the background, and reports recorded while a load
+    is in flight are replayed onto the loaded entry.
+    """
+
+    def __init__(self, capacity: int = PLAYER_INDEX_SIZE):
+        self.capacity = capacity
+        self.total_reports: Optional[int] = None
+        self._reported: "OrderedDict[int, ReportedEntry]" = OrderedDict()
+        self._reporters: "OrderedDict[int, ReporterEntry]" = OrderedDict()
+        self._pending: Dict[Tuple[str, int], List[tuple]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def _put(self, entries: OrderedDict, key: int, entry):
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > self.capacity:
+            entries.popitem(last=False)
+
+    def load(self, reported: Dict[int, ReportedEntry], reporters: Dict[int, ReporterEntry], total_reports: int):
+        self._reported.clear()
+        self._reporters.clear()
+        for key, entry in reported.items():
+            self._put(self._reported, key, entry)
+        for key, entry in reporters.items():
+            self._put(self._reporters, key, entry)
+        self.total_reports = total_reports
+
+    def record(self, report_id: int, reporter_id: int, reported_id: int, abuse_type: str, timestamp: int, now: int):
+        if not self.enabled:
+            return
+        if self.total_reports is not None:
+            self.total_reports += 1
+        
+        reported = self._reported.get(reported_id)
+        if reported is not None:
+            reported.add(report_id, timestamp, abuse_type, now)
+            self._reported.move_to_end(reported_id)
+        elif ("reported", reported_id) in self._pending:
+            self._pending[("reported", reported_id)].append((report_id, timestamp, abuse_type))
+        
+        reporter = self._reporters.get(reporter_id)
+        if reporter is not None:
+            reporter.add(report_id)
+            self._reporters.move_to_end(reporter_id)
+        elif ("reporter", reporter_id) in self._pending:
+            self._pending[("reporter", reporter_id)].append((report_id,))
+
+    def has_reported(self, reported_id: int) -> bool:
+        return reported_id in self._reported
+
+    def has_reporter(self, reporter_id: int) -> bool:
+        return reporter_id in self._reporters
+
+    def begin_load(self, kind: str, key: int) -> bool:
+        if (kind, key) in self._pending:
+            return False
+        self._pending[(kind, key)] = []
+        return True
+
+    def abort_load(self, kind: str, key: int):
+        self._pending.pop((kind, key), None)
+
+    def finish_load(self, kind: str, key: int, entry, max_id: int, now: int):
+        for pending in self._pending.pop((kind, key), []):
+            if pending[0] > max_id:
+                if kind == "reported":
+                    entry.add(*pending, now)
+                else:
+                    entry.add(*pending)
+        self._put(self._reported if kind == "reported" else self._reporters, key, entry)
+
+    def context(self, reporter_id: int, reported_id: int, report_id: int, now: int) -> Optional[Dict]:
+        """Embed statistics as of report_id, or None if the index cannot answer exactly."""
+        reported = self._reported.get(reported_id)
+        reporter = self._reporters.get(reporter_id)
+        if reported is None or reporter is None or self.total_reports is None:
+            self.misses += 1
+            return None
+        
+        day_ago = now - 86400
+        month_ago = now - (86400 * 30)
+        if month_ago < reported.window_start:
+            # Statistics as of a time before reports were pruned from the window.
+            self.misses += 1
+            return None
+        
+        later = [r for r in reported.recent if r[0] > report_id]
+        earlier = [timestamp for timestamp, id in reported.latest if id < report_id]
+        current = next((r for r in reported.recent if r[0] == report_id), None)
+        later_reporter = [r for r in reporter.recent if r > report_id]
+        earlier_count = reported.total - len(later) - (1 if current else 0)
+        if (len(later) == len(reported.recent) and reported.total > len(later)) or \
+                (earlier_count > 0 and not earlier) or \
+                (len(later_reporter) == len(reporter.recent) and reporter.total > len(later_reporter)):
+            self.misses += 1
+            return None
+        
+        reasons = dict(reported.reasons)
+        for _, _, abuse_type in later:
+            reasons[abuse_type] -= 1
+        if current is not None:
+            reasons[current[2]] -= 1
+        common = max(reasons.items(), key=lambda item: item[1], default=None)
+        if common is not None and common[1] <= 0:
+            common = None
+        
+        self.hits += 1
+        self._reported.move_to_end(reported_id)
+        self._reporters.move_to_end(reporter_id)
+        return {
+            "reports_24h": reported.count_since(day_ago) - sum(1 for r in later if r[1] >= day_ago),
+            "reports_month": reported.count_since(month_ago) - sum(1 for r in later if r[1] >= month_ago),
+            "reporter_history": reporter.total - len(later_reporter),
+            "last_report_time": max(earlier, default=None),
+            "common_abuse_type": common[0] if common else None,
+            "common_count": common[1] if common else None,
+            "total_reports": self.total_reports
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "reported_players": len(self._reported),
+            "reporters": len(self._reporters),
+            "hits": self.hits,
+            "misses": self.misses
+        }
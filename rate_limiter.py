@@ -0,0 +1,52 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+class RateLimiter:
+    """GCRA rate limiter allowing `limit` requests per `period` seconds per key.
+    
+    Each key costs a single float, its theoretical arrival time, so a check is
+    O(1). Keys whose arrival time has passed are indistinguishable from unseen
+    keys and are dropped by sweep(); the least recently used keys are evicted
+    once more than `max_keys` are tracked.
+    """
+
+    def __init__(self, limit: int, period: float, max_keys: int = 100000):
+        self.limit = max(1, limit)
+        self.period = period
+        self.max_keys = max_keys
+        self.emission_interval = period / self.limit
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+
+    def check(self, key: str, cost: int = 1) -> Tuple[bool, float]:
+        """Charge `cost` requests to `key`; returns (allowed, seconds until retry)."""
+        now = time.monotonic()
+        tat = max(self._tat.get(key, now), now)
+        new_tat = tat + self.emission_interval * cost
+        
+        if new_tat - now > self.period:
+            self.rejected += 1
+            return False, new_tat - self.period - now
+        
+        self._tat[key] = new_tat
+        self._tat.move_to_end(key)
+        while len(self._tat) > self.max_keys:
+            self._tat.popitem(last=False)
+        self.allowed += 1
+        return True, 0.0
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        expired = [key for key, tat in self._tat.items() if tat <= now]
+        for key in expired:
+            del self._tat[key]
+        return len(expired)
+
+    def stats(self) -> Dict:
+        return {
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "tracked_keys": len(self._tat)
+        }
@@ -0,0 +1,85 @@
+import discord
+from typing import Awaitable, Callable, Dict, Optional
+
+import logger
+
+log = logger.setup_logger("report_views")
+
+PageFetcher = Callable[..., Awaitable[Dict]]
+PageRenderer = Callable[[Dict, int], discord.Embed]
+
+class ReportPager(discord.ui.View):
+    """Previous/next buttons over a keyset-paginated report listing.
+    
+    `fetch(after=..., before=...)` is one of the database *_page functions with
+    its filters bound, and `render(page, number)` builds the embed for a page.
+    Only the admin who ran the command can turn the pages.
+    """
+
+    def __init__(self, owner_id: int, fetch: PageFetcher, render: PageRenderer, first_page: Dict, timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self.owner_id = owner_id
+        self.fetch = fetch
+        self.render = render
+        self.page = first_page
+        self.number = 1
+        self.message: Optional[discord.Message] = None
+        self._has_previous = False
+        self._has_next = first_page["has_more"]
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.previous_page.disabled = not self._has_previous
+        self.next_page.disabled = not self._has_next
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("❌ Only the admin who ran this command can change pages.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+    async def _turn(self, interaction: discord.Interaction, after: Optional[tuple] = None, before: Optional[tuple] = None):
+        try:
+            page = await self.fetch(after=after, before=before)
+        except Exception as e:
+            log.error(f"Error fetching report page: {e}", exc_info=True)
+            await interaction.response.send_message("❌ An error occurred while fetching reports.", ephemeral=True)
+            return
+        
+        if not page["reports"]:
+            if before is not None:
+                self._has_previous = False
+            else:
+                self._has_next = False
+            self._update_buttons()
+            await interaction.response.edit_message(view=self)
+            return
+        
+        if before is not None:
+            self.number = max(1, self.number - 1)
+            self._has_previous = page["has_more"]
+            self._has_next = True
+        else:
+            self.number += 1
+            self._has_previous = True
+            self._has_next = page["has_more"]
+        self.page = page
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.render(page, self.number), view=self)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, before=self.page["first"])
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, after=self.page["last"])
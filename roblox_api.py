@@ -0,0 +1,119 @@
+import asyncio
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from typing import Dict, List, Optional
+
+import logger
+
+log = logger.setup_logger("roblox_api")
+
+GAMES_API_URL = "https://games.roblox.com/v1/games"
+
+class RobloxClient:
+    """Roblox games API client with a shared connection pool and cached results.
+    
+    The place-to-universe mapping never changes, so it is cached for the life
+    of the process. Game stats are refreshed by a background task and readers
+    get the last successful result without waiting on the network.
+    """
+
+    def __init__(self, base_url: str = GAMES_API_URL, timeout: float = 5, max_connections: int = 4):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._session: Optional[ClientSession] = None
+        self._universe_ids: Dict[str, int] = {}
+        self._game_stats: Dict[str, Dict] = {}
+        self._refresh_tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        if self._session is None:
+            self._session = ClientSession(
+                connector=TCPConnector(limit=self.max_connections, ttl_dns_cache=300),
+                timeout=ClientTimeout(total=self.timeout)
+            )
+
+    async def close(self):
+        for task in self._refresh_tasks:
+            task.cancel()
+        await asyncio.gather(*self._refresh_tasks, return_exceptions=True)
+        self._refresh_tasks.clear()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get_games(self, **params) -> Optional[Dict]:
+        await self.start()
+        async with self._session.get(self.base_url, params=params) as response:
+            if response.status != 200:
+                log.warning(f"Roblox API returned {response.status} for {params}")
+                return None
+            data = await response.json()
+            if data.get('data') and len(data['data']) > 0:
+                return data['data'][0]
+            return None
+
+    async def fetch_game_stats(self, place_id: str) -> Optional[Dict]:
+        universe_id = self._universe_ids.get(place_id)
+        place_data = None
+        
+        if universe_id is None:
+            place_data = await self._get_games(placeIds=place_id)
+            if not place_data:
+                return None
+            universe_id = place_data.get('universeId')
+            if universe_id:
+                self._universe_ids[place_id] = universe_id
+        
+        if universe_id:
+            universe_info = await self._get_games(universeIds=universe_id)
+            if universe_info:
+                return {
+                    "name": universe_info.get('name', 'Unknown'),
+                    "playing": universe_info.get('playing', 0),
+                    "visits": universe_info.get('visits', 0),
+                    "favorites": universe_info.get('favoritedCount', 0),
+                    "likes": universe_info.get('likes', 0),
+                    "maxPlayers": universe_info.get('maxPlayers', 0),
+                    "created": universe_info.get('created', ''),
+                    "updated": universe_info.get('updated', ''),
+                    "universeId": universe_id,
+                    "placeId": place_id
+                }
+        
+        if place_data:
+            return {
+                "name": place_data.get('name', 'Unknown'),
+                "playing": place_data.get('playing', 0),
+                "visits": place_data.get('visits', 0),
+                "favorites": place_data.get('favoritedCount', 0),
+                "likes": place_data.get('likes', 0),
+                "maxPlayers": place_data.get('maxPlayers', 0),
+                "created": place_data.get('created', ''),
+                "updated": place_data.get('updated', ''),
+                "placeId": place_id
+            }
+        return None
+
+    async def refresh(self, place_id: str) -> Optional[Dict]:
+        try:
+            stats = await self.fetch_game_stats(place_id)
+        except Exception as e:
+            log.error(f"Error fetching Roblox game stats: {e}", exc_info=True)
+            return None
+        if stats:
+            self._game_stats[place_id] = stats
+        return stats
+
+    def get_game_stats(self, place_id: str) -> Optional[Dict]:
+        return self._game_stats.get(place_id)
+
+    def start_refresh(self, place_id: str, interval: float):
+        if not place_id:
+            return
+
+        async def refresh_loop():
+            while True:
+                await self.refresh(place_id)
+                await asyncio.sleep(interval)
+        
+        self._refresh_tasks.append(asyncio.create_task(refresh_loop()))
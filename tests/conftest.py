@@ -0,0 +1,19 @@
+import pytest
+
+from benchmarks import harness
+import player_index
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """The database module pointed at a fresh SQLite file."""
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("DATABASE_URL", "")
+    for key, value in harness.ENVIRONMENT_DEFAULTS.items():
+        monkeypatch.setenv(key, value)
+    import database
+    if database.USE_POSTGRES:
+        pytest.skip("runs against SQLite only")
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "reports.db"))
+    monkeypatch.setattr(database, "_player_index", player_index.PlayerIndex(0))
+    monkeypatch.setattr(database, "_sketches", {})
+    return database
@@ -0,0 +1,16 @@
+import asyncio
+
+def run(database, test):
+    """Run test() against a freshly initialised database, in one event loop."""
+    async def scenario():
+        await database.init_database()
+        try:
+            await test()
+        finally:
+            await database.close_database()
+    asyncio.run(scenario())
+
+def report(reporter_id: int, reported_id: int, abuse_type: str, timestamp: int, additional_info: str = ""):
+    return {"reporter_id": reporter_id, "reported_id": reported_id, "abuse_type": abuse_type,
+            "additional_info": additional_info, "timestamp": timestamp, "server_id": "server", "place_id": 1,
+            "outbox_payload": None}
@@ -0,0 +1,36 @@
+import time
+
+from admin_sessions import SessionManager, derive_secret
+
+def manager(ttl: int = 3600) -> SessionManager:
+    return SessionManager(derive_secret("test", "password"), ttl)
+
+def test_issued_token_verifies():
+    sessions = manager()
+    token = sessions.issue()
+    assert sessions.verify(token)
+    assert not manager().verify(token.replace(".", "x.", 1))
+
+def test_tampered_or_malformed_tokens_are_rejected():
+    sessions = manager()
+    session_id, expires_at, signature = sessions.issue().split(".")
+    later = int(time.time()) + 7200
+    assert not sessions.verify(f"{session_id}.{later}.{signature}")
+    assert not sessions.verify(f"{session_id}.{expires_at}")
+    assert not sessions.verify("")
+
+def test_non_ascii_tokens_are_rejected():
+    sessions = manager()
+    session_id, expires_at, signature = sessions.issue().split(".")
+    assert not sessions.verify(f"{session_id}.{expires_at}.{signature[:-1]}é")
+    assert not sessions.verify(f"sessión.{expires_at}.{signature}")
+    assert sessions.revoke("\udce9.1.x") is None
+
+def test_expired_and_revoked_tokens_are_rejected():
+    expired = manager(ttl=-1)
+    assert not expired.verify(expired.issue())
+    
+    sessions = manager()
+    token = sessions.issue()
+    assert sessions.revoke(token) is not None
+    assert not sessions.verify(token)
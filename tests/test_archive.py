@@ -0,0 +1,61 @@
+import time
+
+import player_index
+from tests.db import report, run
+
+DAY = 86400
+
+def test_report_context_counts_archived_reports(database):
+    now = int(time.time())
+    old = now - 40 * DAY
+
+    async def contexts(reports):
+        return [await database.get_report_context(r["reporter_id"], r["reported_id"], report_id, now)
+                for report_id, r in reports.items()]
+
+    async def test():
+        await database.add_reports([report(1, 100, "Spam", old + i) for i in range(3)] +
+                                   [report(1, 100, "Exploiting", old + 3), report(2, 200, "Spam", old)])
+        current = [report(1, 100, "Exploiting", now - 60), report(1, 100, "Exploiting", now - 10),
+                   report(2, 200, "Bullying", now - 10)]
+        reports = dict(zip(await database.add_reports(current), current))
+        before = await contexts(reports)
+        assert [c["reporter_history"] for c in before] == [5, 6, 2]
+        assert before[1]["most_common_reason"] == "Spam (3 times)"
+        assert before[2]["time_since_last"] is not None
+        
+        assert await database.archive_reports(32) == 5
+        assert await contexts(reports) == before
+        
+        database._player_index = player_index.PlayerIndex()
+        await database.warm_player_index()
+        assert await contexts(reports) == before
+        assert database._player_index.hits == len(reports)
+        
+        database._player_index = player_index.PlayerIndex()
+        database._player_index.total_reports = await database.get_total_reports()
+        await database._load_reported_entry(100)
+        await database._load_reported_entry(200)
+        await database._load_reporter_entry(1)
+        await database._load_reporter_entry(2)
+        assert await contexts(reports) == before
+        assert database._player_index.hits == len(reports)
+    run(database, test)
+
+def test_reports_with_failed_deliveries_are_archived(database):
+    old = int(time.time()) - 40 * DAY
+
+    async def test():
+        failed, pending = await database.add_reports([
+            dict(report(1, 100, "Spam", old), outbox_payload={"channel": 1}),
+            dict(report(1, 100, "Spam", old + 1), outbox_payload={"channel": 1})
+        ])
+        claimed = {entry["report"]["id"]: entry["outbox_id"] for entry in await database.claim_outbox(10, 60)}
+        await database.retry_outbox([claimed[failed]], "Forbidden")
+        await database.retry_outbox([claimed[pending]], "Timeout", old)
+        assert await database.get_outbox_backlog() == {"pending": 1, "failed": 1}
+        
+        assert await database.archive_reports(32) == 1
+        assert await database.get_outbox_backlog() == {"pending": 1, "failed": 0}
+        assert [entry["report"]["id"] for entry in await database.claim_outbox(10, 60)] == [pending]
+    run(database, test)
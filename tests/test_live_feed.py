@@ -0,0 +1,61 @@
+import asyncio
+import json
+import logging
+
+from dashboard_cache import SnapshotCache
+from live_feed import Broadcaster, DashboardFeed
+import live_feed
+
+def report(report_id: int):
+    return {"id": report_id, "reported_id": 1, "abuse_type": "Spam"}
+
+def published(queue: asyncio.Queue):
+    events = []
+    while not queue.empty():
+        event, data = queue.get_nowait().decode().split("\n", 1)
+        events.append((event[len("event: "):], json.loads(data[len("data: "):].strip())))
+    return events
+
+def feed_with(data):
+    async def compute():
+        return data
+    broadcaster = Broadcaster()
+    return DashboardFeed(SnapshotCache(compute, ttl=0), broadcaster, min_interval=0), broadcaster
+
+def test_reports_stored_out_of_order_are_published():
+    async def test():
+        feed, broadcaster = feed_with({"recent_reports": [report(1)]})
+        feed._set_baseline({"recent_reports": [report(1)]})
+        queue = broadcaster.subscribe()
+        feed._publish_reports([report(3)])
+        feed._publish_reports([report(2), report(3)])
+        feed._publish_reports([report(1), report(2)])
+        assert [[r["id"] for r in data["reports"]] for _, data in published(queue)] == [[3], [2]]
+        await feed.close()
+    asyncio.run(test())
+
+def test_published_ids_are_bounded():
+    async def test():
+        feed, broadcaster = feed_with({})
+        queue = broadcaster.subscribe()
+        feed._publish_reports([report(i) for i in range(1, live_feed.PUBLISHED_IDS + 11)])
+        assert len(feed._published) == live_feed.PUBLISHED_IDS
+        feed._publish_reports([report(5), report(live_feed.PUBLISHED_IDS + 11)])
+        assert [[r["id"] for r in data["reports"]] for _, data in published(queue)][-1] == [live_feed.PUBLISHED_IDS + 11]
+    asyncio.run(test())
+
+def test_failed_refresh_is_logged(caplog):
+    async def test():
+        async def compute():
+            raise RuntimeError("snapshot failed")
+        broadcaster = Broadcaster()
+        broadcaster.subscribe()
+        feed = DashboardFeed(SnapshotCache(compute, ttl=0), broadcaster, min_interval=0)
+        feed.reports_added([report(1)])
+        task = feed._refresh_task
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert feed._refresh_task is None
+    with caplog.at_level(logging.ERROR, logger="live_feed"):
+        asyncio.run(test())
+    assert "snapshot failed" in caplog.text
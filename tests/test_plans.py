@@ -0,0 +1,28 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_hot_query_plans(tmp_path):
+    """Run `python -m benchmarks plans` on a small SQLite fixture and require no violations."""
+    output = tmp_path / "plans.json"
+    env = dict(os.environ, SLOW_QUERY_MS="0")
+    env.pop("BENCHMARK_DATABASE_URL", None)
+    process = subprocess.run(
+        [sys.executable, "-m", "benchmarks", "--output", str(output),
+         "plans", "--rows", "5000", "--fixtures", str(tmp_path / "fixtures")],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=600
+    )
+    assert output.exists(), process.stdout + process.stderr
+    
+    with open(output) as f:
+        result = json.load(f)["results"][0]
+    assert result["checked"]
+    assert result["queries"], "no database functions were called"
+    violations = [f"{name}: {statement['sql'][:160]} -> {statement['violations']}"
+                  for name, statements in result["queries"].items()
+                  for statement in statements if statement["violations"]]
+    assert not violations, "\n".join(violations)
+    assert process.returncode == 0, process.stdout + process.stderr
@@ -0,0 +1,123 @@
+import asyncio
+from typing import Dict, List
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from roblox_api import RobloxClient
+
+PLACE_ID = "1818"
+UNIVERSE_ID = 13058
+
+class GamesStub:
+    """Stand-in for games.roblox.com/v1/games that records what it was asked."""
+
+    def __init__(self):
+        self.requests: List[Dict[str, str]] = []
+        self.peers = set()
+        self.playing = 0
+        self.status = 200
+        self.app = web.Application()
+        self.app.router.add_get("/v1/games", self.games)
+
+    async def games(self, request: web.Request) -> web.Response:
+        self.requests.append(dict(request.query))
+        self.peers.add(request.transport.get_extra_info("peername"))
+        if self.status != 200:
+            return web.json_response({"errors": []}, status=self.status)
+        if "placeIds" in request.query:
+            return web.json_response({"data": [{"universeId": UNIVERSE_ID, "name": "Place", "playing": -1}]})
+        self.playing += 1
+        return web.json_response({"data": [{
+            "name": "Classic: Crossroads",
+            "playing": self.playing,
+            "visits": 500,
+            "favoritedCount": 40,
+            "maxPlayers": 12
+        }]})
+
+    def count(self, param: str) -> int:
+        return sum(1 for query in self.requests if param in query)
+
+async def with_stub(test):
+    stub = GamesStub()
+    server = TestServer(stub.app)
+    await server.start_server()
+    client = RobloxClient(base_url=str(server.make_url("/v1/games")))
+    try:
+        await test(stub, client)
+    finally:
+        await client.close()
+        await server.close()
+
+def run(test):
+    asyncio.run(with_stub(test))
+
+def test_fetch_game_stats_reads_universe():
+    async def test(stub, client):
+        stats = await client.fetch_game_stats(PLACE_ID)
+        assert stats["name"] == "Classic: Crossroads"
+        assert stats["playing"] == 1
+        assert stats["favorites"] == 40
+        assert stats["universeId"] == UNIVERSE_ID
+        assert stats["placeId"] == PLACE_ID
+        assert stub.requests == [{"placeIds": PLACE_ID}, {"universeIds": str(UNIVERSE_ID)}]
+    run(test)
+
+def test_universe_id_is_cached():
+    async def test(stub, client):
+        for _ in range(3):
+            await client.fetch_game_stats(PLACE_ID)
+        assert stub.count("placeIds") == 1
+        assert stub.count("universeIds") == 3
+    run(test)
+
+def test_requests_share_one_session():
+    async def test(stub, client):
+        await client.fetch_game_stats(PLACE_ID)
+        session = client._session
+        await client.fetch_game_stats(PLACE_ID)
+        assert client._session is session
+        # Sequential requests reuse the pooled keep-alive connection.
+        assert len(stub.peers) == 1
+        
+        await client.close()
+        assert client._session is None
+        await client.fetch_game_stats(PLACE_ID)
+        assert client._session is not None and client._session is not session
+    run(test)
+
+def test_background_refresh_updates_cached_stats():
+    async def test(stub, client):
+        assert client.get_game_stats(PLACE_ID) is None
+        client.start_refresh(PLACE_ID, 0.01)
+        for _ in range(200):
+            stats = client.get_game_stats(PLACE_ID)
+            if stats and stats["playing"] >= 3:
+                break
+            await asyncio.sleep(0.01)
+        assert client.get_game_stats(PLACE_ID)["playing"] >= 3
+        assert stub.count("placeIds") == 1
+        
+        await client.close()
+        assert client._refresh_tasks == []
+        requests = len(stub.requests)
+        await asyncio.sleep(0.05)
+        assert len(stub.requests) == requests
+    run(test)
+
+def test_failed_refresh_keeps_last_stats():
+    async def test(stub, client):
+        assert (await client.refresh(PLACE_ID))["playing"] == 1
+        stub.status = 503
+        assert await client.refresh(PLACE_ID) is None
+        assert client.get_game_stats(PLACE_ID)["playing"] == 1
+    run(test)
+
+def test_empty_refresh_place_is_ignored():
+    async def test(stub, client):
+        client.start_refresh("", 0.01)
+        await asyncio.sleep(0.03)
+        assert client._refresh_tasks == []
+        assert stub.requests == []
+    run(test)
@@ -0,0 +1,32 @@
+import time
+
+from tests.db import report, run
+
+def test_search_pages_are_stable_while_reports_arrive(database):
+    now = int(time.time())
+
+    def page_ids(page):
+        return [r["id"] for r in page["reports"]]
+
+    async def test():
+        info = ["aimbot", "aimbot and fly hacks", "spamming chat", "aimbot " * 3, "using an aimbot in ranked", "aimbot"]
+        await database.add_reports([report(1, 100 + i, "Exploiting", now - 600 + i * 60, text)
+                                    for i, text in enumerate(info)])
+        expected = [r["id"] for r in await database.search_reports("aimbot", 10)]
+        assert len(expected) == 5
+        
+        first = await database.search_reports_page("aimbot", 2)
+        seen = page_ids(first)
+        page = first
+        while page["has_more"] and len(seen) <= len(expected):
+            # Newer matches, and more documents for the ranking to weigh.
+            await database.add_reports([report(2, 200, "Exploiting", now + len(seen), "aimbot aimbot"),
+                                        report(2, 201, "Exploiting", now + len(seen), "no match")])
+            page = await database.search_reports_page("aimbot", 2, after=page["last"])
+            seen += page_ids(page)
+        assert seen == expected
+        
+        second = await database.search_reports_page("aimbot", 2, after=first["last"])
+        back = await database.search_reports_page("aimbot", 2, before=second["first"])
+        assert page_ids(back) == page_ids(first)
+    run(database, test)